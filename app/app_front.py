@@ -1,8 +1,13 @@
 # app/app_front.py — Streamlit front page (persistent reports panel)
+# Streamlit reruns this file on every widget click, so file reads are cached
+# and keyed by each file's (mtime, size): a rerun costs a few stat() calls and
+# the tables are re-read only after a stage (or anyone else) rewrites them.
+# events.csv is shown filtered by date range / subject, one page at a time,
+# with per-subject and per-day summaries instead of the raw million rows.
 import streamlit as st
-import pandas as pd, json, subprocess, sys, os
+import pandas as pd, json
+from datetime import timedelta
 from pathlib import Path
-import time
 
 # ----- Paths (resolve from repo root) -----
 ROOT = Path(__file__).resolve().parents[1]
@@ -23,25 +28,47 @@ if "reports" not in st.session_state:
         "Learn": "",
         "ML": "",
         "DL": "",
-        "PRAL": ""
+        "PRAL": "",
+        "DAG": ""
     }
 
 def save_report(name: str, text: str):
     st.session_state.reports[name] = text.strip()
 
 # ----- Helpers -----
-def run_file(pyfile: Path) -> str:
-    """Run a Python file with the same interpreter; capture stdout+stderr."""
-    env = os.environ.copy()
-    p = subprocess.run(
-        [sys.executable, str(pyfile)],
-        cwd=ROOT, env=env, capture_output=True, text=True
-    )
-    out = (p.stdout or "").strip()
-    err = (p.stderr or "").strip()
-    if err:
-        out += ("\n[stderr]\n" + err)
-    return out
+import pipeline  # app/ is on sys.path when Streamlit runs this file
+import stage_dag
+from event_store import load_events
+from loader import read_deadlines
+
+PAGE_ROWS = 500  # rows sent to the browser per table page
+
+def run_stages(stages: list[str]) -> tuple[str, dict]:
+    """Run stages in-process (pandas/sklearn/torch stay imported between clicks)."""
+    try:
+        res = pipeline.run_pral(stages)
+    except SystemExit as e:  # stage scripts report fatal problems via SystemExit
+        return str(e), {}
+    return pipeline.format_report(res), res
+
+def dag_frame(res: dict) -> pd.DataFrame:
+    """One row per stage of a stage_dag run (prepare included), offsets from the run start."""
+    off = res["prepare_s"]
+    rows = [{"stage": "prepare", "status": "ok", "start_s": 0.0, "end_s": off, "critical": True}]
+    for name, t in res["stages"].items():
+        if t.get("start_s") is not None:
+            rows.append({"stage": name, "status": t["status"], "start_s": off + t["start_s"],
+                         "end_s": off + t.get("end_s", t["start_s"]), "critical": name in res["critical_path"]})
+    return pd.DataFrame(rows).assign(seconds=lambda d: (d["end_s"] - d["start_s"]).round(3))
+
+def timeline_chart(res: dict):
+    """Gantt chart of a concurrent run; the critical path is highlighted."""
+    import altair as alt
+    return (alt.Chart(dag_frame(res)).mark_bar()
+            .encode(x=alt.X("start_s:Q", title="seconds"), x2="end_s:Q",
+                    y=alt.Y("stage:N", sort=None, title=None),
+                    color=alt.Color("critical:N", title="critical path"),
+                    tooltip=["stage", "status", "start_s", "seconds"]))
 
 def seed_if_missing():
     ev = DATA / "events.csv"
@@ -62,6 +89,62 @@ def seed_if_missing():
             encoding="utf-8"
         )
 
+# ----- Cached loaders (invalidated when the file changes on disk) -----
+def stamp(path: Path) -> tuple[int, int]:
+    """(mtime_ns, size) of path; (0, 0) when it does not exist."""
+    try:
+        s = path.stat()
+    except OSError:
+        return (0, 0)
+    return (s.st_mtime_ns, s.st_size)
+
+@st.cache_resource(max_entries=2, show_spinner="Loading events…")
+def load_events_cached(path: Path, key: tuple) -> pd.DataFrame:
+    """All events (via the columnar store when enabled) with the loader's dtypes (subject as category).
+    A shared resource rather than cache_data: a million-row frame is not copied on
+    every rerun. Callers must not modify it."""
+    if key == (0, 0):
+        return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "subject": pd.Series(dtype="category")})
+    return load_events(cfg=pipeline.run_planner.load_config(), csv=path)
+
+@st.cache_data(max_entries=8)
+def read_csv_cached(path: Path, key: tuple) -> pd.DataFrame:
+    return pd.read_csv(path) if key != (0, 0) else pd.DataFrame()
+
+@st.cache_data(max_entries=2)
+def read_deadlines_cached(path: Path, key: tuple) -> pd.DataFrame:
+    return read_deadlines(path) if key != (0, 0) else pd.DataFrame()
+
+@st.cache_data(max_entries=8)
+def read_json_cached(path: Path, key: tuple):
+    return json.load(open(path, "r", encoding="utf-8")) if key != (0, 0) else None
+
+def filter_events(ev: pd.DataFrame, start, end, subjects) -> pd.DataFrame:
+    """Rows with start <= date <= end and subject in subjects (all subjects when empty)."""
+    m = (ev["date"] >= pd.Timestamp(start)) & (ev["date"] < pd.Timestamp(end) + timedelta(days=1))
+    if subjects:
+        m &= ev["subject"].isin(subjects)
+    return ev[m]
+
+@st.cache_data(max_entries=16)
+def event_summaries(_ev: pd.DataFrame, key: tuple, start, end, subjects) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(per-subject totals, minutes per day) for the filtered events; cached per file version and filter."""
+    f = filter_events(_ev, start, end, subjects)
+    by_subject = (f.groupby("subject", observed=True)
+                   .agg(events=("subject", "size"), est_min=("est_min", "sum"),
+                        done_min=("done_min", "sum"), completion_rate=("completed", "mean"))
+                   .round({"completion_rate": 3}))
+    per_day = f.groupby(f["date"].dt.normalize())[["est_min", "done_min"]].sum()
+    return by_subject, per_day
+
+def paged_table(df: pd.DataFrame, key: str):
+    """Show one PAGE_ROWS page of df with a page picker."""
+    pages = max(1, -(-len(df) // PAGE_ROWS))
+    page = st.number_input(f"Page (of {pages})", 1, pages, 1, key=f"{key}_page") if pages > 1 else 1
+    lo = (page - 1) * PAGE_ROWS
+    st.caption(f"rows {lo + 1 if len(df) else 0}–{min(lo + PAGE_ROWS, len(df))} of {len(df)}")
+    st.dataframe(df.iloc[lo:lo + PAGE_ROWS], use_container_width=True)
+
 # ----- UI -----
 st.set_page_config(page_title="ISA-Lite", layout="wide")
 st.title("ISA-Lite • Intelligent Study Assistant")
@@ -77,42 +160,63 @@ if st.sidebar.button("Clear reports panel"):
         st.session_state.reports[k] = ""
     st.sidebar.success("Cleared saved outputs.")
 
-# Load data tables
-seed_if_missing()
-ev = pd.read_csv(DATA / "events.csv")
-dl = pd.read_csv(DATA / "deadlines.csv")
+# Load data tables (sample data is seeded once per session, not on every rerun)
+if not st.session_state.get("seeded"):
+    seed_if_missing()
+    st.session_state.seeded = True
+ev_key = stamp(DATA / "events.csv")
+ev = load_events_cached(DATA / "events.csv", ev_key)
+dl = read_deadlines_cached(DATA / "deadlines.csv", stamp(DATA / "deadlines.csv"))
 
 colA, colB = st.columns([1,1])
 with colA:
     st.subheader("Data")
-    st.markdown("**events.csv**")
-    st.dataframe(ev, use_container_width=True)
+    st.markdown(f"**events.csv** ({len(ev)} events)")
+    dates = ev["date"].dropna()
+    if len(dates):
+        lo_d, hi_d = dates.min().date(), dates.max().date()
+        default = (max(lo_d, hi_d - timedelta(days=30)), hi_d)
+        picked = st.date_input("Date range", default, min_value=lo_d, max_value=hi_d)
+        start, end = (picked[0], picked[-1]) if isinstance(picked, (tuple, list)) and picked else default
+        subjects = tuple(st.multiselect("Subjects", list(ev["subject"].cat.categories)))
+        by_subject, per_day = event_summaries(ev, ev_key, start, end, subjects)
+        tab_sum, tab_rows = st.tabs(["Summary", "Rows"])
+        with tab_sum:
+            st.dataframe(by_subject, use_container_width=True)
+            if len(per_day):
+                st.line_chart(per_day)
+        with tab_rows:
+            paged_table(filter_events(ev, start, end, subjects), "events")
+    else:
+        st.info("No dated events yet.")
     st.markdown("**deadlines.csv**")
-    st.dataframe(dl, use_container_width=True)
+    if dl.attrs.get("rejected"):
+        st.caption(f"{dl.attrs['rejected']} malformed row(s) skipped, see report/rejected_deadlines.csv")
+    paged_table(dl, "deadlines")
 
 with colB:
     st.subheader("Quick Actions")
 
     if st.button("Run Perceive"):
-        out = run_file(APP / "perceive.py")
+        out, _ = run_stages(["perceive"])
         save_report("Perceive", out)
         st.success("Perceive completed. Report saved below.")
         st.code(out)
 
     if st.button("Run Reason (Prolog)"):
-        out = run_file(APP / "run_planner.py")
+        out, _ = run_stages(["reason"])
         save_report("Reason", out)
         st.success("Reason completed. Report saved below.")
         st.code(out)
 
     if st.button("Run Act (Schedule)"):
-        out = run_file(APP / "schedule_apply.py")
+        out, _ = run_stages(["act"])
         save_report("Act", out)
         st.success("Act completed. Report saved below.")
         st.code(out)
 
     if st.button("Run Learn (Weekly Metrics)"):
-        out = run_file(APP / "learn_weekly.py")
+        out, _ = run_stages(["learn"])
         save_report("Learn", out)
         st.success("Learn completed. Report saved below.")
         st.code(out)
@@ -120,13 +224,13 @@ with colB:
     st.divider()
 
     if st.button("Run ML (Adherence Predictor)"):
-        out = run_file(ROOT / "ml" / "ml_adherence.py")
+        out, _ = run_stages(["ml"])
         save_report("ML", out)
         st.success("ML completed. Report saved below.")
         st.code(out)
 
     if st.button("Run DL (Minutes Predictor)"):
-        out = run_file(ROOT / "dl" / "dl_minutes_predictor.py")
+        out, _ = run_stages(["dl"])
         save_report("DL", out)
         st.success("DL completed. Report saved below.")
         st.code(out)
@@ -135,17 +239,41 @@ st.divider()
 st.subheader("One-Click Pipeline")
 
 if st.button("Run PRAL (Perceive→Reason→Act→Learn)"):
-    t0 = time.time()
-    pral_log = []
-    for py in [APP/"perceive.py", APP/"run_planner.py", APP/"schedule_apply.py", APP/"learn_weekly.py"]:
-        pral_log.append(f"→ {py.relative_to(ROOT)}")
-        pral_log.append(run_file(py))
-    pral_out = "\n\n".join([x for x in pral_log if x.strip()])
+    pral_out, res = run_stages(pipeline.DEFAULT_STAGES)  # prediction table (if stale) first
 
     save_report("PRAL", pral_out)
-    st.success(f"PRAL finished in {time.time()-t0:.2f}s. Full report saved below.")
+    if res:
+        st.success(f"PRAL finished in {res['total_s']:.2f}s (in-process). Full report saved below.")
+        st.dataframe(
+            pd.DataFrame({"stage": list(res["timings_s"]), "latency_s": list(res["timings_s"].values())}),
+            use_container_width=True,
+        )
+    else:
+        st.error("PRAL failed. Report saved below.")
     st.code(pral_out)
 
+if st.button("Run all stages concurrently (PRAL + ML + DL)"):
+    # independent stages (ML, DL, Learn, the Perceive→Reason→Act chain) run side by side
+    live = st.empty()
+    state = {}
+    def show(name, info):
+        state[name] = info["status"]
+        live.text("  ".join(f"{k}: {v}" for k, v in state.items()))
+    try:
+        res = stage_dag.run_dag(on_update=show)
+    except SystemExit as e:
+        save_report("DAG", str(e))
+        st.error(str(e))
+    else:
+        st.session_state.dag_run = res
+        text = stage_dag.format_timeline(res)
+        failed = {k: t for k, t in res["stages"].items() if t["status"] != "ok"}
+        save_report("DAG", text + "".join(f"\n\n----- {k} ({t['status']}) -----\n{t.get('output', '')}"
+                                          for k, t in failed.items()))
+        (st.success if res["ok"] else st.error)(
+            f"Finished in {res['wall_s']:.2f}s wall ({res['sum_s']:.2f}s of stage time); "
+            f"critical path {' → '.join(res['critical_path'])}. Timeline saved below.")
+
 st.divider()
 st.subheader("Outputs (Generated Files)")
 
@@ -153,25 +281,34 @@ plan_path    = APP  / "plan.json"
 today_path   = DATA / "todays_plan.csv"
 metrics_path = REP  / "weekly_metrics.json"
 
-if plan_path.exists():
-    plan = json.load(open(plan_path, "r", encoding="utf-8"))
+plan = read_json_cached(plan_path, stamp(plan_path))
+if plan is not None:
     st.markdown("**Planner decisions (Reason output)**")
     st.dataframe(pd.DataFrame(plan), use_container_width=True)
 
 if today_path.exists():
     st.markdown("**Today's schedule (Act output)**")
-    st.dataframe(pd.read_csv(today_path), use_container_width=True)
+    paged_table(read_csv_cached(today_path, stamp(today_path)), "today")
 
-if metrics_path.exists():
+metrics = read_json_cached(metrics_path, stamp(metrics_path))
+if metrics is not None:
     st.markdown("**Weekly metrics (Learn output)**")
-    st.json(json.load(open(metrics_path, "r", encoding="utf-8")))
+    st.json(metrics)
 
 # ----- Persistent Reports Panel -----
 st.divider()
 st.header("Reports Panel (Saved After Each Run)")
 
+if st.session_state.get("dag_run"):
+    with st.expander("Timeline: last concurrent run (critical path highlighted)", expanded=True):
+        res = st.session_state.dag_run
+        st.altair_chart(timeline_chart(res), use_container_width=True)
+        st.caption(f"wall {res['wall_s']:.2f}s = critical path {' → '.join(['prepare'] + res['critical_path'])} "
+                   f"({res['critical_s']:.2f}s); sum of stages {res['sum_s']:.2f}s")
+        st.dataframe(dag_frame(res), use_container_width=True)
+
 # Show each report in an expander with a clear heading
-for name in ["Perceive", "Reason", "Act", "Learn", "ML", "DL", "PRAL"]:
+for name in ["Perceive", "Reason", "Act", "Learn", "ML", "DL", "PRAL", "DAG"]:
     label = f"Report: {name} (saved output)"
     with st.expander(label, expanded=False):
         txt = st.session_state.reports.get(name, "")
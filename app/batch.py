@@ -0,0 +1,171 @@
+# app/batch.py — nightly multi-student planning for ISA-Lite
+# Runs Perceive → Reason → Act for every student across a process pool.
+#
+# Input (one directory per student):
+#   <in>/<student_id>/events.csv
+#   <in>/<student_id>/deadlines.csv
+# Output:
+#   <out>/<student_id>/facts.pl, plan.json, todays_plan.csv, horizon_plan.csv
+#   <out>/<student_id>/rejected_events.csv, rejected_deadlines.csv (only when rows were rejected)
+#   <out>/summary.json, <out>/summary.csv
+#
+#   python app/batch.py <in> <out> [--workers N] [--backend native|prolog]
+#   python app/batch.py --split events.csv deadlines.csv <in>   # CSVs with a student_id column
+#
+# A failing student is recorded in the summary and never aborts the batch.
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pandas as pd
+
+from run_planner import load_config
+
+# one warm Prolog worker per pool process (created on first use)
+_WORKER = None
+
+
+def split_by_student(events_csv: Path, deadlines_csv: Path, out_dir: Path) -> int:
+    """Partition combined CSVs (with a student_id column) into the per-student layout."""
+    out_dir = Path(out_dir)
+    ev = pd.read_csv(events_csv)
+    dl = pd.read_csv(deadlines_csv)
+    for name, df in (("events.csv", ev), ("deadlines.csv", dl)):
+        if "student_id" not in df.columns:
+            raise SystemExit(f"[batch] {name} has no student_id column")
+        for sid, g in df.groupby("student_id", sort=False):
+            d = out_dir / str(sid)
+            d.mkdir(parents=True, exist_ok=True)
+            g.drop(columns="student_id").to_csv(d / name, index=False)
+    return int(ev["student_id"].nunique())
+
+
+def _reason(facts: str, facts_path: Path, backend: str) -> list[dict]:
+    global _WORKER
+    if backend == "native":
+        from reason_native import plan_from_facts, parse_facts
+        return plan_from_facts(parse_facts(facts))
+    from prolog_server import PrologWorker
+    from run_planner import parse_plan
+    if _WORKER is None:
+        _WORKER = PrologWorker()
+    out, _ = _WORKER.plan(facts_path)
+    return parse_plan(out)
+
+
+def plan_student(student_dir: str, out_dir: str, cfg: dict, backend: str) -> dict:
+    """Perceive → Reason → Act for one student. Never raises: errors go into the result."""
+    import perceive
+    import schedule_apply
+    from loader import read_deadlines, read_events
+
+    sid = Path(student_dir).name
+    t0 = time.perf_counter()
+    try:
+        src, dst = Path(student_dir), Path(out_dir) / sid
+        dst.mkdir(parents=True, exist_ok=True)
+        dl = read_deadlines(src / "deadlines.csv", rejects=dst / "rejected_deadlines.csv")
+        ev = read_events(src / "events.csv", rejects=dst / "rejected_events.csv")
+        facts = perceive.perceive(dl, ev, cfg, facts_path=dst / "facts.pl")["facts"]
+        plan = _reason(facts, dst / "facts.pl", backend)
+        (dst / "plan.json").write_text(json.dumps(plan, indent=2), encoding="utf-8")
+        sched = schedule_apply.act(plan, dl, dst / "todays_plan.csv", dst / "horizon_plan.csv", cfg)
+        return {
+            "student": sid, "status": "ok",
+            "subjects": len(plan),
+            "shortlisted": sum(p["decision"] == "shortlist" for p in plan),
+            "sessions": len(sched),
+            "minutes": int(sched["minutes"].sum()),
+            "latency_s": round(time.perf_counter() - t0, 4),
+        }
+    except (Exception, SystemExit) as e:  # isolate the student
+        return {
+            "student": sid, "status": "error",
+            "error": f"{type(e).__name__}: {e}".strip(),
+            "trace": traceback.format_exc(limit=3),
+            "latency_s": round(time.perf_counter() - t0, 4),
+        }
+
+
+def _run_pool(dirs: list[str], out_dir: str, cfg: dict, backend: str, workers: int) -> tuple[list[dict], list[str]]:
+    """Run students on a pool; returns (results, students lost to a crashed worker process)."""
+    results, lost = [], []
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futs = {ex.submit(plan_student, d, out_dir, cfg, backend): d for d in dirs}
+        for f in as_completed(futs):
+            try:
+                results.append(f.result())
+            except BrokenProcessPool:
+                lost.append(futs[f])
+    return results, lost
+
+
+def run_batch(in_dir: Path, out_dir: Path, workers: int | None = None, backend: str | None = None) -> dict:
+    cfg = load_config()
+    backend = backend or str(cfg.get("reason_backend", "prolog"))
+    workers = workers or int(cfg.get("batch_workers", 0)) or os.cpu_count() or 1
+    in_dir, out_dir = Path(in_dir), Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dirs = sorted(str(d) for d in in_dir.iterdir() if d.is_dir())
+
+    t0 = time.perf_counter()
+    results, lost = _run_pool(dirs, str(out_dir), cfg, backend, workers)
+    if lost:
+        # a worker process died (not a Python error): retry those students one at a time
+        for d in lost:
+            r, _ = _run_pool([d], str(out_dir), cfg, backend, 1)
+            results += r or [{"student": Path(d).name, "status": "error",
+                              "error": "worker process crashed", "latency_s": None}]
+    elapsed = time.perf_counter() - t0
+
+    results.sort(key=lambda r: r["student"])
+    ok = [r for r in results if r["status"] == "ok"]
+    summary = {
+        "students": len(results),
+        "ok": len(ok),
+        "failed": len(results) - len(ok),
+        "workers": workers,
+        "backend": backend,
+        "elapsed_s": round(elapsed, 3),
+        "students_per_s": round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        "shortlisted": sum(r["shortlisted"] for r in ok),
+        "minutes": sum(r["minutes"] for r in ok),
+        "errors": [{"student": r["student"], "error": r["error"]} for r in results if r["status"] != "ok"],
+    }
+    (out_dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    pd.DataFrame(results).drop(columns=["trace"], errors="ignore").to_csv(out_dir / "summary.csv", index=False)
+    return summary
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="ISA-Lite multi-student batch planner")
+    ap.add_argument("in_dir", type=Path, nargs="?")
+    ap.add_argument("out_dir", type=Path, nargs="?")
+    ap.add_argument("--workers", type=int, default=None, help="pool size (default: batch_workers or CPU count)")
+    ap.add_argument("--backend", choices=["prolog", "native"], default=None)
+    ap.add_argument("--split", nargs=3, metavar=("EVENTS", "DEADLINES", "OUT"), type=Path,
+                    help="split combined CSVs with a student_id column into per-student dirs")
+    args = ap.parse_args(argv)
+
+    if args.split:
+        n = split_by_student(*args.split)
+        print(f"[batch] wrote {n} student dirs to {args.split[2]}")
+        return
+    if not args.in_dir or not args.out_dir:
+        ap.error("in_dir and out_dir are required")
+    s = run_batch(args.in_dir, args.out_dir, args.workers, args.backend)
+    print(f"[batch] {s['ok']}/{s['students']} students planned in {s['elapsed_s']}s "
+          f"({s['students_per_s']} students/s, {s['workers']} workers, backend={s['backend']})")
+    for e in s["errors"][:10]:
+        print(f"[batch]   {e['student']}: {e['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# app/event_store.py — columnar, date-partitioned event store for ISA-Lite
+# events.csv stays the source of truth; this keeps a binary copy that window
+# queries can read without parsing the CSV:
+#
+#   store/events/meta.json            vocab, partition index, source fingerprint
+#   store/events/p=2025-10/<col>.npy  one NumPy column per file, rows sorted by date
+#
+# Partitions are calendar months and are memory-mapped on read. The partition
+# index (min/max day per partition, sorted) lets a window query open only the
+# months it overlaps, then binary-search the sorted date column inside them.
+#
+#   python app/event_store.py import            # (re)build from data/events.csv
+#   python app/event_store.py sync              # append new CSV rows only
+#   python app/event_store.py query --days 7
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import file_fingerprint, appended_tail, header_line
+from loader import EVENTS, compact, iter_events, read_events, read_tail
+from tracing import annotate, count, traced
+
+ROOT = Path(__file__).resolve().parents[1]
+EVENTS_CSV = ROOT / "data" / "events.csv"
+STORE_DIR = ROOT / "store" / "events"
+
+# column -> on-disk dtype; integer columns use -1 for "missing"
+COLUMNS = {
+    "date": "int32",        # days since 1970-01-01
+    "subject": "int16",     # index into meta["subjects"]
+    "est_min": "int32",
+    "done_min": "int32",
+    "reminders": "int16",
+    "completed": "int8",
+    "seq": "int64",         # row number in events.csv (restores file order)
+}
+CSV_COLUMNS = ["date", "subject", "est_min", "done_min", "reminders", "completed"]
+MISSING = -1
+EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def _part_key(days: np.ndarray) -> np.ndarray:
+    """Partition key (YYYY-MM) for an array of day numbers."""
+    return (EPOCH + days.astype("timedelta64[D]")).astype("datetime64[M]").astype(str)
+
+
+class EventStore:
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+        self.meta_path = self.root / "meta.json"
+        self.meta = self._load_meta()
+
+    # ---------- metadata ----------
+    def _load_meta(self) -> dict:
+        try:
+            return json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {"version": 1, "subjects": [], "partitions": {}, "rows": 0, "source": {}}
+
+    def _save_meta(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.meta, indent=1), encoding="utf-8")
+        os.replace(tmp, self.meta_path)
+
+    def exists(self) -> bool:
+        return self.meta_path.exists()
+
+    @property
+    def rows(self) -> int:
+        return int(self.meta["rows"])
+
+    def max_date(self) -> pd.Timestamp | None:
+        parts = self.meta["partitions"]
+        if not parts:
+            return None
+        return pd.Timestamp(EPOCH + np.timedelta64(max(p["max"] for p in parts.values()), "D"))
+
+    # ---------- writing ----------
+    def _encode(self, df: pd.DataFrame, seq0: int) -> dict[str, np.ndarray]:
+        """CSV-shaped frame -> column arrays (rows without a date cannot be partitioned and are dropped)."""
+        df = df.assign(seq=np.arange(seq0, seq0 + len(df), dtype=np.int64))
+        df = df[df["date"].notna()]
+        vocab = {s: i for i, s in enumerate(self.meta["subjects"])}
+        subj = df["subject"].astype(str)
+        for s in pd.unique(subj):
+            if s not in vocab:
+                vocab[s] = len(self.meta["subjects"])
+                self.meta["subjects"].append(s)
+        cols = {
+            "date": ((df["date"].values.astype("datetime64[D]") - EPOCH).astype(np.int32)),
+            "subject": subj.map(vocab).to_numpy(np.int16),
+            "seq": df["seq"].to_numpy(np.int64),
+        }
+        for c in ("est_min", "done_min", "reminders", "completed"):
+            v = pd.to_numeric(df[c], errors="coerce")
+            cols[c] = v.round().fillna(MISSING).to_numpy(COLUMNS[c])
+        return cols
+
+    def _part_dir(self, key: str) -> Path:
+        return self.root / f"p={key}"
+
+    def _write_partition(self, key: str, cols: dict[str, np.ndarray]) -> None:
+        order = np.lexsort((cols["seq"], cols["date"]))  # sorted by date, file order within a day
+        tmp = self.root / f".tmp-{key}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for c, dtype in COLUMNS.items():
+            np.save(tmp / f"{c}.npy", np.ascontiguousarray(cols[c][order].astype(dtype, copy=False)))
+        final = self._part_dir(key)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        d = cols["date"]
+        self.meta["partitions"][key] = {"rows": int(len(d)), "min": int(d.min()), "max": int(d.max())}
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Append CSV-shaped rows (date already parsed). Only the touched partitions are rewritten."""
+        if df.empty:
+            return 0
+        new = self._encode(df, self.meta.get("next_seq", self.rows))
+        self.meta["next_seq"] = self.meta.get("next_seq", self.rows) + len(df)
+        keys = _part_key(new["date"])
+        for key in np.unique(keys):
+            m = keys == key
+            part = {c: a[m] for c, a in new.items()}
+            if key in self.meta["partitions"]:
+                # copy out of the memory map: the partition directory is replaced below
+                old = {c: np.array(a) for c, a in self._read_partition(key, list(COLUMNS)).items()}
+                part = {c: np.concatenate([old[c], part[c]]) for c in COLUMNS}
+            self._write_partition(str(key), part)
+        self.meta["partitions"] = dict(sorted(self.meta["partitions"].items()))
+        self.meta["rows"] = sum(p["rows"] for p in self.meta["partitions"].values())
+        self._save_meta()
+        return int(len(new["date"]))
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.meta = self._load_meta()
+
+    # ---------- import / sync from CSV ----------
+    def import_csv(self, csv: Path = EVENTS_CSV, chunksize: int = 1_000_000) -> int:
+        """Rebuild the store from a CSV, streaming it in chunks."""
+        self.clear()
+        n = 0
+        for chunk in iter_events(csv, chunksize):
+            n += self.append(chunk)
+        self.meta["source"] = file_fingerprint(csv)
+        self._save_meta()
+        return n
+
+    def sync(self, csv: Path = EVENTS_CSV) -> str:
+        """
+        Bring the store up to date with the CSV: "current" (nothing to do),
+        "appended" (only the new tail was parsed) or "rebuilt".
+        """
+        prev = self.meta.get("source") or {}
+        cur = file_fingerprint(csv, prev)
+        if self.exists() and cur.get("sha256") == prev.get("sha256"):
+            return "current"
+        tail = appended_tail(csv, prev, cur) if self.exists() else None
+        if tail is None:
+            self.import_csv(csv)
+            return "rebuilt"
+        if tail:
+            self.append(read_tail(header_line(csv), tail))
+        self.meta["source"] = cur
+        self._save_meta()
+        return "appended"
+
+    # ---------- reading ----------
+    def _read_partition(self, key: str, columns: list[str]) -> dict[str, np.ndarray]:
+        d = self._part_dir(key)
+        return {c: np.load(d / f"{c}.npy", mmap_mode="r") for c in columns}
+
+    def query(self, start=None, end=None, subjects=None, columns=None) -> pd.DataFrame:
+        """
+        Events with start <= date <= end (either bound optional), in events.csv
+        order, as a CSV-shaped DataFrame. Only overlapping partitions are opened.
+        """
+        lo = -(2**31) if start is None else int((np.datetime64(pd.Timestamp(start), "D") - EPOCH).astype(int))
+        hi = 2**31 - 1 if end is None else int((np.datetime64(pd.Timestamp(end), "D") - EPOCH).astype(int))
+        want = list(columns or CSV_COLUMNS)
+        load = sorted(set(want) | {"date", "seq"} | ({"subject"} if subjects is not None else set()))
+
+        pieces: dict[str, list] = {c: [] for c in load}
+        for key, p in self.meta["partitions"].items():
+            if p["max"] < lo or p["min"] > hi:
+                continue
+            part = self._read_partition(key, load)
+            i = np.searchsorted(part["date"], lo, side="left")
+            j = np.searchsorted(part["date"], hi, side="right")
+            if i >= j:
+                continue
+            for c in load:
+                pieces[c].append(np.asarray(part[c][i:j]))
+        cols = {c: (np.concatenate(v) if v else np.empty(0, COLUMNS[c])) for c, v in pieces.items()}
+
+        if subjects is not None:
+            ix = [self.meta["subjects"].index(s) for s in subjects if s in self.meta["subjects"]]
+            m = np.isin(cols["subject"], ix)
+            cols = {c: a[m] for c, a in cols.items()}
+        order = np.argsort(cols["seq"], kind="stable")
+        return self._decode({c: a[order] for c, a in cols.items()}, want)
+
+    def window(self, days: int, end=None) -> pd.DataFrame:
+        """Events in [max_date - days, max_date] (the Learn / Perceive 7-day window)."""
+        end = pd.Timestamp(end) if end is not None else self.max_date()
+        if end is None:
+            return self._decode({c: np.empty(0, COLUMNS[c]) for c in COLUMNS}, CSV_COLUMNS)
+        return self.query(end - pd.Timedelta(days=days), end)
+
+    def iter_months(self, columns=None):
+        """One frame per partition, oldest month first (events.csv order inside a month)."""
+        for key in sorted(self.meta["partitions"]):
+            p = self.meta["partitions"][key]
+            yield self.query(pd.Timestamp(p["min"], unit="D"), pd.Timestamp(p["max"], unit="D"), columns=columns)
+
+    def _decode(self, cols: dict[str, np.ndarray], want: list[str]) -> pd.DataFrame:
+        out = {}
+        for c in want:
+            a = cols[c]
+            if c == "date":
+                out[c] = pd.to_datetime(EPOCH + a.astype("timedelta64[D]"))
+            elif c == "subject":
+                out[c] = pd.Categorical.from_codes(a.astype(np.int32), categories=self.meta["subjects"])
+            elif c == "seq":
+                out[c] = a
+            else:
+                out[c] = np.where(a == MISSING, np.nan, a) if (a == MISSING).any() else a
+        return compact(pd.DataFrame(out), {c: k for c, k in EVENTS.items() if c in want and k != "date"})
+
+
+# ---------- shared loader ----------
+def store_for(csv: Path) -> EventStore:
+    """The store mirroring `csv` (store/events for data/events.csv, a sibling dir otherwise)."""
+    csv = Path(csv).resolve()
+    if csv == EVENTS_CSV.resolve():
+        return EventStore(STORE_DIR)
+    return EventStore(csv.parent / f".{csv.stem}_store")
+
+
+@traced("load_events")
+def load_events(days: int | None = None, cfg: dict | None = None, csv: Path = EVENTS_CSV) -> pd.DataFrame:
+    """
+    events.csv as a DataFrame (date parsed), optionally only the last `days`
+    days before the newest event. With event_store: true in config.yaml the
+    columnar store is synced from the CSV and queried instead of parsing it.
+    """
+    if cfg is None:
+        import yaml
+        cfg = yaml.safe_load(open(ROOT / "config.yaml")) or {}
+    if cfg.get("event_store"):
+        store = store_for(csv)
+        how = store.sync(csv)
+        ev = store.query() if days is None else store.window(days)
+        annotate(source="event_store", sync=how, rows=len(ev), days=days)
+        count("rows_processed", len(ev), stage="load_events")
+        count("event_store_sync", result=how)
+        return ev
+    ev = read_events(csv)
+    count("rows_processed", len(ev), stage="load_events")
+    if days is not None:
+        ev = ev[ev["date"] >= (ev["date"].max() - pd.Timedelta(days=days))]
+    annotate(source="csv", rows=len(ev), days=days)
+    return ev
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="ISA-Lite columnar event store")
+    ap.add_argument("cmd", choices=["import", "sync", "query", "info"])
+    ap.add_argument("--csv", type=Path, default=EVENTS_CSV)
+    ap.add_argument("--days", type=int, default=None, help="query: last N days")
+    args = ap.parse_args(argv)
+
+    store = store_for(args.csv)
+    if args.cmd == "import":
+        n = store.import_csv(args.csv)
+        print(f"[store] imported {n} events into {len(store.meta['partitions'])} partitions")
+    elif args.cmd == "sync":
+        print(f"[store] {store.sync(args.csv)} ({store.rows} events)")
+    elif args.cmd == "query":
+        df = store.query() if args.days is None else store.window(args.days)
+        print(df.to_string(index=False, max_rows=40))
+    else:
+        print(json.dumps({k: store.meta[k] for k in ("rows", "subjects", "partitions")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# app/features.py — shared feature table for the ML and DL models
+# One row per event (events.csv order; the cached table keeps dated events) with:
+#
+#   effort_ratio       done_min / est_min (0 when est_min is 0 or missing)
+#   reminders_norm     reminders, missing -> 0
+#   days_to_deadline   days to the subject's next deadline on/after the event
+#                      (as-of join; 14 when none), clipped to [0, 60]
+#   difficulty         difficulty of that deadline (3 when none), clipped to [1, 5]
+#   past_completion    mean completion of the subject's previous 3 events
+#                      (earlier rows count as 0 while fewer than 3 exist)
+#   sub_ix             index of the subject in the sorted subject vocabulary
+#
+# The table is cached in cache/features keyed by the fingerprints of
+# events.csv and deadlines.csv. Rows appended to events.csv are featurised on
+# their own (the per-subject completion history is kept in the cache), so the
+# full table is only rebuilt when deadlines.csv changes or events.csv is
+# rewritten.
+
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import file_fingerprint, appended_tail, header_line
+from loader import read_deadlines, read_tail
+from tracing import count, traced
+
+ROOT = Path(__file__).resolve().parents[1]
+EVENTS_CSV = ROOT / "data" / "events.csv"
+DEADLINES_CSV = ROOT / "data" / "deadlines.csv"
+FEATURE_DIR = ROOT / "cache" / "features"
+FEATURES_VERSION = 1
+WINDOW = 3  # past_completion looks at this many previous events
+
+NUMERIC = ["est_min", "done_min", "completed", "effort_ratio", "reminders_norm",
+           "days_to_deadline", "difficulty", "past_completion"]
+
+
+# ---------- feature computation ----------
+def _key(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.strip().str.lower()
+
+
+def deadline_join(ev: pd.DataFrame, dl: pd.DataFrame | None) -> tuple[np.ndarray, np.ndarray]:
+    """(days_to_deadline, difficulty) per event from the subject's next deadline on/after its date."""
+    n = len(ev)
+    days = np.full(n, np.nan)
+    diff = np.full(n, np.nan)
+    if dl is not None and not dl.empty and n:
+        # (the event store and read_csv can yield different datetime units; merge_asof needs one)
+        left = pd.DataFrame({
+            "_row": np.arange(n),
+            "_key": _key(ev["subject"]).to_numpy(),
+            "date": pd.to_datetime(ev["date"]).astype("datetime64[ns]").to_numpy(),
+        }).dropna(subset=["date"]).sort_values("date", kind="stable")
+        right = pd.DataFrame({
+            "_key": _key(dl["subject"]).to_numpy(),
+            "ddl_date": pd.to_datetime(dl["date"]).astype("datetime64[ns]").to_numpy(),
+            "difficulty": pd.to_numeric(dl["difficulty"], errors="coerce").to_numpy(),
+        }).dropna(subset=["ddl_date"]).sort_values("ddl_date", kind="stable")
+        j = pd.merge_asof(left, right, left_on="date", right_on="ddl_date", by="_key", direction="forward")
+        rows = j["_row"].to_numpy()
+        days[rows] = (j["ddl_date"] - j["date"]).dt.days.to_numpy(dtype=float, na_value=np.nan)
+        diff[rows] = j["difficulty"].to_numpy(dtype=float)
+    return (np.clip(np.nan_to_num(days, nan=14.0), 0, 60),
+            np.clip(np.nan_to_num(diff, nan=3.0), 1, 5))
+
+
+def past_completion(subjects: np.ndarray, completed: np.ndarray, hist: dict | None = None) -> tuple[np.ndarray, dict]:
+    """
+    Per-subject mean of the previous WINDOW completions, in row order:
+    value(p) = sum(c[p-WINDOW:p]) / min(p+1, WINDOW) for the p-th event of a subject
+    (missing completions count as 0). `hist` ({subject: [n_seen, last completions]})
+    continues the windows from earlier batches; the updated history is returned.
+    """
+    hist = dict(hist or {})
+    comp = np.nan_to_num(np.asarray(completed, dtype=float), nan=0.0)
+    subjects = np.asarray(subjects, dtype=object)
+    n = len(subjects)
+    if not n:
+        return np.zeros(0), hist
+
+    # ghost rows carry each subject's last completions so windows span batches
+    uniq = pd.unique(subjects)
+    g_sub, g_comp, offset = [], [], {}
+    for s in uniq:
+        seen, last = hist.get(s, [0, []])
+        g_sub += [s] * len(last)
+        g_comp += list(last)
+        offset[s] = seen - len(last)
+    all_sub = np.concatenate([np.asarray(g_sub, dtype=object), subjects])
+    all_comp = np.concatenate([np.asarray(g_comp, dtype=float), comp])
+    codes, _ = pd.factorize(all_sub)
+    order = np.argsort(codes, kind="stable")
+    sc, cc = codes[order], all_comp[order]
+    ix = np.arange(len(sc))
+    first = np.maximum.accumulate(np.where(np.r_[True, sc[1:] != sc[:-1]], ix, 0))
+    off = pd.Series(offset)[all_sub[order]].to_numpy(dtype=np.int64)
+    pos = ix - first + off
+    cs = np.r_[0.0, np.cumsum(cc)]
+    lo = np.maximum(first, ix - WINDOW)
+    val = (cs[ix] - cs[lo]) / np.minimum(pos + 1, WINDOW)
+
+    out = np.empty(len(sc))
+    out[order] = val
+    # history: total seen and the last WINDOW completions of every subject in this batch
+    ends = np.r_[np.flatnonzero(sc[1:] != sc[:-1]), len(sc) - 1]
+    for e in ends:
+        s = all_sub[order[e]]
+        start = max(first[e], e - WINDOW + 1)
+        hist[s] = [int(pos[e] + 1), cc[start:e + 1].tolist()]
+    return out[len(g_sub):], hist
+
+
+def compute_features(ev: pd.DataFrame, dl: pd.DataFrame | None, hist: dict | None = None) -> tuple[pd.DataFrame, dict]:
+    """Feature rows for `ev` (one per event, input order) and the updated completion history."""
+    est = pd.to_numeric(ev["est_min"], errors="coerce").to_numpy(dtype=float)
+    done = pd.to_numeric(ev["done_min"], errors="coerce").to_numpy(dtype=float)
+    rem = pd.to_numeric(ev["reminders"], errors="coerce").to_numpy(dtype=float)
+    comp = pd.to_numeric(ev["completed"], errors="coerce").to_numpy(dtype=float)
+    subj = ev["subject"].astype(str).to_numpy(dtype=object)
+    days, diff = deadline_join(ev, dl)
+    past, hist = past_completion(subj, comp, hist)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        effort = np.where(est > 0, done / est, 0.0)
+    df = pd.DataFrame({
+        "date": pd.to_datetime(ev["date"]).to_numpy(),
+        "subject": subj,
+        "est_min": est,
+        "done_min": done,
+        "completed": comp,
+        "effort_ratio": effort,
+        "reminders_norm": np.nan_to_num(rem, nan=0.0),
+        "days_to_deadline": days,
+        "difficulty": diff,
+        "past_completion": past,
+    })
+    return df, hist
+
+
+def with_subject_index(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
+    """Adds sub_ix (sorted subject vocabulary) and returns (df, {subject: index})."""
+    subs = {s: i for i, s in enumerate(sorted(df["subject"].unique()))}
+    return df.assign(sub_ix=df["subject"].map(subs).astype(int)), subs
+
+
+# ---------- cache ----------
+def _save(root: Path, df: pd.DataFrame, meta: dict) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    vocab = sorted(df["subject"].unique())
+    code = {s: i for i, s in enumerate(vocab)}
+    cols = {c: df[c].to_numpy(dtype=float) for c in NUMERIC}
+    cols["date"] = df["date"].to_numpy().astype("datetime64[D]").astype(np.int32)
+    cols["subject"] = df["subject"].map(code).to_numpy(dtype=np.int32)
+    tmp = root / "features.tmp.npz"
+    np.savez(tmp, **cols)
+    os.replace(tmp, root / "features.npz")
+    meta = {**meta, "subjects": vocab, "rows": len(df)}
+    (root / "meta.tmp").write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(root / "meta.tmp", root / "meta.json")
+
+
+def _load(root: Path) -> tuple[pd.DataFrame, dict] | None:
+    try:
+        meta = json.loads((root / "meta.json").read_text(encoding="utf-8"))
+        z = np.load(root / "features.npz")
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != FEATURES_VERSION:
+        return None
+    with z:
+        df = pd.DataFrame({
+            "date": pd.to_datetime(z["date"].astype("datetime64[D]")),
+            "subject": np.asarray(meta["subjects"], dtype=object)[z["subject"]] if len(z["subject"]) else [],
+            **{c: z[c] for c in NUMERIC},
+        })
+    return df, meta
+
+
+@traced("features.load")
+def load_features(csv: Path = EVENTS_CSV, deadlines: Path = DEADLINES_CSV,
+                  cache_dir: Path = FEATURE_DIR, cfg: dict | None = None) -> tuple[pd.DataFrame, str]:
+    """
+    The feature table (with sub_ix) for the current inputs, and how it was
+    obtained: "current" (cache hit), "appended" (only new events featurised)
+    or "rebuilt".
+    """
+    cache_dir = Path(cache_dir)
+    cached = _load(cache_dir)
+    meta = cached[1] if cached else {}
+    ev_prev = meta.get("events") or {}
+    ev_cur = file_fingerprint(csv, ev_prev)
+    dl_cur = file_fingerprint(deadlines, meta.get("deadlines"))
+    same_dl = cached is not None and dl_cur.get("sha256") == (meta.get("deadlines") or {}).get("sha256")
+
+    if same_dl and ev_cur.get("sha256") == ev_prev.get("sha256"):
+        count("feature_cache", result="current")
+        return with_subject_index(cached[0])[0], "current"
+
+    dl = read_deadlines(deadlines)
+    tail = appended_tail(csv, ev_prev, ev_cur) if same_dl else None
+    if tail is not None:
+        new = read_tail(header_line(csv), tail) if tail else None
+        df, hist = cached[0], meta.get("history", {})
+        if new is not None:
+            new = new[new["date"].notna()]  # same rows the event store keeps
+        if new is not None and len(new):
+            add, hist = compute_features(new, dl, hist)
+            df = pd.concat([df, add], ignore_index=True)
+        how = "appended"
+    else:
+        from event_store import load_events
+        ev = load_events(cfg=cfg, csv=csv)
+        df, hist = compute_features(ev[ev["date"].notna()], dl)
+        how = "rebuilt"
+    count("feature_cache", result=how)
+    count("rows_processed", len(df) if how == "rebuilt" else len(df) - len(cached[0]), stage="features")
+    _save(cache_dir, df, {"version": FEATURES_VERSION, "events": ev_cur, "deadlines": dl_cur, "history": hist})
+    return with_subject_index(df)[0], how
@@ -0,0 +1,72 @@
+# app/fingerprint.py — input fingerprints and append detection for ISA-Lite
+# Shared by the stages that want to skip work when their inputs did not change.
+
+from __future__ import annotations
+import hashlib
+import json
+from pathlib import Path
+
+CHUNK = 1 << 20
+
+
+def sha256_file(path: Path, limit: int | None = None) -> str:
+    """SHA-256 of a file (or of its first `limit` bytes)."""
+    h = hashlib.sha256()
+    left = limit
+    with open(path, "rb") as f:
+        while left is None or left > 0:
+            buf = f.read(CHUNK if left is None else min(CHUNK, left))
+            if not buf:
+                break
+            h.update(buf)
+            if left is not None:
+                left -= len(buf)
+    return h.hexdigest()
+
+
+def digest(obj) -> str:
+    """Stable hash of any JSON-serialisable value (config keys, dates, ...)."""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: Path, prev: dict | None = None) -> dict:
+    """
+    {"size", "mtime_ns", "sha256", "ends_nl"} for path ({} if missing).
+    If size and mtime match `prev`, its hash is reused without reading the file.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    st = path.stat()
+    if prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns:
+        return dict(prev)
+    ends_nl = True
+    if st.st_size:
+        with open(path, "rb") as f:
+            f.seek(st.st_size - 1)
+            ends_nl = f.read(1) == b"\n"
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256_file(path, st.st_size), "ends_nl": ends_nl}
+
+
+def same_content(a: dict, b: dict) -> bool:
+    return bool(a) and bool(b) and a.get("sha256") == b.get("sha256")
+
+
+def appended_tail(path: Path, prev: dict, cur: dict) -> bytes | None:
+    """
+    If the file described by `cur` (see file_fingerprint) is `prev` plus appended
+    complete lines, return the appended bytes, else None (rewritten, truncated,
+    or either version not ending on a line boundary).
+    """
+    if not prev or not cur or not prev.get("ends_nl") or not cur.get("ends_nl"):
+        return None
+    if cur["size"] < prev["size"] or sha256_file(path, prev["size"]) != prev["sha256"]:
+        return None
+    with open(path, "rb") as f:
+        f.seek(prev["size"])
+        return f.read(cur["size"] - prev["size"])
+
+
+def header_line(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        return f.readline()
@@ -1,18 +1,39 @@
 import pandas as pd, json
 from datetime import datetime, timedelta
+from pathlib import Path
+
+from event_store import load_events
+import metrics_stream
+
+ROOT = Path(__file__).resolve().parents[1]
+EVENTS_CSV = ROOT / "data" / "events.csv"
+METRICS_JSON = ROOT / "report" / "weekly_metrics.json"
 WEEK_DAYS = 7
 
-def compute_metrics():
-    ev = pd.read_csv("data/events.csv", parse_dates=["date"])
+def compute_metrics(ev=None):
+    # from-scratch reference; learn() uses the streaming state instead
+    if ev is None:
+        ev = load_events(WEEK_DAYS, csv=EVENTS_CSV)  # only the last week's partitions with the event store
     wk = ev[ev["date"] >= (ev["date"].max() - pd.Timedelta(days=WEEK_DAYS))]
     if wk.empty:
         return {"completion_pct":0,"adherence":0}
-    completion = 100*wk["completed"].mean()
-    adherence = (wk["done_min"].sum() / max(1,wk["est_min"].sum()))
+    completion = 100*float(wk["completed"].mean())
+    adherence = float(wk["done_min"].sum() / max(1,wk["est_min"].sum()))
     return {"completion_pct":round(completion,1),
             "adherence":round(adherence,2)}
 
+def learn():
+    """
+    Learn stage: report/weekly_metrics.json from the rolling 7-day state in
+    metrics_stream (resumed from its checkpoint; only new events are read).
+    """
+    state, how = metrics_stream.resume(EVENTS_CSV)
+    m = state.snapshot()
+    METRICS_JSON.write_text(json.dumps(m, indent=2))
+    return {**m, "state": how}
+
 if __name__=="__main__":
-    m = compute_metrics()
-    print("[learn] weekly", m)
-    open("report/weekly_metrics.json","w").write(json.dumps(m, indent=2))
+    m = learn()
+    print("[learn] weekly", {k: m[k] for k in ("completion_pct", "adherence", "state")})
+    for s, v in m["per_subject"].items():
+        print(f"[learn]   {s}: {v}")
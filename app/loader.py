@@ -0,0 +1,280 @@
+# app/loader.py — typed, memory-compact CSV loader for events.csv / deadlines.csv
+# Every stage reads the two input files through here, so they all see one
+# schema:
+#
+#   date        datetime, parsed with an explicit format (MM/DD/YYYY, ISO
+#               YYYY-MM-DD for the rows that are not) instead of per-row
+#               inference; each distinct date string is parsed once
+#   subject     category (surrounding whitespace removed); type likewise
+#   est_min     int16 (int32 when larger values occur), done_min likewise
+#   reminders   int16
+#   completed   bool (0/1, true/false)
+#   difficulty  int8; weight float64
+#
+# Columns with empty cells use the nullable equivalents (Int16, boolean, ...).
+# Rows with a value that cannot be converted (a non-empty date in neither
+# format, an empty subject, text or negative numbers in a numeric column, a
+# completed flag that is not 0/1) are dropped in bulk and written, with the
+# reason and their fields as they appear in the file (re-read as text: a
+# column with blank cells is parsed as float, 30 would come back as 30.0),
+# to report/rejected_<name>.csv.
+#
+#   python app/loader.py data/events.csv     # load, print dtypes / memory / rejects
+
+from __future__ import annotations
+import io
+import sys
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from tracing import annotate, count, traced
+
+ROOT = Path(__file__).resolve().parents[1]
+EVENTS_CSV = ROOT / "data" / "events.csv"
+DEADLINES_CSV = ROOT / "data" / "deadlines.csv"
+REPORT = ROOT / "report"
+
+DATE_FORMAT = "%m/%d/%Y"
+DATE_FALLBACK = "%Y-%m-%d"
+
+# column -> kind (see _convert)
+EVENTS = {"date": "date", "subject": "label", "est_min": "minutes", "done_min": "minutes",
+          "reminders": "count", "completed": "flag"}
+DEADLINES = {"subject": "label", "type": "label", "date": "date", "weight": "real", "difficulty": "level"}
+READ_DTYPES = {"date": "category", "subject": "category", "type": "category"}
+_TRUE = {"1", "true", "yes"}
+_FALSE = {"0", "false", "no"}
+
+
+# ---------- column conversion ----------
+def parse_dates(s: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """(dates, bad) — DATE_FORMAT first, DATE_FALLBACK for the rest; bad marks non-empty text neither parses."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # a few hundred distinct days per million events: parse each once, then index by code
+        d, bad = parse_dates(pd.Series(s.cat.categories))
+        codes = s.cat.codes.to_numpy()  # -1 (missing) picks the NaT / False appended last
+        return (pd.Series(np.append(d.to_numpy(), np.datetime64("NaT"))[codes], index=s.index),
+                pd.Series(np.append(bad.to_numpy(), False)[codes], index=s.index))
+    text = s.astype("string").str.strip()
+    out = pd.to_datetime(text, format=DATE_FORMAT, errors="coerce")
+    miss = out.isna() & text.notna() & (text != "")
+    if miss.any():
+        out[miss] = pd.to_datetime(text[miss], format=DATE_FALLBACK, errors="coerce")
+    return out, out.isna() & text.notna() & (text != "")
+
+
+def _numbers(s: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """(float values, bad): text that is not a number is bad, empty cells are NaN."""
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s.astype(float), pd.Series(False, index=s.index)
+    text = s.astype("string").str.strip()
+    v = pd.to_numeric(text, errors="coerce").astype(float)
+    return v, v.isna() & text.notna() & (text != "")
+
+
+def _smallest_int(v: pd.Series, kinds=("int8", "int16", "int32", "int64")) -> pd.Series:
+    """Round and downcast to the smallest integer type holding every value (nullable if any is missing)."""
+    v = v.round()
+    lo, hi = (v.min(), v.max()) if v.notna().any() else (0, 0)
+    dtype = next(k for k in kinds if np.iinfo(k).min <= lo and hi <= np.iinfo(k).max)
+    return v.astype(dtype.capitalize() if v.isna().any() else dtype)
+
+
+def _flags(s: pd.Series) -> tuple[pd.Series, pd.Series]:
+    if pd.api.types.is_bool_dtype(s):
+        return s, pd.Series(False, index=s.index)
+    if pd.api.types.is_numeric_dtype(s):
+        bad = s.notna() & ~s.isin([0, 1])
+        v = s.where(~bad)
+    else:
+        text = s.astype("string").str.strip().str.lower()
+        v = pd.Series(np.nan, index=s.index, dtype=float)
+        v[text.isin(_TRUE)] = 1.0
+        v[text.isin(_FALSE)] = 0.0
+        bad = v.isna() & text.notna() & (text != "")
+    return v, bad
+
+
+def _labels(s: pd.Series) -> tuple[pd.Series, pd.Series]:
+    s = s.astype("category") if not isinstance(s.dtype, pd.CategoricalDtype) else s
+    cats = s.cat.categories.astype(str).str.strip()
+    if cats.is_unique:
+        s = s.cat.rename_categories(cats)
+    else:  # e.g. "Math" and "Math " collapse into one category
+        s = s.astype(str).str.strip().where(s.notna()).astype("category")
+    s = s.cat.remove_categories([c for c in ("",) if c in s.cat.categories])
+    return s, s.isna()
+
+
+def _convert(df: pd.DataFrame, schema: dict[str, str]) -> tuple[pd.DataFrame, pd.Series]:
+    """Converted copy of df (numbers still float, see compact) and the per-row rejection reason ("" for good rows)."""
+    reason = pd.Series("", index=df.index, dtype=object)
+    out = {}
+    for col, kind in schema.items():
+        s = df[col]
+        if kind == "date":
+            v, bad = parse_dates(s)
+        elif kind == "label":
+            v, bad = _labels(s)
+        elif kind == "flag":
+            v, bad = _flags(s)
+        else:
+            v, bad = _numbers(s)
+            if kind in ("minutes", "count"):
+                bad |= v < 0
+        if bad.any():
+            reason[bad & (reason == "")] = f"bad {col}"
+        out[col] = v
+    return df.assign(**out), reason
+
+
+def compact(df: pd.DataFrame, schema: dict[str, str]) -> pd.DataFrame:
+    """
+    Smallest dtypes for already-validated columns (in place; also used for event
+    store reads). Runs after rejection, so a rejected 40000 does not widen est_min.
+    """
+    for col, kind in schema.items():
+        v = df[col]
+        if kind in ("minutes", "count"):
+            df[col] = _smallest_int(v, ("int16", "int32", "int64"))
+        elif kind == "level":
+            df[col] = _smallest_int(v)
+        elif kind == "flag":
+            df[col] = v.astype("boolean") if v.isna().any() else v.astype(bool)
+        elif kind == "label":  # drop categories only seen in rejected rows; lexical order as for text
+            v = v.cat.remove_unused_categories()
+            df[col] = v if v.cat.categories.is_monotonic_increasing else v.cat.reorder_categories(
+                sorted(v.cat.categories))
+    return df
+
+
+# ---------- loading ----------
+def _read(src, schema: dict[str, str], **kw):
+    # dates and labels are read as categories: parse_dates only sees the distinct strings
+    return pd.read_csv(src, dtype={c: READ_DTYPES[c] for c in schema if c in READ_DTYPES}, **kw)
+
+
+def _check_columns(df: pd.DataFrame, schema: dict[str, str], name: str) -> None:
+    missing = [c for c in schema if c not in df.columns]
+    if missing:
+        raise SystemExit(f"[loader] {name} is missing columns {missing} (expected {list(schema)})")
+
+
+def _raw_rows(src, rows: np.ndarray) -> pd.DataFrame | None:
+    """
+    Data rows `rows` (0-based, ascending) of src exactly as written, every
+    field as text; None when src cannot be read again (e.g. a consumed stream).
+    """
+    if not isinstance(src, (str, Path)):
+        if not (hasattr(src, "seek") and src.seekable()):
+            return None
+        src.seek(0)
+    want = set((rows + 1).tolist())  # file line 0 is the header
+    return pd.read_csv(src, dtype=str, keep_default_na=False, nrows=len(rows),
+                       skiprows=lambda i: i > 0 and i not in want)
+
+
+def _finish(raw: pd.DataFrame, schema: dict[str, str], name: str, rejects: Path | None,
+            row0: int = 0, append: bool = False, src=None) -> pd.DataFrame:
+    """
+    Convert, drop rejected rows and keep the report in step: a fresh read
+    (append=False, row0=0) replaces report/rejected_<name>.csv, or removes it
+    when nothing was rejected; later chunks and appended tails add to it.
+    `src` (what raw was read from) supplies the rejected rows' original text.
+    """
+    _check_columns(raw, schema, name)
+    typed, reason = _convert(raw, schema)
+    bad = reason != ""
+    n_bad = int(bad.sum())
+    path = Path(rejects) if rejects is not None else REPORT / f"rejected_{name}.csv"
+    if not n_bad and not append and row0 == 0:
+        path.unlink(missing_ok=True)
+    if n_bad:
+        pos = np.flatnonzero(bad.to_numpy()) + row0
+        text = _raw_rows(src, pos) if src is not None else None
+        if text is None or len(text) != n_bad:  # not re-readable: the parsed values
+            text = raw[bad].astype(object)
+        # a tail's position in the whole file is not known: its rows go in with a blank `row`
+        rep = text.assign(row=None if append else pos, reason=reason[bad].to_numpy())
+        write_rejects(rep, path, append=append or row0 > 0)
+        typed = typed[~bad].reset_index(drop=True)
+        count("rows_rejected", n_bad, source=name)
+    typed = compact(typed, schema)
+    typed.attrs["rejected"] = n_bad
+    return typed
+
+
+def write_rejects(rep: pd.DataFrame, path: Path, append: bool = False) -> Path:
+    """
+    Rejected rows (row = 0-based data row of the input, reason, original fields)
+    as CSV. Appending skips lines already in the report: every incremental
+    reader (Perceive, Learn, features, the event store) parses the same tail.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cols = ["row", "reason"] + [c for c in rep.columns if c not in ("row", "reason")]
+    if not (append and path.exists()):
+        rep[cols].to_csv(path, index=False)
+        return path
+    seen = set(path.read_text(encoding="utf-8").splitlines())
+    new = [ln for ln in rep[cols].to_csv(index=False, header=False).splitlines() if ln not in seen]
+    if new:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(new) + "\n")
+    return path
+
+
+def _name(src, default: str) -> str:
+    return Path(src).stem if isinstance(src, (str, Path)) else default
+
+
+@traced("load.events")
+def read_events(src=EVENTS_CSV, rejects: Path | None = None, name: str | None = None) -> pd.DataFrame:
+    """events.csv (a path or a buffer, e.g. an appended tail with its header) as a typed frame."""
+    name = name or _name(src, "events")
+    df = _finish(_read(src, EVENTS), EVENTS, name, rejects, src=src)
+    annotate(rows=len(df), rejected=df.attrs["rejected"])
+    count("rows_processed", len(df), stage="loader")
+    return df
+
+
+@traced("load.deadlines")
+def read_deadlines(src=DEADLINES_CSV, rejects: Path | None = None, name: str | None = None) -> pd.DataFrame:
+    """deadlines.csv as a typed frame."""
+    name = name or _name(src, "deadlines")
+    df = _finish(_read(src, DEADLINES), DEADLINES, name, rejects, src=src)
+    annotate(rows=len(df), rejected=df.attrs["rejected"])
+    return df
+
+
+def iter_events(src=EVENTS_CSV, chunksize: int = 1_000_000, rejects: Path | None = None,
+                name: str | None = None) -> Iterator[pd.DataFrame]:
+    """read_events in chunks (rejection report rows keep their position in the whole file)."""
+    name = name or _name(src, "events")
+    row0 = 0
+    for raw in _read(src, EVENTS, chunksize=chunksize):
+        df = _finish(raw.reset_index(drop=True), EVENTS, name, rejects, row0,
+                     src=src if isinstance(src, (str, Path)) else None)
+        row0 += len(raw)
+        yield df
+
+
+@traced("load.tail")
+def read_tail(header: bytes, tail: bytes, name: str = "events", rejects: Path | None = None) -> pd.DataFrame:
+    """Rows appended to events.csv (header line + new bytes) as a typed frame; rejects are appended to the report."""
+    buf = io.BytesIO(header + tail)
+    df = _finish(_read(buf, EVENTS), EVENTS, name, rejects, append=True, src=buf)
+    count("rows_processed", len(df), stage="loader")
+    return df
+
+
+if __name__ == "__main__":
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else EVENTS_CSV
+    reader = read_deadlines if "deadline" in path.stem else read_events
+    df = reader(path)
+    print(df.dtypes.to_string())
+    print(f"[loader] {len(df)} rows, {df.memory_usage(deep=True).sum() / 2**20:.2f} MB, "
+          f"rejected {df.attrs['rejected']}" + (f" -> report/rejected_{path.stem}.csv" if df.attrs["rejected"] else ""))
@@ -0,0 +1,165 @@
+# app/metrics_stream.py — streaming 7-day metrics for the Learn stage
+# Keeps per-day, per-subject aggregates for the current window plus running
+# totals (overall and per subject), so each new event is an O(1) update and
+# days that fall out of the window are subtracted once. The state is
+# checkpointed with the fingerprint of the events.csv it has consumed; on
+# restart only rows appended since then are read.
+
+from __future__ import annotations
+import json
+import math
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from fingerprint import file_fingerprint, appended_tail, header_line
+from loader import read_tail
+from tracing import count, traced
+
+ROOT = Path(__file__).resolve().parents[1]
+EVENTS_CSV = ROOT / "data" / "events.csv"
+CHECKPOINT = ROOT / "cache" / "learn_state.json"
+WEEK_DAYS = 7
+
+# aggregate slots: completed count (non-missing), completed sum, est sum, done sum
+N, COMP, EST, DONE = range(4)
+
+
+def _zero() -> list:
+    return [0, 0.0, 0.0, 0.0]
+
+
+def _num(x) -> float | None:
+    try:
+        x = float(x)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(x) else x
+
+
+class WeeklyMetrics:
+    """Rolling window [max_day - window_days, max_day], same rule as learn_weekly.compute_metrics."""
+
+    def __init__(self, window_days: int = WEEK_DAYS):
+        self.window_days = window_days
+        self.max_day: int | None = None
+        self.days: dict[int, dict[str, list]] = {}
+        self.total = _zero()
+        self.by_subject: dict[str, list] = {}
+        self.events = 0
+
+    # ----- updates -----
+    def _evict_before(self, start: int) -> None:
+        for day in [d for d in self.days if d < start]:
+            for subj, agg in self.days.pop(day).items():
+                tot = self.by_subject[subj]
+                for k in range(4):
+                    tot[k] -= agg[k]
+                    self.total[k] -= agg[k]
+                if tot[N] == 0 and tot[EST] == 0 and tot[DONE] == 0:
+                    del self.by_subject[subj]
+
+    def update(self, day: int, subject: str, est_min, done_min, completed) -> None:
+        """Add one event (day = days since epoch). O(1) apart from evicting expired days."""
+        if self.max_day is not None and day < self.max_day - self.window_days:
+            return  # older than the window: can never count again
+        if self.max_day is None or day > self.max_day:
+            self.max_day = day
+            if len(self.days) and min(self.days) < day - self.window_days:
+                self._evict_before(day - self.window_days)
+        delta = _zero()
+        c = _num(completed)
+        if c is not None:
+            delta[N], delta[COMP] = 1, c
+        delta[EST] = _num(est_min) or 0.0
+        delta[DONE] = _num(done_min) or 0.0
+        agg = self.days.setdefault(day, {}).setdefault(subject, _zero())
+        tot = self.by_subject.setdefault(subject, _zero())
+        for k in range(4):
+            agg[k] += delta[k]
+            tot[k] += delta[k]
+            self.total[k] += delta[k]
+        self.events += 1
+
+    def update_frame(self, ev: pd.DataFrame) -> int:
+        """Feed a CSV-shaped frame (date parsed), in row order."""
+        ev = ev[ev["date"].notna()]
+        day = (ev["date"].values.astype("datetime64[D]").astype("int64")).tolist()
+        for d, s, e, dn, c in zip(day, ev["subject"].astype(str), ev["est_min"], ev["done_min"], ev["completed"]):
+            self.update(d, s, e, dn, c)
+        return len(day)
+
+    # ----- results -----
+    @staticmethod
+    def _metrics(agg: list) -> dict:
+        return {
+            "completion_pct": round(100 * agg[COMP] / agg[N], 1) if agg[N] else 0,
+            "adherence": round(agg[DONE] / max(1, agg[EST]), 2),
+        }
+
+    def snapshot(self) -> dict:
+        if not self.days:
+            return {"completion_pct": 0, "adherence": 0, "per_subject": {}}
+        out = self._metrics(self.total)
+        out["per_subject"] = {
+            s: {**self._metrics(agg), "n": int(agg[N])}
+            for s, agg in sorted(self.by_subject.items())
+        }
+        end = pd.Timestamp(self.max_day, unit="D")
+        out["window"] = {"start": str((end - pd.Timedelta(days=self.window_days)).date()), "end": str(end.date())}
+        return out
+
+    # ----- checkpoint -----
+    def to_dict(self) -> dict:
+        return {"window_days": self.window_days, "max_day": self.max_day, "events": self.events,
+                "days": {str(d): subs for d, subs in self.days.items()}}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "WeeklyMetrics":
+        m = cls(state.get("window_days", WEEK_DAYS))
+        m.max_day = state.get("max_day")
+        m.events = state.get("events", 0)
+        for d, subs in state.get("days", {}).items():
+            m.days[int(d)] = subs
+            for s, agg in subs.items():
+                tot = m.by_subject.setdefault(s, _zero())
+                for k in range(4):
+                    tot[k] += agg[k]
+                    m.total[k] += agg[k]
+        return m
+
+
+@traced("learn.resume")
+def resume(csv: Path = EVENTS_CSV, checkpoint: Path = CHECKPOINT) -> tuple[WeeklyMetrics, str]:
+    """
+    Restore the metrics state and bring it up to date with `csv`.
+    Returns (state, how): "current", "appended" (only new rows read) or
+    "rebuilt" (CSV rewritten: the window is re-read via load_events).
+    """
+    try:
+        saved = json.loads(checkpoint.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        saved = {}
+    prev = saved.get("source") or {}
+    cur = file_fingerprint(csv, prev)
+    if saved and cur.get("sha256") == prev.get("sha256"):
+        count("learn_state", result="current")
+        return WeeklyMetrics.from_dict(saved["state"]), "current"
+
+    tail = appended_tail(csv, prev, cur) if saved else None
+    if tail is not None:
+        m, how = WeeklyMetrics.from_dict(saved["state"]), "appended"
+        if tail:
+            m.update_frame(read_tail(header_line(csv), tail))
+    else:
+        from event_store import load_events
+        m, how = WeeklyMetrics(), "rebuilt"
+        m.update_frame(load_events(WEEK_DAYS, csv=csv))
+
+    count("learn_state", result=how)
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    tmp = checkpoint.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"source": cur, "state": m.to_dict()}), encoding="utf-8")
+    os.replace(tmp, checkpoint)
+    return m, how
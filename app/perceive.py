@@ -1,36 +1,248 @@
-import pandas as pd, yaml, json
-from datetime import datetime
+import pandas as pd, numpy as np, yaml, json, re
+from datetime import datetime, timezone, date, timedelta
+from pathlib import Path
+
+from fingerprint import file_fingerprint, appended_tail, header_line, digest
+from event_store import load_events
+from loader import read_deadlines, read_tail
+from tracing import traced
+import predictions
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+EVENTS_CSV = DATA / "events.csv"
+DEADLINES_CSV = DATA / "deadlines.csv"
+FACTS_PL = ROOT / "engines" / "facts.pl"
+STATE_JSON = ROOT / "engines" / ".perceive_state.json"
+CONFIG = ROOT / "config.yaml"
+
+PERCEIVE_CFG_KEYS = ("daily_hours_max_min", "exam_near_days")
+PROGRESS_DAYS = 7
 
 def load_data():
-    dl = pd.read_csv("data/deadlines.csv", parse_dates=["date"])
-    ev = pd.read_csv("data/events.csv", parse_dates=["date"])
-    cfg = yaml.safe_load(open("config.yaml"))
+    cfg = yaml.safe_load(open(CONFIG))
+    dl = read_deadlines(DEADLINES_CSV)
+    ev = load_events(cfg=cfg)
     return dl, ev, cfg
 
+_BARE_ATOM = re.compile(r"[a-z][A-Za-z0-9_]*\Z")
+_ATOM_ESC = re.compile(r"[\\'\x00-\x1f\x7f]")
+_ATOM_ESC_MAP = {"\\": "\\\\", "'": "\\'", "\n": "\\n", "\t": "\\t"}
+
+def pl_atom(s):
+    """s as a Prolog atom: bare if it is a plain identifier, else quoted and escaped (as writeq/1 would)."""
+    s = str(s)
+    if _BARE_ATOM.match(s):
+        return s
+    return "'" + _ATOM_ESC.sub(lambda m: _ATOM_ESC_MAP.get(m.group(0)) or f"\\x{ord(m.group(0)):x}\\", s) + "'"
+
+def utc_today():
+    # same clock as today/1 in planner_rules.pl
+    return datetime.now(timezone.utc).date()
+
 def derive_progress(ev):
     # simple completion % per subject (last 7 days)
-    lately = ev[ev["date"] >= (ev["date"].max() - pd.Timedelta(days=7))]
+    lately = ev[ev["date"] >= (ev["date"].max() - pd.Timedelta(days=PROGRESS_DAYS))]
     if lately.empty: return {}
-    g = lately.groupby("subject")["completed"].mean().to_dict()
+    g = lately.groupby("subject", observed=True)["completed"].mean().to_dict()
     return {s: float(v) for s,v in g.items()}
 
-def to_prolog_facts(dl, progress, cfg):
+def compact_deadlines(dl, today=None):
+    """
+    One row per (subject, type): the next upcoming deadline, or the most recent
+    past one if nothing is upcoming (so deadline(S,_,_) still holds for
+    needs_info). near_exam/1 only needs the earliest upcoming exam.
+    """
+    today = today or utc_today()
+    d = pd.DataFrame({
+        "subject": dl["subject"].astype(str).str.strip().str.lower(),
+        "type": dl["type"].astype(str).str.strip(),
+        "date": dl["date"],
+    }).dropna(subset=["date"])
+    if d.empty:
+        return d
+    delta = (d["date"] - pd.Timestamp(today)).dt.days.to_numpy()
+    d["rank"] = np.where(delta >= 0, delta, 10**9 - delta)  # upcoming first, then nearest past
+    return d.loc[d.groupby(["subject", "type"], sort=False)["rank"].idxmin(), ["subject", "type", "date"]]
+
+@traced("perceive.facts")
+def to_prolog_facts(dl, progress, cfg, today=None, table=None):
+    """
+    Compact fact set: one subject/1, one difficulty/2 (max, which is what
+    allocate/2's D >= 4 test sees), at most one deadline/3 per type, one
+    progress/3 and one predicted_minutes/2 (from the prediction table, if
+    given) per subject — all keyed on the subject as first argument.
+    """
     facts = []
     facts.append(f"hours_per_day({cfg['daily_hours_max_min']}).")
     facts.append(f"exam_near_days({cfg['exam_near_days']}).")
-    for _,r in dl.iterrows():
-        s = r["subject"].strip().lower()
-        facts += [f"subject({s}).",
-                  f"difficulty({s},{int(r['difficulty'])})."]
-        y,m,d = r["date"].year, r["date"].month, r["date"].day
-        facts.append(f"deadline({s},{r['type']},date({y},{m},{d})).")
+    subj = dl["subject"].astype(str).str.strip().str.lower()
+    facts += ("subject(" + pd.Series(subj.unique()).map(pl_atom) + ").").tolist()
+    hard = pd.to_numeric(dl["difficulty"], errors="coerce").groupby(subj).max().dropna()
+    facts += [f"difficulty({pl_atom(s)},{int(d)})." for s, d in hard.items()]
+    nxt = compact_deadlines(dl, today)
+    if not nxt.empty:
+        facts += ("deadline(" + nxt["subject"].map(pl_atom) + "," + nxt["type"].map(pl_atom) + ",date("
+                  + nxt["date"].dt.year.astype(str) + "," + nxt["date"].dt.month.astype(str) + ","
+                  + nxt["date"].dt.day.astype(str) + "))."
+                  ).tolist()
     for s,p in progress.items():
-        facts.append(f"progress({s.lower()},completion_pct,{p:.2f}).")
+        facts.append(f"progress({pl_atom(s.lower())},completion_pct,{p:.2f}).")
+    if table is not None:
+        facts += [f"predicted_minutes({pl_atom(s)},{int(round(m))})."
+                  for s, m in table.column("minutes").items()]
     return "\n".join(sorted(set(facts)))
 
-if __name__ == "__main__":
-    dl, ev, cfg = load_data()
+def perceive(dl=None, ev=None, cfg=None, facts_path=FACTS_PL, table=None):
+    """
+    Perceive stage: CSV frames -> facts.pl. Frames/config are loaded if not
+    passed in. `table` (a predictions.PredictionTable) adds predicted_minutes/2;
+    the shared cache/predictions table describes data/, so only callers
+    planning from data/ should pass it.
+    """
+    if dl is None or ev is None or cfg is None:
+        dl, ev, cfg = load_data()
     prg = derive_progress(ev)
-    facts = to_prolog_facts(dl, prg, cfg)
-    open("engines/facts.pl","w").write(facts+"\n")
-    print("[perceive] wrote engines/facts.pl")
+    facts = to_prolog_facts(dl, prg, cfg, table=table)
+    Path(facts_path).write_text(facts + "\n", encoding="utf-8")
+    return {"facts": facts, "progress": prg, "n_facts": facts.count("\n") + 1}
+
+# ---------- Incremental Perceive ----------
+def daily_completion(ev):
+    """{ "YYYY-MM-DD": {subject: [n, completed_sum]} } — enough to rebuild derive_progress()."""
+    d = ev.dropna(subset=["date", "completed"])
+    if d.empty:
+        return {}
+    g = d.groupby([d["date"].dt.strftime("%Y-%m-%d"), "subject"], observed=True)["completed"].agg(["count", "sum"])
+    out = {}
+    for (day, subj), n, tot in zip(g.index, g["count"], g["sum"]):
+        out.setdefault(day, {})[str(subj)] = [int(n), float(tot)]
+    return out
+
+def merge_daily(daily, new):
+    for day, subs in new.items():
+        cur = daily.setdefault(day, {})
+        for subj, (n, tot) in subs.items():
+            n0, t0 = cur.get(subj, [0, 0.0])
+            cur[subj] = [n0 + n, t0 + tot]
+    return daily
+
+def progress_from_daily(daily, subjects=None):
+    """derive_progress() over the stored daily aggregates (optionally only for `subjects`)."""
+    if not daily:
+        return {}
+    start = (date.fromisoformat(max(daily)) - timedelta(days=PROGRESS_DAYS)).isoformat()
+    acc = {}
+    for day, subs in daily.items():
+        if day < start:
+            continue
+        for subj, (n, tot) in subs.items():
+            if subjects is not None and subj not in subjects:
+                continue
+            a = acc.setdefault(subj, [0, 0.0])
+            a[0] += n
+            a[1] += tot
+    return {s: a[1] / a[0] for s, a in acc.items() if a[0]}
+
+def replace_progress(facts, progress):
+    """Swap the progress/3 lines of an existing fact text; everything else is reused."""
+    keep = [f for f in facts.split("\n") if f and not f.startswith("progress(")]
+    keep += [f"progress({pl_atom(s.lower())},completion_pct,{p:.2f})." for s, p in progress.items()]
+    return "\n".join(sorted(set(keep)))
+
+def load_state():
+    try:
+        return json.loads(STATE_JSON.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def perceive_incremental(cfg=None, force=False):
+    """
+    Perceive with change detection. Inputs are fingerprinted (events.csv,
+    deadlines.csv, the config keys Perceive uses, the key of the prediction
+    table if it is current, and today's date, which decides the "next" deadline):
+      - nothing changed  -> skipped, facts.pl untouched
+      - events appended  -> only the new rows are parsed; progress is updated
+                            for the affected subjects (all of them if the
+                            7-day window moved)
+      - anything else    -> full rebuild
+    facts.pl is only rewritten when its content changes. The result carries
+    changed / events_changed / facts_changed so later stages can short-circuit.
+    """
+    cfg = cfg if cfg is not None else yaml.safe_load(open(CONFIG))
+    prev = {} if force else load_state()
+    ev_fp = file_fingerprint(EVENTS_CSV, prev.get("events"))
+    dl_fp = file_fingerprint(DEADLINES_CSV, prev.get("deadlines"))
+    cfg_key = digest({k: cfg.get(k) for k in PERCEIVE_CFG_KEYS})
+    today = utc_today().isoformat()
+    table = predictions.from_config(cfg)  # None when off, missing or stale
+    table_key = table.meta["key"] if table is not None else None
+
+    events_changed = ev_fp.get("sha256") != prev.get("events", {}).get("sha256")
+    others_changed = (dl_fp.get("sha256") != prev.get("deadlines", {}).get("sha256")
+                      or cfg_key != prev.get("config") or today != prev.get("today")
+                      or table_key != prev.get("predictions"))
+    facts_old = FACTS_PL.read_text(encoding="utf-8").rstrip("\n") if FACTS_PL.exists() else None
+    res = {"mode": "skipped", "changed": False, "events_changed": events_changed,
+           "facts_changed": False, "facts": facts_old}
+
+    facts_intact = facts_old is not None and digest(facts_old) == prev.get("facts_sha256")
+    if not events_changed and not others_changed and facts_intact:
+        res["n_facts"] = facts_old.count("\n") + 1
+        return res
+    res["changed"] = True
+
+    tail = None
+    if events_changed and not others_changed and facts_intact and "daily" in prev:
+        tail = appended_tail(EVENTS_CSV, prev.get("events"), ev_fp)
+
+    if tail is not None:
+        new = read_tail(header_line(EVENTS_CSV), tail) if tail else None
+        daily = prev["daily"]
+        progress = dict(prev.get("progress", {}))
+        if new is not None and not new.empty:
+            old_max = max(daily) if daily else None
+            merge_daily(daily, daily_completion(new))
+            if daily and max(daily) != old_max:
+                progress = progress_from_daily(daily)  # window moved: every subject
+            else:
+                touched = {str(s) for s in new["subject"].dropna().unique()}
+                progress.update(progress_from_daily(daily, touched))
+        facts = replace_progress(facts_old, progress)
+        res["mode"] = "incremental"
+        res["new_events"] = 0 if new is None else len(new)
+    else:
+        dl = read_deadlines(DEADLINES_CSV)
+        # with the event store only the partitions in the progress window are read;
+        # older days can never re-enter the window, so daily/progress are unaffected
+        windowed = bool(cfg.get("event_store"))
+        ev = load_events(PROGRESS_DAYS if windowed else None, cfg)
+        daily = daily_completion(ev)
+        progress = derive_progress(ev)
+        facts = to_prolog_facts(dl, progress, cfg, table=table)
+        res["mode"] = "full"
+        res["dl"] = dl
+        if not windowed:
+            res["ev"] = ev
+
+    if facts != facts_old:
+        FACTS_PL.write_text(facts + "\n", encoding="utf-8")
+        res["facts_changed"] = True
+    res["facts"] = facts
+    res["progress"] = progress
+    res["n_facts"] = facts.count("\n") + 1
+
+    STATE_JSON.write_text(json.dumps({
+        "events": ev_fp, "deadlines": dl_fp, "config": cfg_key, "today": today, "predictions": table_key,
+        "facts_sha256": digest(facts), "progress": progress, "daily": daily,
+    }), encoding="utf-8")
+    return res
+
+if __name__ == "__main__":
+    import sys
+    r = perceive_incremental(force="--full" in sys.argv)
+    if r["mode"] == "skipped":
+        print("[perceive] inputs unchanged, kept engines/facts.pl")
+    else:
+        print(f"[perceive] {r['mode']} update, "
+              f"{'wrote' if r['facts_changed'] else 'unchanged'} engines/facts.pl")
@@ -0,0 +1,217 @@
+# app/pipeline.py — in-process PRAL pipeline for ISA-Lite
+# Runs (ML / DL →) Predict → Perceive → Reason → Act → Learn as functions in
+# one interpreter. CSVs are read once and DataFrames / plans are passed between
+# stages in memory; every stage reports its own latency. Stages whose inputs
+# did not change (see perceive_incremental) are skipped.
+#
+#   python app/pipeline.py                 # predict (if stale) + PRAL
+#   python app/pipeline.py --ml --dl       # ... + models
+#   python app/pipeline.py --stages reason act --backend native
+#   python app/pipeline.py --trace --profile reason    # spans/metrics + a profile of Reason
+
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for sub in ("ml", "dl"):
+    p = str(ROOT / sub)
+    if p not in sys.path:
+        sys.path.append(p)
+
+import perceive as perceive_mod
+import predictions
+import run_planner
+import schedule_apply
+import learn_weekly
+import plan_cache
+import tracing
+
+PRAL = ["perceive", "reason", "act", "learn"]
+# predict only rescores when the table's inputs changed (and is skipped with
+# prediction_table: false), so every default run plans with a current table
+DEFAULT_STAGES = ["predict"] + PRAL
+# execution order, as in stage_dag.DEPS: the models train first, so predict
+# scores with what this run trained, and predict feeds Perceive (predicted_minutes/2)
+ALL_STAGES = ["ml", "dl", "predict"] + PRAL
+
+
+def fresh(output: Path, *inputs: Path) -> bool:
+    """True if output exists and is at least as new as every existing input."""
+    if not output.exists():
+        return False
+    t = output.stat().st_mtime_ns
+    return all(t >= p.stat().st_mtime_ns for p in inputs if p.exists())
+
+
+def run_pral(stages: list[str] | None = None, backend: str | None = None, force: bool = False) -> dict:
+    """
+    Run the requested stages (default: DEFAULT_STAGES) in order, in-process.
+    Perceive is incremental; when it reports that nothing changed, Reason, Act
+    and Learn are skipped if their outputs are already newer than their inputs
+    (force=True runs everything).
+    Returns {"stages": [...], "timings_s": {stage: s}, "skipped": [...], "total_s",
+    "log": [lines], "plan_cache": {hit, hits, misses}, plus the stage outputs
+    ("facts", "plan", "schedule", "metrics", "ml", "dl")}. With tracing on, the
+    run is one "pral" trace and res["trace"] = {trace_id, spans} after export.
+    """
+    stages = [s for s in ALL_STAGES if s in (stages or DEFAULT_STAGES)]
+    with tracing.span("pral", stages=",".join(stages), backend=backend or "config", force=force) as root:
+        res = _run_stages(stages, backend, force)
+    spans = tracing.export()
+    if root is not None:
+        res["trace"] = {"trace_id": root["trace_id"], "spans": spans}
+    return res
+
+
+def _run_stages(stages: list[str], backend: str | None, force: bool) -> dict:
+    res: dict = {"stages": stages, "timings_s": {}, "skipped": [], "log": []}
+    log = res["log"].append
+    t_all = time.perf_counter()
+
+    def timed(name, fn, *args, **kw):
+        t0 = time.perf_counter()
+        with tracing.span(name), tracing.profile(name):
+            out = fn(*args, **kw)
+        res["timings_s"][name] = round(time.perf_counter() - t0, 4)
+        return out
+
+    def skip(name, why):
+        res["skipped"].append(name)
+        tracing.count("stage_skipped", stage=name)
+        log(f"[{name}] skipped ({why})")
+
+    if "ml" in stages:
+        if run_planner.load_config().get("ml_mode") == "online":
+            import ml_online
+            r = timed("ml", ml_online.run_online)
+            res["ml"] = r
+            log(f"[ml] wrote report/ml_online_report.json (update={r['update']}, {r['batches']} batches, "
+                f"rolling accuracy={r['rolling_eval'].get('accuracy')})")
+        else:
+            import ml_adherence
+            r = timed("ml", ml_adherence.run_ml)
+            res["ml"] = r
+            log(f"[ml] wrote report/ml_adherence_report.json (mode={r['mode']}, features {r['features_source']})")
+
+    if "dl" in stages:
+        import dl_minutes_predictor
+        r = timed("dl", dl_minutes_predictor.run_dl)
+        res["dl"] = r
+        log(f"[dl] wrote report/dl_minutes_report.json (mae={r['dl_model']['mae_minutes']}, "
+            f"{'trained' if r['trained'] else 'reused'} {r['artifact']}, features {r['features_source']})")
+
+    if "predict" in stages and not run_planner.load_config().get("prediction_table", True):
+        skip("predict", "prediction_table is off")
+    elif "predict" in stages:
+        r = timed("predict", predictions.build, force=force)
+        res["predict"] = r
+        if r["rebuilt"]:
+            log(f"[predict] rebuilt cache/predictions/table.npy ({r['subjects']} subjects)")
+        else:
+            skip("predict", "inputs unchanged, cache/predictions/table.npy is current")
+
+    changed = events_changed = True  # unknown unless Perceive runs
+    facts_text = None
+    if "perceive" in stages:
+        out = timed("perceive", perceive_mod.perceive_incremental, None, force)
+        changed, events_changed = out["changed"], out["events_changed"]
+        facts_text = out["facts"]
+        res["facts"] = facts_text
+        res["perceive"] = {k: out[k] for k in ("mode", "changed", "events_changed", "facts_changed")}
+        tracing.count("perceive_runs", mode=out["mode"])
+        if out["mode"] == "skipped":
+            log("[perceive] inputs unchanged, kept engines/facts.pl")
+        else:
+            verb = "wrote" if out["facts_changed"] else "unchanged"
+            log(f"[perceive] {out['mode']} update, {verb} engines/facts.pl ({out['n_facts']} facts)")
+
+    plan = None
+    if "reason" in stages:
+        if not force and not changed and fresh(run_planner.OUT_JSON, run_planner.FACTS_PL):
+            skip("reason", "facts unchanged, app/plan.json is current")
+        else:
+            plan, latency, source = timed("reason", run_planner.reason_plan, backend, 30, facts_text)
+            run_planner.write_plan(plan)
+            res["plan"] = plan
+            cache = plan_cache.from_config(run_planner.load_config())
+            if cache is not None:
+                res["plan_cache"] = {"hit": source == "cache", **cache.stats()}
+            log(f"[reason] wrote app/plan.json (source={source}, latency_s={latency:.3f})")
+
+    if "act" in stages:
+        # the prediction table sets Act's p_complete weights, so a rebuilt one reschedules
+        if plan is None and not force and fresh(schedule_apply.TODAY_CSV, schedule_apply.PLAN_JSON,
+                                                    schedule_apply.DEADLINES_CSV,
+                                                    predictions.TABLE_DIR / "table.json"):
+            skip("act", "plan, deadlines and prediction table unchanged, data/todays_plan.csv is current")
+        else:
+            df = timed("act", schedule_apply.act, plan,
+                       table=predictions.from_config(run_planner.load_config()))
+            res["schedule"] = df.to_dict(orient="records")
+            h = df.attrs.get("horizon", {})
+            log(f"[act] wrote data/todays_plan.csv ({len(df)} sessions today, "
+                f"{h.get('sessions')} over {h.get('days')} days, solver={h.get('solver')}, {h.get('elapsed_s')}s)")
+
+    if "learn" in stages:
+        if not force and not events_changed and fresh(learn_weekly.METRICS_JSON, learn_weekly.EVENTS_CSV):
+            skip("learn", "events unchanged, report/weekly_metrics.json is current")
+        else:
+            m = timed("learn", learn_weekly.learn)
+            res["metrics"] = m
+            log(f"[learn] weekly completion_pct={m['completion_pct']} adherence={m['adherence']} "
+                f"({len(m['per_subject'])} subjects, state {m['state']})")
+
+    res["total_s"] = round(time.perf_counter() - t_all, 4)
+    return res
+
+
+def format_report(res: dict) -> str:
+    lines = list(res["log"])
+    lines.append("")
+    lines.append("stage latencies (s):")
+    for name, s in res["timings_s"].items():
+        lines.append(f"  {name:<9}{s:>9.4f}")
+    lines.append(f"  {'total':<9}{res['total_s']:>9.4f}")
+    if "plan_cache" in res:
+        pc = res["plan_cache"]
+        lines.append(f"plan cache: {'hit' if pc['hit'] else 'miss'} (hits={pc['hits']}, misses={pc['misses']})")
+    if "trace" in res:
+        lines.append(f"trace {res['trace']['trace_id']}: {res['trace']['spans']} spans -> "
+                     f"report/trace.jsonl, report/metrics.prom")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="ISA-Lite in-process PRAL pipeline")
+    ap.add_argument("--stages", nargs="+", choices=ALL_STAGES, default=None)
+    ap.add_argument("--ml", action="store_true", help="also run the ML adherence model")
+    ap.add_argument("--dl", action="store_true", help="also run the DL minutes model")
+    ap.add_argument("--predict", action="store_true",
+                    help="refresh the prediction table before Perceive (default unless --stages is given)")
+    ap.add_argument("--backend", choices=["prolog", "native"], default=None)
+    ap.add_argument("--force", action="store_true", help="run every stage even if inputs are unchanged")
+    ap.add_argument("--json", action="store_true", help="print timings as JSON")
+    ap.add_argument("--trace", action="store_true", help="record spans/metrics (same as tracing: true)")
+    ap.add_argument("--profile", nargs="+", metavar="STAGE", default=None,
+                    help="profile these stages (or 'all') into report/profile_<stage>.txt")
+    args = ap.parse_args(argv)
+    if args.trace:
+        tracing.enable()
+    if args.profile:
+        tracing.set_profile(args.profile)
+
+    stages = list(args.stages or DEFAULT_STAGES)
+    stages += [s for s, on in (("ml", args.ml), ("dl", args.dl), ("predict", args.predict)) if on and s not in stages]
+    res = run_pral(stages, backend=args.backend, force=args.force)
+    if args.json:
+        print(json.dumps({k: res[k] for k in ("timings_s", "total_s", "skipped", "plan_cache", "trace") if k in res}, indent=2))
+    else:
+        print(format_report(res))
+
+
+if __name__ == "__main__":
+    main()
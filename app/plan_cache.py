@@ -0,0 +1,94 @@
+# app/plan_cache.py — content-addressed cache for Reason output
+# A plan depends only on facts.pl, planner_rules.pl and today's date (today/1
+# is the only clock input), so those three are hashed into the cache key.
+# Entries are small JSON files under cache/plans/; least-recently-used entries
+# are evicted once the directory exceeds plan_cache_max_kb.
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "cache" / "plans"
+RULES_PL = ROOT / "engines" / "planner_rules.pl"
+
+
+def plan_key(facts_text: str, rules: Path = RULES_PL, today: str | None = None) -> str:
+    today = today or datetime.now(timezone.utc).date().isoformat()
+    h = hashlib.sha256()
+    h.update(facts_text.rstrip("\n").encode("utf-8"))
+    h.update(b"\0")
+    h.update(rules.read_bytes())
+    h.update(b"\0")
+    h.update(today.encode("ascii"))
+    return h.hexdigest()
+
+
+class PlanCache:
+    def __init__(self, root: Path = CACHE_DIR, max_kb: int = 512):
+        self.root = Path(root)
+        self.max_bytes = int(max_kb) * 1024
+        self.stats_path = self.root / "stats.json"
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    # ----- counters (persisted so CLI runs and the UI share them) -----
+    def stats(self) -> dict:
+        try:
+            return json.loads(self.stats_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def _count(self, field: str) -> dict:
+        st = self.stats()
+        st[field] = st.get(field, 0) + 1
+        self.stats_path.write_text(json.dumps(st), encoding="utf-8")
+        return st
+
+    # ----- lookup / store -----
+    def get(self, key: str) -> list[dict] | None:
+        p = self._path(key)
+        try:
+            plan = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+        os.utime(p)  # LRU: a hit makes the entry most recent
+        self._count("hits")
+        return plan
+
+    def put(self, key: str, plan: list[dict]) -> None:
+        tmp = self._path(key).with_suffix(".tmp")
+        tmp.write_text(json.dumps(plan), encoding="utf-8")
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop least-recently-used entries until the cache fits in max_kb. Returns entries removed."""
+        entries = [(p.stat().st_mtime_ns, p.stat().st_size, p)
+                   for p in self.root.glob("*.json") if p != self.stats_path]
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for p in self.root.glob("*.json"):
+            p.unlink(missing_ok=True)
+
+
+def from_config(cfg: dict) -> PlanCache | None:
+    """The configured cache, or None when plan_cache is disabled."""
+    if not cfg.get("plan_cache", True):
+        return None
+    return PlanCache(max_kb=int(cfg.get("plan_cache_max_kb", 512)))
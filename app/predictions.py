@@ -0,0 +1,219 @@
+# app/predictions.py — precomputed per-subject prediction table for ISA-Lite
+# Both models are scored once per data change over every active subject
+# (subject/1 in facts.pl, i.e. deadlines.csv). The planner then only looks
+# values up:
+#
+#   minutes      DL minutes model (dl/dl_minutes_predictor.py) at the subject's
+#                next upcoming deadline (difficulty, days to it, last completions)
+#   p_complete   ML adherence model (ml/ml_adherence.py): mean predicted
+#                completion over the subject's events
+#   days         days to that deadline (14 when none, clipped to [0, 60])
+#
+# The table is cache/predictions/table.npy (float32, one row per subject, read
+# with mmap) plus table.json (subject vocabulary, columns, key). The key hashes
+# events.csv, deadlines.csv, the DL artifact, the promoted ML configuration
+# (app/sweep.py) and today's date, so the models only run when one of them changes. Perceive emits predicted_minutes/2 facts
+# from it (allocate/2 scales its minute tiers by them); Act weights session
+# priorities by 1 + (1 - p_complete). A table whose key no longer matches its
+# inputs (data changed, no rebuild yet) is treated as absent until build().
+#
+#   python app/predictions.py            # build (if stale) and print the table
+
+from __future__ import annotations
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import digest, file_fingerprint
+from loader import read_deadlines
+from sweep import promoted
+from tracing import annotate, count, traced
+
+ROOT = Path(__file__).resolve().parents[1]
+EVENTS_CSV = ROOT / "data" / "events.csv"
+DEADLINES_CSV = ROOT / "data" / "deadlines.csv"
+TABLE_DIR = ROOT / "cache" / "predictions"
+DL_MODELS = ROOT / "models" / "dl_minutes"  # dl_minutes_predictor.MODELS (not imported: torch)
+TABLE_VERSION = 1
+COLUMNS = ["minutes", "p_complete", "days"]
+
+
+def _model_paths():
+    for sub in ("ml", "dl"):
+        p = str(ROOT / sub)
+        if p not in sys.path:
+            sys.path.append(p)
+
+
+# ---------- lookup ----------
+class PredictionTable:
+    """Memory-mapped table: row lookups by subject are a dict hit plus an array index."""
+
+    def __init__(self, root: Path = TABLE_DIR):
+        root = Path(root)
+        self.meta = json.loads((root / "table.json").read_text(encoding="utf-8"))
+        self.rows = np.load(root / "table.npy", mmap_mode="r")
+        self.columns = {c: i for i, c in enumerate(self.meta["columns"])}
+        self.index = {s: i for i, s in enumerate(self.meta["subjects"])}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, subject: str, column: str = "minutes", default: float | None = None) -> float | None:
+        i = self.index.get(subject)
+        return default if i is None else float(self.rows[i, self.columns[column]])
+
+    def column(self, column: str) -> dict[str, float]:
+        """{subject: value} for one column."""
+        vals = np.asarray(self.rows[:, self.columns[column]], dtype=float)
+        return dict(zip(self.meta["subjects"], vals.tolist()))
+
+
+def load_table(root: Path = TABLE_DIR) -> PredictionTable | None:
+    """The current table, or None if it was never built (or is unreadable)."""
+    try:
+        t = PredictionTable(root)
+    except (OSError, ValueError, KeyError):
+        return None
+    return t if t.meta.get("version") == TABLE_VERSION else None
+
+
+def current_table(root: Path = TABLE_DIR, today: date | None = None) -> PredictionTable | None:
+    """The table if its key still matches input_key() (two file fingerprints), else None."""
+    t = load_table(root)
+    if t is None or t.meta.get("key") != input_key(prev=t.meta.get("inputs"), today=today)[0]:
+        return None
+    return t
+
+
+def from_config(cfg: dict) -> PredictionTable | None:
+    return current_table() if cfg.get("prediction_table", True) else None
+
+
+# ---------- batch scoring ----------
+def _artifact() -> str | None:
+    try:
+        return json.loads((DL_MODELS / "latest.json").read_text(encoding="utf-8"))["artifact"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def input_key(events: Path = EVENTS_CSV, deadlines: Path = DEADLINES_CSV, prev: dict | None = None,
+              today: date | None = None) -> tuple[str, dict]:
+    """(key, fingerprints) of everything the table depends on."""
+    prev = prev or {}
+    fps = {"events": file_fingerprint(events, prev.get("events")),
+           "deadlines": file_fingerprint(deadlines, prev.get("deadlines"))}
+    today = (today or datetime.now(timezone.utc).date()).isoformat()
+    key = digest({"version": TABLE_VERSION, "events": fps["events"].get("sha256"),
+                  "deadlines": fps["deadlines"].get("sha256"), "artifact": _artifact(), "ml": promoted("ml"), "today": today})
+    return key, fps
+
+
+def next_deadlines(dl: pd.DataFrame, today: date) -> pd.DataFrame:
+    """Active subjects (lowercase, as in facts.pl) with the difficulty and days of their next deadline."""
+    d = pd.DataFrame({
+        "subject": dl["subject"].astype(str).str.strip().str.lower(),
+        "date": pd.to_datetime(dl["date"], errors="coerce"),
+        "difficulty": pd.to_numeric(dl["difficulty"], errors="coerce"),
+    })
+    subjects = pd.Index(pd.unique(d["subject"]))
+    up = d[d["date"] >= pd.Timestamp(today)].sort_values("date", kind="stable")
+    up = up.drop_duplicates("subject").set_index("subject").reindex(subjects)
+    days = (up["date"] - pd.Timestamp(today)).dt.days
+    return pd.DataFrame({
+        "subject": subjects,
+        "days": np.clip(days.to_numpy(dtype=float, na_value=np.nan), 0, 60),
+        "difficulty": up["difficulty"].to_numpy(dtype=float),
+    })
+
+
+def score(features: pd.DataFrame, active: pd.DataFrame, predictor=None) -> np.ndarray:
+    """(subjects, len(COLUMNS)) float32 rows for `active` (see next_deadlines)."""
+    _model_paths()
+    from ml_adherence import feature_matrix, fit_predict
+    from dl_minutes_predictor import MinutesPredictor
+
+    key = features["subject"].astype(str).str.strip().str.lower()
+    # adherence: one fit over all events, averaged per subject (unknown subjects: overall mean)
+    p_row, _ = fit_predict(*feature_matrix(features))
+    p_sub = pd.Series(p_row).groupby(key.to_numpy()).mean()
+    p = active["subject"].map(p_sub).fillna(float(np.mean(p_row)) if len(p_row) else 0.5)
+
+    # minutes: one batched forward pass; the DL vocabulary keeps the events' spelling
+    spelling = pd.Series(features["subject"].to_numpy(), index=key.to_numpy())
+    spelling = spelling[~spelling.index.duplicated()]
+    last = features.groupby(key.to_numpy(), sort=False)["completed"].apply(
+        lambda c: float(np.nan_to_num(c.to_numpy(dtype=float)[-3:]).mean()))
+    predictor = predictor or MinutesPredictor()
+    minutes = predictor.predict(active["subject"].map(spelling).fillna(active["subject"]),
+                                active["difficulty"], active["days"],
+                                active["subject"].map(last).fillna(0.0))
+
+    out = np.empty((len(active), len(COLUMNS)), dtype="float32")
+    out[:, 0] = np.clip(minutes, 0, None)
+    out[:, 1] = p.to_numpy(dtype=float)
+    out[:, 2] = np.nan_to_num(active["days"].to_numpy(dtype=float), nan=14.0)
+    return out
+
+
+def write_table(root: Path, rows: np.ndarray, meta: dict) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / "table.tmp.npy", "wb") as f:
+        np.save(f, rows)
+    os.replace(root / "table.tmp.npy", root / "table.npy")
+    (root / "table.tmp").write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(root / "table.tmp", root / "table.json")
+
+
+@traced("predict.table")
+def build(root: Path = TABLE_DIR, force: bool = False, today: date | None = None) -> dict:
+    """
+    Rebuild the table if its inputs changed. Returns {"rebuilt", "subjects",
+    "key", "seconds"}; an untouched table costs two file fingerprints.
+    """
+    t0 = time.perf_counter()
+    root = Path(root)
+    today = today or datetime.now(timezone.utc).date()
+    old = {}
+    try:
+        old = json.loads((root / "table.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+    key, fps = input_key(prev=old.get("inputs"), today=today)
+    if not force and old.get("key") == key and old.get("version") == TABLE_VERSION and (root / "table.npy").exists():
+        count("prediction_table", result="current")
+        return {"rebuilt": False, "subjects": len(old.get("subjects", [])), "key": key,
+                "seconds": round(time.perf_counter() - t0, 4)}
+
+    _model_paths()
+    from features import load_features
+    from dl_minutes_predictor import run_dl
+    if _artifact() is None:
+        run_dl()  # no minutes model yet: train one (keyed by data, reused afterwards)
+        key, fps = input_key(prev=fps, today=today)
+    features, _ = load_features()
+    active = next_deadlines(read_deadlines(DEADLINES_CSV), today)
+    rows = score(features, active)
+    write_table(root, rows, {"version": TABLE_VERSION, "key": key, "inputs": fps, "columns": COLUMNS,
+                        "subjects": active["subject"].tolist(), "artifact": _artifact(),
+                        "today": today.isoformat()})
+    count("prediction_table", result="rebuilt")
+    count("rows_processed", len(rows), stage="predict")
+    annotate(subjects=len(rows))
+    return {"rebuilt": True, "subjects": len(rows), "key": key, "seconds": round(time.perf_counter() - t0, 4)}
+
+
+if __name__ == "__main__":
+    r = build(force="--force" in sys.argv)
+    print(f"[predict] {'rebuilt' if r['rebuilt'] else 'kept'} cache/predictions/table.npy "
+          f"({r['subjects']} subjects, {r['seconds']}s)")
+    t = load_table()
+    for s in t.meta["subjects"]:
+        print(f"  {s:<20} " + "  ".join(f"{c}={t.get(s, c):.2f}" for c in COLUMNS))
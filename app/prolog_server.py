@@ -0,0 +1,254 @@
+# app/prolog_server.py — persistent SWI-Prolog worker(s) for the Reason layer
+# Starts swipl once with planner_rules.pl + server.pl loaded, then hot-swaps
+# facts.pl and runs main_json/0 over a stdin/stdout pipe for every plan request.
+
+from __future__ import annotations
+import subprocess
+import threading
+import queue
+import time
+from collections import deque
+from pathlib import Path
+
+from tracing import traced
+from run_planner import ENGINES, FACTS_PL, ROOT, compiled_rules, load_config, swipl_path
+
+SERVER_PL = ENGINES / "server.pl"
+
+END = "__isa_end__"
+FAIL = "__isa_fail__"
+ERROR = "__isa_error__"
+
+
+class PrologWorkerError(RuntimeError):
+    """Raised when the worker cannot answer a request (crash, timeout, goal error)."""
+
+
+class PrologTimeout(PrologWorkerError):
+    """The goal did not finish in time; the worker has already been restarted."""
+
+
+def pl_quote(text: str) -> str:
+    """Quote a Python string as a Prolog atom (used for file paths)."""
+    return "'" + text.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+# ---------- Single worker ----------
+class PrologWorker:
+    """
+    One long-lived swipl process.
+    Rules are consulted once at start; facts are swapped with load_facts/1 and
+    only re-sent when the facts file changed on disk. A crashed or hung
+    process is killed and restarted transparently on the next request.
+    """
+
+    def __init__(self, swipl: str | None = None, timeout_s: float = 30.0):
+        cfg = load_config()
+        self.swipl = swipl or swipl_path(cfg)
+        self.rules = compiled_rules(cfg)
+        self.timeout_s = timeout_s
+        self.proc: subprocess.Popen | None = None
+        self.restarts = 0
+        self.starts = 0
+        self._lines: queue.Queue = queue.Queue()
+        self._stderr: deque = deque(maxlen=200)
+        self._facts_key: tuple | None = None
+        self._lock = threading.Lock()
+
+    def build_cmd(self) -> list[str]:
+        return [
+            self.swipl,
+            "-q",
+            "-f", "none",
+            "-s", str(self.rules),
+            "-s", str(SERVER_PL),
+            "-g", "serve",
+            "-t", "halt",
+        ]
+
+    # ----- process lifecycle -----
+    @traced("prolog.spawn")
+    def start(self) -> None:
+        if self.alive():
+            return
+        try:
+            self.proc = subprocess.Popen(
+                self.build_cmd(),
+                cwd=ROOT,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+        except FileNotFoundError:
+            raise SystemExit(
+                f"[reason] SWI-Prolog not found: '{self.swipl}'.\n"
+                "Set swipl_path in config.yaml or the SWIPL env var."
+            )
+        self.restarts = self.starts
+        self.starts += 1
+        self._lines = queue.Queue()
+        self._facts_key = None
+        threading.Thread(target=self._pump, args=(self.proc.stdout, self._lines), daemon=True).start()
+        threading.Thread(target=self._drain, args=(self.proc.stderr,), daemon=True).start()
+        self._request("ping", self.timeout_s)
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def close(self) -> None:
+        if self.proc is None:
+            return
+        try:
+            if self.alive():
+                self.proc.stdin.close()
+                self.proc.wait(timeout=2)
+        except Exception:
+            pass
+        finally:
+            if self.alive():
+                self.proc.kill()
+            self.proc = None
+
+    def restart(self) -> None:
+        self.close()
+        self.start()
+
+    @staticmethod
+    def _pump(stream, lines: queue.Queue) -> None:
+        for line in stream:
+            lines.put(line.rstrip("\r\n"))
+        lines.put(None)  # EOF: process exited
+
+    def _drain(self, stream) -> None:
+        for line in stream:
+            self._stderr.append(line.rstrip("\r\n"))
+
+    # ----- request/response -----
+    def _request(self, goal: str, timeout_s: float) -> list[str]:
+        try:
+            self.proc.stdin.write(goal.rstrip(". ") + ".\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise PrologWorkerError(f"[reason] Prolog worker pipe closed: {e}")
+
+        out: list[str] = []
+        deadline = time.monotonic() + timeout_s
+        while True:
+            left = deadline - time.monotonic()
+            try:
+                line = self._lines.get(timeout=max(left, 0.0))
+            except queue.Empty:
+                self.close()
+                raise PrologTimeout(f"[reason] Prolog worker timed out (>{timeout_s}s) on: {goal}")
+            if line is None:
+                stderr = "\n".join(self._stderr)
+                self.close()
+                raise PrologWorkerError(f"[reason] Prolog worker exited during: {goal}\nSTDERR:\n{stderr}")
+            if line == END:
+                break
+            out.append(line)
+
+        if out and out[-1] == FAIL:
+            raise PrologWorkerError(f"[reason] Goal failed: {goal}")
+        if out and out[-1].startswith(ERROR):
+            raise PrologWorkerError(f"[reason] Goal raised: {out[-1][len(ERROR):].strip()}")
+        return out
+
+    def query(self, goal: str, timeout_s: float | None = None, retry: bool = True) -> str:
+        """Run one goal and return its printed output. A crash restarts the worker and retries once."""
+        timeout_s = timeout_s or self.timeout_s
+        with self._lock:
+            if self.proc is None:
+                self.start()
+            elif not self.alive():
+                self.restart()
+            try:
+                return "\n".join(self._request(goal, timeout_s))
+            except PrologTimeout:
+                self.restart()  # leave a warm worker behind, but don't re-run a hanging goal
+                raise
+            except PrologWorkerError:
+                if not retry or self.alive():
+                    raise  # goal error: process is fine, don't mask it
+                self.restart()
+                return "\n".join(self._request(goal, timeout_s))
+
+    def load_facts(self, path: Path = FACTS_PL, force: bool = False) -> bool:
+        """Hot-swap the fact set. Returns False when the file is unchanged and was skipped."""
+        st = path.stat()
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        if not force and self.alive() and key == self._facts_key:
+            return False
+        self.query(f"load_facts({pl_quote(path.as_posix())})")
+        self._facts_key = key
+        return True
+
+    def plan(self, facts_path: Path = FACTS_PL, timeout_s: float | None = None) -> tuple[str, float]:
+        """Same contract as run_planner.run_prolog: (stdout of main_json/0, latency seconds)."""
+        t0 = time.time()
+        try:
+            self.load_facts(facts_path)
+            out = self.query("main_json", timeout_s, retry=False)
+        except PrologTimeout:
+            raise
+        except PrologWorkerError:
+            if self.alive():
+                raise
+            # crashed mid-request: the restarted worker has no facts yet
+            self.load_facts(facts_path, force=True)
+            out = self.query("main_json", timeout_s, retry=False)
+        return out.strip(), time.time() - t0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------- Small pool ----------
+class PrologPool:
+    """Fixed-size pool of PrologWorker; each request borrows one worker."""
+
+    def __init__(self, size: int = 1, swipl: str | None = None, timeout_s: float = 30.0):
+        self.workers = [PrologWorker(swipl, timeout_s) for _ in range(max(1, size))]
+        self._free: queue.Queue = queue.Queue()
+        for w in self.workers:
+            self._free.put(w)
+
+    def plan(self, facts_path: Path = FACTS_PL, timeout_s: float | None = None) -> tuple[str, float]:
+        w = self._free.get()
+        try:
+            return w.plan(facts_path, timeout_s)
+        finally:
+            self._free.put(w)
+
+    def close(self) -> None:
+        for w in self.workers:
+            w.close()
+
+
+_POOL: PrologPool | None = None
+
+
+def get_pool(cfg: dict | None = None) -> PrologPool:
+    """Process-wide pool, created lazily from config.yaml (prolog_pool_size, prolog_timeout_s)."""
+    global _POOL
+    if _POOL is None:
+        cfg = load_config() if cfg is None else cfg
+        _POOL = PrologPool(
+            size=int(cfg.get("prolog_pool_size", 1)),
+            swipl=swipl_path(cfg),
+            timeout_s=float(cfg.get("prolog_timeout_s", 30)),
+        )
+    return _POOL
+
+
+def shutdown_pool() -> None:
+    global _POOL
+    if _POOL is not None:
+        _POOL.close()
+        _POOL = None
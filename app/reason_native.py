@@ -0,0 +1,215 @@
+# app/reason_native.py — pure Python/NumPy Reason backend for ISA-Lite
+# Mirrors engines/planner_rules.pl (near_exam/1, base_minutes/2, allocate/2, decision/2,
+# plan_triplet/3) but evaluates every subject at once with array operations,
+# so no swipl process is needed. Output is identical to parse_plan(main_json/0).
+
+from __future__ import annotations
+import re
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+FACTS_PL = ROOT / "engines" / "facts.pl"
+
+_FACT = re.compile(r"^\s*([a-z]\w*)\((.*)\)\s*\.\s*$")
+_DATE = re.compile(r"^date\(\s*(-?\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)$")
+
+
+# ---------- facts.pl reader ----------
+_ESCAPE = re.compile(r"''|\\(x[0-9a-fA-F]+\\?|[0-7]+\\?|.)", re.S)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "a": "\a", "b": "\b", "f": "\f", "v": "\v", "0": "\0", "e": "\x1b", "s": " "}
+
+
+def _split_args(s: str) -> list[str]:
+    """Split a Prolog argument list on top-level commas (respects quotes and parentheses)."""
+    args, buf, depth, quote = [], [], 0, None
+    i = 0
+    while i < len(s):
+        c = s[i]
+        if quote:
+            if c == "\\" and (m := _ESCAPE.match(s, i)):  # whole escape, incl. \xHH\
+                buf.append(m.group(0))
+                i = m.end()
+                continue
+            buf.append(c)
+            if c == quote:
+                if i + 1 < len(s) and s[i + 1] == quote:  # doubled quote
+                    buf.append(s[i + 1])
+                    i += 1
+                else:
+                    quote = None
+        elif c in "'\"":
+            quote = c
+            buf.append(c)
+        elif c in "([":
+            depth += 1
+            buf.append(c)
+        elif c in ")]":
+            depth -= 1
+            buf.append(c)
+        elif c == "," and depth == 0:
+            args.append("".join(buf).strip())
+            buf = []
+        else:
+            buf.append(c)
+        i += 1
+    args.append("".join(buf).strip())
+    return args
+
+
+def _unescape(m: re.Match) -> str:
+    if m.group(0) == "''":
+        return "'"
+    e = m.group(1)
+    if e[0] == "x":
+        return chr(int(e[1:].rstrip("\\"), 16))
+    if e[0] in "01234567" and len(e) > 1:
+        return chr(int(e.rstrip("\\"), 8))
+    return _ESCAPES.get(e, e)
+
+
+def unquote_atom(tok: str) -> str:
+    """Text of a Prolog atom as written by writeq/1: 'quoted' atoms lose their quotes and escapes."""
+    if len(tok) >= 2 and tok[0] == tok[-1] == "'":
+        return _ESCAPE.sub(_unescape, tok[1:-1])
+    return tok
+
+
+def _value(tok: str):
+    m = _DATE.match(tok)
+    if m:
+        y, mo, d = (int(x) for x in m.groups())
+        return date(y, mo, d)
+    try:
+        return int(tok)
+    except ValueError:
+        pass
+    try:
+        return float(tok)
+    except ValueError:
+        return unquote_atom(tok)
+
+
+def parse_facts(text: str) -> dict[str, list[tuple]]:
+    """Parse the ground facts written by Perceive into {functor: [args, ...]} (file order kept)."""
+    facts: dict[str, list[tuple]] = {}
+    for line in text.split("\n"):  # not splitlines(): quoted atoms may hold \x1c, \u2028, ...
+        if not line.strip() or line.lstrip().startswith("%"):
+            continue
+        m = _FACT.match(line)
+        if not m:
+            raise SystemExit(f"[reason] Cannot parse fact: {line}")
+        name, body = m.groups()
+        facts.setdefault(name, []).append(tuple(_value(a) for a in _split_args(body)))
+    return facts
+
+
+def read_facts(path: Path = FACTS_PL) -> dict[str, list[tuple]]:
+    if not path.exists():
+        raise SystemExit(
+            f"[reason] Missing facts file: {path}\n"
+            "Run Perceive first (python app/perceive.py) to generate facts.pl."
+        )
+    return parse_facts(path.read_text(encoding="utf-8"))
+
+
+# ---------- vectorized rules ----------
+def utc_today() -> date:
+    """Same clock as today/1 in planner_rules.pl (UTC date)."""
+    return datetime.now(timezone.utc).date()
+
+
+def _prolog_round(x: np.ndarray) -> np.ndarray:
+    # round/1 in Prolog rounds half away from zero (np.round rounds half to even)
+    return (np.sign(x) * np.floor(np.abs(x) + 0.5)).astype(np.int64)
+
+
+def _any_per_subject(ix: np.ndarray, mask: np.ndarray, n: int) -> np.ndarray:
+    hit = ix[mask & (ix >= 0)]
+    return np.bincount(hit, minlength=n) > 0
+
+
+def plan_from_facts(facts: dict[str, list[tuple]], today: date | None = None) -> list[dict]:
+    today = today or utc_today()
+    subjects = [a[0] for a in facts.get("subject", [])]
+    n = len(subjects)
+    if n == 0:
+        return []
+    index = pd.Index(pd.unique(np.array(subjects, dtype=object)))
+    s_ix = index.get_indexer(subjects)
+    m = len(index)
+
+    hours = facts.get("hours_per_day")
+    near_days = facts.get("exam_near_days")
+
+    # deadline/3 -> has_deadline, near_exam
+    ddl = facts.get("deadline", [])
+    if ddl:
+        d_ix = index.get_indexer([a[0] for a in ddl])
+        d_type = np.array([a[1] for a in ddl], dtype=object)
+        d_days = np.array([a[2].toordinal() for a in ddl], dtype=np.int64) - today.toordinal()
+        has_deadline = _any_per_subject(d_ix, np.ones(len(ddl), bool), m)
+        if near_days:
+            near = _any_per_subject(d_ix, (d_type == "exam") & (d_days >= 0) & (d_days <= near_days[0][0]), m)
+        else:
+            near = np.zeros(m, bool)
+    else:
+        has_deadline = near = np.zeros(m, bool)
+
+    # progress/3 -> any completion_pct < 0.7
+    prg = facts.get("progress", [])
+    if prg:
+        p_ix = index.get_indexer([a[0] for a in prg])
+        p_metric = np.array([a[1] for a in prg], dtype=object)
+        p_val = np.array([float(a[2]) for a in prg])
+        low_progress = _any_per_subject(p_ix, (p_metric == "completion_pct") & (p_val < 0.7), m)
+    else:
+        low_progress = np.zeros(m, bool)
+
+    # difficulty/2 -> any difficulty >= 4
+    dif = facts.get("difficulty", [])
+    if dif:
+        f_ix = index.get_indexer([a[0] for a in dif])
+        f_val = np.array([float(a[1]) for a in dif])
+        hard = _any_per_subject(f_ix, f_val >= 4, m)
+    else:
+        hard = np.zeros(m, bool)
+
+    # predicted_minutes/2 -> base_minutes/2 (first fact per subject wins, 60 without one)
+    base = np.full(m, 60.0)
+    pred = facts.get("predicted_minutes", [])
+    if pred:
+        b_ix = index.get_indexer([a[0] for a in pred])[::-1]
+        b_val = np.array([float(a[1]) for a in pred])[::-1]
+        base[b_ix[b_ix >= 0]] = b_val[b_ix >= 0]  # reversed: the first fact is written last
+
+    # allocate/2 (fails without hours_per_day -> minutes 0, decision needs_info)
+    if hours:
+        H = float(hours[0][0])
+        minutes = _prolog_round(np.select(
+            [near, low_progress, hard],
+            [np.minimum(2.0 * base, 0.5 * H), np.minimum(1.5 * base, 0.4 * H), np.minimum(1.25 * base, 0.35 * H)],
+            default=np.minimum(base, 0.25 * H),
+        ))
+        decision = np.where(~has_deadline, "needs_info",
+                            np.where(minutes < 30, "reject", "shortlist"))
+    else:
+        minutes = np.zeros(m, np.int64)
+        decision = np.full(m, "needs_info", dtype=object)
+
+    # plan_triplet/3 in subject/1 clause order
+    return [
+        {"subject": s, "decision": str(decision[i]), "minutes": int(minutes[i])}
+        for s, i in zip(subjects, s_ix)
+    ]
+
+
+def run_native(facts_path: Path = FACTS_PL, today: date | None = None) -> tuple[list[dict], float]:
+    """Native counterpart of run_planner.run_prolog + parse_plan: (plan, latency seconds)."""
+    t0 = time.time()
+    plan = plan_from_facts(read_facts(facts_path), today)
+    return plan, time.time() - t0
@@ -1,11 +1,14 @@
 # app/run_planner.py  — Reason Layer (Prolog) runner for ISA-Lite
 # Runs SWI-Prolog with planner_rules.pl + facts.pl and writes app/plan.json
+# (or the equivalent NumPy backend in reason_native.py, see --backend)
 
 from __future__ import annotations
+import argparse
 import subprocess
 import json
 import time
 import os
+import re
 from pathlib import Path
 
 # Optional dependency: PyYAML (you already installed it)
@@ -14,12 +17,15 @@ try:
 except Exception:
     yaml = None
 
+from tracing import annotate, count, traced
+
 ROOT = Path(__file__).resolve().parents[1]
 ENGINES = ROOT / "engines"
 APP = ROOT / "app"
 CONFIG = ROOT / "config.yaml"
 
 RULES_PL = ENGINES / "planner_rules.pl"
+RULES_QLF = ENGINES / "planner_rules.qlf"
 FACTS_PL = ENGINES / "facts.pl"
 OUT_JSON = APP / "plan.json"
 
@@ -50,13 +56,37 @@ def swipl_path(cfg: dict) -> str:
     return "swipl"
 
 
+# ---------- Rules precompilation (QLF) ----------
+def compiled_rules(cfg: dict) -> Path:
+    """
+    Return the rules file to load: engines/planner_rules.qlf when prolog_qlf is
+    enabled and the QLF is newer than the .pl source (recompiled here if stale),
+    otherwise planner_rules.pl. Any compile problem falls back to the source.
+    """
+    if not cfg.get("prolog_qlf", False) or not RULES_PL.exists():
+        return RULES_PL
+    if RULES_QLF.exists() and RULES_QLF.stat().st_mtime >= RULES_PL.stat().st_mtime:
+        return RULES_QLF
+    goal = f"qcompile('{RULES_PL.as_posix()}')"
+    try:
+        p = subprocess.run(
+            [swipl_path(cfg), "-q", "-f", "none", "-g", goal, "-t", "halt"],
+            cwd=ROOT, capture_output=True, text=True, timeout=60,
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return RULES_PL
+    if p.returncode != 0 or not RULES_QLF.exists():
+        return RULES_PL
+    return RULES_QLF
+
+
 # ---------- Prolog runner ----------
-def build_cmd(swipl: str) -> list[str]:
+def build_cmd(swipl: str, rules: Path = RULES_PL) -> list[str]:
     """
     Use:
       -q           quiet
       -f none      ignore init files (stability)
-      -s file      consult files
+      -s file      consult files (rules may be the precompiled .qlf)
       -g goal      run goal
       -t halt      terminate always
     """
@@ -64,9 +94,9 @@ def build_cmd(swipl: str) -> list[str]:
         swipl,
         "-q",
         "-f", "none",
-        "-s", str(RULES_PL),
+        "-s", str(rules),
         "-s", str(FACTS_PL),
-        "-g", "main",
+        "-g", "main_json",
         "-t", "halt",
     ]
 
@@ -80,10 +110,10 @@ def pretty_file_head(path: Path, max_lines: int = 60) -> str:
     return f"[debug] {path} (first {min(max_lines,len(lines))} lines)\n{head}{tail_note}"
 
 
+@traced("prolog.spawn_cold")
 def run_prolog(timeout_s: int = 30) -> tuple[str, float]:
     cfg = load_config()
     swipl = swipl_path(cfg)
-    cmd = build_cmd(swipl)
 
     # Sanity checks
     if not RULES_PL.exists():
@@ -93,6 +123,7 @@ def run_prolog(timeout_s: int = 30) -> tuple[str, float]:
             f"[reason] Missing facts file: {FACTS_PL}\n"
             "Run Perceive first (python app/perceive.py) to generate facts.pl."
         )
+    cmd = build_cmd(swipl, compiled_rules(cfg))
 
     t0 = time.time()
     try:
@@ -117,9 +148,9 @@ def run_prolog(timeout_s: int = 30) -> tuple[str, float]:
             f"[reason] Prolog timed out (hung >{timeout_s}s).\n"
             "Likely reasons:\n"
             "  - planner_rules.pl threw an error and Prolog is stuck\n"
-            "  - main/0 does not terminate or calls a predicate that loops\n"
+            "  - main_json/0 does not terminate or calls a predicate that loops\n"
             "Fix:\n"
-            "  - Ensure main/0 prints the plan and ends\n"
+            "  - Ensure main_json/0 prints the plan and ends\n"
             "  - Ensure comparisons use numbers (no uninstantiated vars)\n"
         )
 
@@ -142,71 +173,143 @@ def run_prolog(timeout_s: int = 30) -> tuple[str, float]:
     if not stdout:
         raise SystemExit(
             "[reason] Prolog succeeded but printed no output.\n"
-            "Your main/0 must print a list like:\n"
-            "  [[math,shortlist,120],[physics,needs_info,60]]\n"
-            "Fix planner_rules.pl: ensure main :- plan(P), writeln(P).\n"
+            "Your main_json/0 must print a JSON array like:\n"
+            '  [{"decision":"shortlist","minutes":120,"subject":"math"}]\n'
+            "Fix planner_rules.pl: ensure main_json/0 writes the plan with json_write_dict/3.\n"
         )
 
     return stdout, latency
 
 
+def run_reason(timeout_s: int = 30, cfg: dict | None = None) -> tuple[str, float]:
+    """
+    Reason step entry point.
+    With prolog_persistent: true the plan comes from a warm worker
+    (app/prolog_server.py) that keeps the rules loaded between calls;
+    otherwise a fresh swipl is spawned as before.
+    """
+    cfg = load_config() if cfg is None else cfg
+    if not cfg.get("prolog_persistent"):
+        return run_prolog(timeout_s=timeout_s)
+    if not FACTS_PL.exists():
+        raise SystemExit(
+            f"[reason] Missing facts file: {FACTS_PL}\n"
+            "Run Perceive first (python app/perceive.py) to generate facts.pl."
+        )
+    from prolog_server import get_pool
+    return get_pool(cfg).plan(FACTS_PL, timeout_s)
+
+
 # ---------- Output parsing ----------
+# main/0 output (writeq): [[math,shortlist,120],['computer science',needs_info,60]]
+# writeq leaves an atom unquoted when it starts with any lowercase (or caseless) letter, e.g. élan
+_PL_ATOM = r"'(?:[^'\\]|''|\\(?:x[0-9a-fA-F]+\\|[0-7]+\\|.))*'|[^\W\d_A-Z]\w*|[#$&*+\-./:<=>?@^~\\]+"
+_PL_NUM = r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?"
+_PL_ITEM = rf"\[\s*(?:{_PL_ATOM})\s*,\s*(?:{_PL_ATOM})\s*,\s*(?:{_PL_NUM})\s*\]"
+_PL_LIST_RE = re.compile(rf"\[\s*(?:{_PL_ITEM}(?:\s*,\s*{_PL_ITEM})*)?\s*\]", re.S)
+_PL_ITEM_RE = re.compile(rf"\[\s*({_PL_ATOM})\s*,\s*({_PL_ATOM})\s*,\s*({_PL_NUM})\s*\]", re.S)
+
+
+def _plan_from_json(obj) -> list[dict] | None:
+    items = obj.get("plan") if isinstance(obj, dict) else obj
+    if not isinstance(items, list):
+        return None
+    try:
+        return [{"subject": str(it["subject"]), "decision": str(it["decision"]),
+                 "minutes": int(float(it["minutes"]))} for it in items]
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+@traced("reason.parse")
 def parse_plan(text: str) -> list[dict]:
     """
-    Expected Prolog output format:
-      [[math,shortlist,120],[physics,needs_info,60]]
-    We'll parse a *simple* bracket list safely.
+    Plan from Prolog output, in one pass:
+      main_json/0: [{"decision":"shortlist","minutes":120,"subject":"math"}, ...]
+                   (or {"plan": [...]})
+      main/0:      [[math,shortlist,120],['computer science',needs_info,60]]
+    Quoted atoms may contain commas, brackets and escaped quotes.
     """
-    # Normalize whitespace
     raw = text.strip()
-
-    # Option 1: Prolog prints JSON already (future-proof)
-    if raw.startswith("{") or raw.startswith("[{"):
+    if raw.startswith("{") or raw.startswith("[{") or raw == "[]":
         try:
-            obj = json.loads(raw)
-            # Accept either {"plan":[...]} or direct list
-            if isinstance(obj, dict) and "plan" in obj:
-                return obj["plan"]
-            if isinstance(obj, list):
-                return obj
-        except Exception:
-            pass
-
-    # Option 2: Prolog list like [[a,b,1],[c,d,2]]
-    # We'll do a lightweight parse instead of ast.literal_eval hacks.
-    # Strategy: split on "],[" boundaries and parse tokens.
-    if not (raw.startswith("[[") and raw.endswith("]]")):
+            plan = _plan_from_json(json.loads(raw))
+        except ValueError:
+            plan = None
+        if plan is not None:
+            return plan
+
+    if not _PL_LIST_RE.fullmatch(raw):
         raise SystemExit(
-            f"[reason] Unexpected Prolog output format:\n{raw}\n"
-            "Expected something like: [[math,shortlist,120],[physics,needs_info,60]]"
+            f"[reason] Unexpected Prolog output format:\n{raw[:2000]}\n"
+            'Expected main_json/0 output like: [{"decision":"shortlist","minutes":120,"subject":"math"}]\n'
+            "or main/0 output like: [[math,shortlist,120],[physics,needs_info,60]]"
         )
+    from reason_native import unquote_atom
+    return [{"subject": unquote_atom(s), "decision": unquote_atom(d), "minutes": int(float(m))}
+            for s, d, m in _PL_ITEM_RE.findall(raw)]
 
-    inner = raw[2:-2]  # remove outer [[ and ]]
-    items = inner.split("],[") if inner else []
-    plan = []
-    for it in items:
-        parts = [p.strip() for p in it.split(",")]
-        if len(parts) != 3:
-            raise SystemExit(f"[reason] Bad item in Prolog output: [{it}]")
-        subject, decision, minutes = parts
-        # remove quotes if any
-        subject = subject.strip("'\"")
-        decision = decision.strip("'\"")
-        try:
-            minutes_i = int(float(minutes))
-        except Exception:
-            minutes_i = 0
-        plan.append({"subject": subject, "decision": decision, "minutes": minutes_i})
-    return plan
 
+def reason_plan(backend: str | None = None, timeout_s: int = 30,
+                facts_text: str | None = None) -> tuple[list[dict], float, str]:
+    """
+    Run the configured backend ("prolog" or "native"); returns (plan, latency, source)
+    where source is the backend name, or "cache" when the plan came from the
+    content-addressed plan cache (app/plan_cache.py).
+    facts_text lets the in-process pipeline hand the native backend its facts
+    without re-reading facts.pl (Prolog always consults the file).
+    """
+    cfg = load_config()
+    backend = backend or str(cfg.get("reason_backend", "prolog"))
+    if backend not in ("prolog", "native"):
+        raise SystemExit(f"[reason] Unknown reason_backend: {backend!r} (use 'prolog' or 'native')")
+
+    from plan_cache import from_config, plan_key
+    cache = from_config(cfg)
+    key = None
+    if cache is not None and (facts_text is not None or FACTS_PL.exists()):
+        t0 = time.time()
+        if facts_text is None:
+            facts_text = FACTS_PL.read_text(encoding="utf-8")
+        key = plan_key(facts_text, RULES_PL)
+        plan = cache.get(key)
+        count("plan_cache", result="hit" if plan is not None else "miss")
+        if plan is not None:
+            return plan, time.time() - t0, "cache"
+
+    if backend == "native":
+        from reason_native import run_native, plan_from_facts, parse_facts
+        if facts_text is None:
+            plan, latency = run_native(FACTS_PL)
+        else:
+            t0 = time.time()
+            plan = plan_from_facts(parse_facts(facts_text))
+            latency = time.time() - t0
+    else:
+        out, latency = run_reason(timeout_s=timeout_s, cfg=cfg)
+        plan = parse_plan(out)
+
+    if key is not None:
+        cache.put(key, plan)
+    annotate(backend=backend, subjects=len(plan))
+    return plan, latency, backend
 
-def main():
-    out, latency = run_prolog(timeout_s=30)
-    plan = parse_plan(out)
 
+def write_plan(plan: list[dict]) -> None:
     OUT_JSON.write_text(json.dumps(plan, indent=2), encoding="utf-8")
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="ISA-Lite Reason layer")
+    ap.add_argument("--backend", choices=["prolog", "native"], default=None,
+                    help="override reason_backend from config.yaml")
+    args = ap.parse_args(argv)
+
+    plan, latency, source = reason_plan(args.backend, timeout_s=30)
+
+    write_plan(plan)
     print("[reason] wrote app/plan.json")
-    print(json.dumps({"latency_s": round(latency, 3), "plan": plan}, indent=2))
+    print(json.dumps({"source": source, "latency_s": round(latency, 3), "plan": plan}, indent=2))
 
 
 if __name__ == "__main__":
@@ -1,10 +1,23 @@
-import json, yaml, pandas as pd
+import json, pandas as pd
 from datetime import datetime, timedelta
+from pathlib import Path
 
-CFG = yaml.safe_load(open("config.yaml"))
+from loader import read_deadlines
+from reason_native import utc_today
+from run_planner import load_config
+from scheduler import build_schedule
+import predictions
 
-def build_day_schedule(plan):
-    slots, left = [], CFG["daily_hours_max_min"]
+ROOT = Path(__file__).resolve().parents[1]
+PLAN_JSON = ROOT / "app" / "plan.json"
+TODAY_CSV = ROOT / "data" / "todays_plan.csv"
+HORIZON_CSV = ROOT / "data" / "horizon_plan.csv"
+DEADLINES_CSV = ROOT / "data" / "deadlines.csv"
+
+def build_day_schedule(plan, cfg=None):
+    """Original single-day greedy packer (kept for comparison; act() uses scheduler.py)."""
+    cfg = load_config() if cfg is None else cfg
+    slots, left = [], cfg["daily_hours_max_min"]
     now = datetime.now().replace(second=0, microsecond=0)
     t = now.replace(hour=17, minute=0)  # start at 5pm (simple)
     for p in sorted(plan, key=lambda x: -x["minutes"]):
@@ -18,11 +31,33 @@ def build_day_schedule(plan):
         left -= dur
     return slots
 
+def act(plan=None, dl=None, today_csv=TODAY_CSV, horizon_csv=HORIZON_CSV, cfg=None, table=None):
+    """
+    Act stage: plan (in memory, or app/plan.json) + deadlines -> multi-day
+    schedule in data/horizon_plan.csv; today's rows go to data/todays_plan.csv.
+    config.yaml is re-read on every call unless `cfg` is passed, so a
+    long-running process sees edits to availability / scheduler / daily hours.
+    With a prediction `table` (predictions.PredictionTable for data/, passed
+    by the pipeline), session priorities are weighted by 1 + (1 - p_complete).
+    """
+    cfg = load_config() if cfg is None else cfg
+    if plan is None:
+        plan = json.load(open(PLAN_JSON))
+    if dl is None:
+        dl = read_deadlines(DEADLINES_CSV)
+    today = utc_today()  # the day Perceive / Reason planned for (today/1 is UTC)
+    weights = None
+    if table is not None:  # O(1) lookups in the precomputed table, no model call
+        weights = {p["subject"]: 2.0 - table.get(p["subject"], "p_complete", 1.0) for p in plan}
+    horizon, info = build_schedule(plan, dl, cfg, start=today, weights=weights)
+    df = horizon.loc[horizon["date"] == today.strftime("%m/%d/%Y"), ["subject", "start", "end", "minutes"]].reset_index(drop=True)
+    df.to_csv(today_csv, index=False)
+    horizon.to_csv(horizon_csv, index=False)
+    df.attrs["horizon"] = info
+    return df
+
 if __name__=="__main__":
-    plan = json.load(open("app/plan.json"))
-    schedule = build_day_schedule(plan)
-    df = pd.DataFrame(schedule)
+    df = act()
     print("\n=== TODAY'S PLAN ===")
     print(df if not df.empty else "No sessions.")
     # (You can add email/popup later; for now we print the plan.)
-    df.to_csv("data/todays_plan.csv", index=False)
@@ -0,0 +1,185 @@
+# app/scheduler.py — Act-stage scheduling engine for ISA-Lite
+# Turns the Reason plan (minutes per shortlisted subject) into sessions over a
+# multi-day horizon:
+#
+#   * availability windows per weekday from config.yaml (e.g. "17:00-23:00")
+#   * a priority per subject and day from deadlines.csv: every upcoming
+#     deadline adds weight * difficulty / (1 + days until it), optionally
+#     scaled per subject (schedule_apply passes 1 + (1 - p_complete) from the
+#     prediction table, so subjects likely to be skipped go first)
+#   * each window is filled by a 0/1 knapsack (one session per subject per
+#     day, sizes in slot units, a break after each session), so the most
+#     urgent mix of sessions that fits is chosen, then laid out by priority
+#   * a wall-clock budget: days left when it runs out use the greedy filler
+#
+# Day capacity is min(daily_hours_max_min, total window length).
+
+from __future__ import annotations
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from tracing import annotate, traced
+
+DEFAULT_WINDOWS = ["17:00-23:00"]
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+BASE_PRIORITY = 0.01  # shortlisted subjects with no upcoming deadline still get time
+
+
+# ---------- inputs ----------
+def _hhmm(s: str) -> int:
+    h, m = str(s).strip().split(":")
+    return int(h) * 60 + int(m)
+
+
+def parse_windows(spec) -> list[tuple[int, int]]:
+    """["17:00-19:00", "20:00-23:00"] -> [(1020, 1140), (1200, 1380)] (minutes after midnight, merged, sorted)."""
+    out = []
+    for w in spec or []:
+        a, b = str(w).split("-")
+        lo, hi = _hhmm(a), _hhmm(b)
+        if hi > lo:
+            out.append((lo, hi))
+    out.sort()
+    merged: list[tuple[int, int]] = []
+    for lo, hi in out:
+        if merged and lo <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(hi, merged[-1][1]))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def availability(cfg: dict) -> list[list[tuple[int, int]]]:
+    """Windows for Monday..Sunday from cfg["availability"] ({default: [...], sat: [...], ...})."""
+    av = cfg.get("availability") or {}
+    default = av.get("default", DEFAULT_WINDOWS)
+    return [parse_windows(av.get(d, default)) for d in WEEKDAYS]
+
+
+def priorities(subjects: list[str], dl: pd.DataFrame | None, start: date, days: int) -> np.ndarray:
+    """(days, subjects) priority matrix: BASE + sum over deadlines on/after the day of weight*difficulty/(1+Δdays)."""
+    pr = np.full((days, len(subjects)), BASE_PRIORITY)
+    if dl is None or dl.empty or not subjects:
+        return pr
+    ix = {s: i for i, s in enumerate(subjects)}
+    subj = dl["subject"].astype(str).str.strip().str.lower().map(ix)
+    when = pd.to_datetime(dl["date"], errors="coerce")
+    ok = subj.notna() & when.notna()
+    if not ok.any():
+        return pr
+    s = subj[ok].to_numpy(int)
+    off = (when[ok].values.astype("datetime64[D]") - np.datetime64(start, "D")).astype(int)
+    w = pd.to_numeric(dl.get("weight", pd.Series(1.0, index=dl.index)), errors="coerce")[ok].fillna(1.0).to_numpy(float)
+    d = pd.to_numeric(dl.get("difficulty", pd.Series(3, index=dl.index)), errors="coerce")[ok].fillna(3).to_numpy(float)
+    keep = off >= 0
+    s, off, wd = s[keep], off[keep], (w * d)[keep]
+    if not len(s):
+        return pr
+    day = np.arange(days)[:, None]
+    delta = off[None, :] - day                                   # (days, deadlines)
+    contrib = np.where(delta >= 0, wd / (1.0 + np.maximum(delta, 0)), 0.0)
+    onehot = np.zeros((len(s), len(subjects)))
+    onehot[np.arange(len(s)), s] = 1.0
+    return pr + contrib @ onehot
+
+
+# ---------- solvers ----------
+def knapsack(sizes: list[int], values: list[float], cap: int) -> list[int]:
+    """0/1 knapsack by DP over capacity (vectorised per item); returns chosen indices."""
+    best = np.zeros(cap + 1)
+    take = np.zeros((len(sizes), cap + 1), dtype=bool)
+    for i, (sz, v) in enumerate(zip(sizes, values)):
+        if sz <= 0 or sz > cap:
+            continue
+        cand = np.full(cap + 1, -np.inf)
+        cand[sz:] = best[:cap + 1 - sz] + v
+        take[i] = cand > best
+        best = np.maximum(best, cand)
+    chosen, c = [], cap
+    for i in range(len(sizes) - 1, -1, -1):
+        if take[i, c]:
+            chosen.append(i)
+            c -= sizes[i]
+    return chosen[::-1]
+
+
+def greedy(sizes: list[int], values: list[float], cap: int) -> list[int]:
+    """Highest value first, skip what does not fit."""
+    chosen = []
+    for i in sorted(range(len(sizes)), key=lambda i: -values[i]):
+        if 0 < sizes[i] <= cap:
+            chosen.append(i)
+            cap -= sizes[i]
+    return chosen
+
+
+def fill_day(minutes: dict[str, int], prio: dict[str, float], windows, cap_min: int,
+             slot: int = 5, brk: int = 5, solver=knapsack) -> list[dict]:
+    """Sessions for one day: windows in time order, each packed by `solver`."""
+    left = min(cap_min, sum(hi - lo for lo, hi in windows))
+    todo = dict(minutes)
+    out = []
+    for lo, hi in windows:
+        if left <= 0 or not todo:
+            break
+        span = min(hi - lo, left)
+        names = list(todo)
+        # a session longer than the window (or what is left today) is shortened to fit
+        dur = [max(0, min(todo[s], span) // slot * slot) for s in names]
+        sizes = [-(-(d + brk) // slot) if d else 0 for d in dur]
+        pick = solver(sizes, [prio[s] for s in names], (span + brk) // slot)
+        t = lo
+        for i in sorted(pick, key=lambda i: -prio[names[i]]):
+            s, d = names[i], dur[i]
+            out.append({"subject": s, "start": t, "end": t + d, "minutes": d, "priority": prio[s]})
+            t += d + brk
+            left -= d
+            del todo[s]
+    return out
+
+
+@traced("act.schedule")
+def build_schedule(plan: list[dict], dl: pd.DataFrame | None, cfg: dict, start: date | None = None,
+                   days: int | None = None, budget_s: float | None = None,
+                   weights: dict[str, float] | None = None) -> tuple[pd.DataFrame, dict]:
+    """
+    Horizon schedule as a DataFrame (date, subject, start, end, minutes, priority)
+    plus run info {solver, days, sessions, minutes, elapsed_s}. `weights`
+    multiplies the priorities of the subjects it names.
+    """
+    t0 = time.perf_counter()
+    start = start or datetime.now(timezone.utc).date()  # UTC, like today/1 in planner_rules.pl
+    days = int(days or cfg.get("schedule_horizon_days", 7))
+    budget_s = float(budget_s if budget_s is not None else cfg.get("schedule_budget_s", 0.5))
+    slot = int(cfg.get("schedule_slot_min", 5))
+    brk = int(cfg.get("schedule_break_min", 5))
+    cap = int(cfg["daily_hours_max_min"])
+    solver = greedy if cfg.get("scheduler", "knapsack") == "greedy" else knapsack
+
+    minutes = {p["subject"]: int(p["minutes"]) for p in plan if p["decision"] == "shortlist" and p["minutes"] > 0}
+    subjects = list(minutes)
+    pr = priorities(subjects, dl, start, days)
+    if weights:
+        pr *= np.array([weights.get(s, 1.0) for s in subjects])
+    week = availability(cfg)
+
+    rows, used = [], solver.__name__
+    for k in range(days):
+        if solver is knapsack and time.perf_counter() - t0 > budget_s:
+            solver, used = greedy, "knapsack+greedy"
+        day = start + timedelta(days=k)
+        prio = {s: float(pr[k, i]) for i, s in enumerate(subjects)}
+        for r in fill_day(minutes, prio, week[day.weekday()], cap, slot, brk, solver):
+            rows.append({"date": day.strftime("%m/%d/%Y"), **r})
+
+    df = pd.DataFrame(rows, columns=["date", "subject", "start", "end", "minutes", "priority"])
+    df["start"] = [f"{m // 60:02d}:{m % 60:02d}" for m in df["start"]]
+    df["end"] = [f"{m // 60:02d}:{m % 60:02d}" for m in df["end"]]
+    df["priority"] = df["priority"].round(3)
+    info = {"solver": used, "days": days, "sessions": len(df), "minutes": int(df["minutes"].sum()),
+            "elapsed_s": round(time.perf_counter() - t0, 4)}
+    annotate(**{k: v for k, v in info.items() if k != "elapsed_s"})
+    return df, info
@@ -0,0 +1,267 @@
+# app/stage_dag.py — dependency-aware concurrent stage runner for ISA-Lite
+# Runs pipeline stages as child processes (python app/pipeline.py --stages X)
+# on one asyncio loop. A stage starts as soon as every stage it depends on
+# has finished, so independent work overlaps:
+#
+#   perceive -> reason -> act        learn        ml        dl
+#   ml, dl -> predict -> perceive
+#
+# Shared inputs are prepared once in this process before anything starts (the
+# event store sync and the ML/DL feature table), so concurrent children only
+# read them. Each stage has a timeout; a failed, timed-out or cancelled stage
+# skips its dependents but not unrelated stages. The result carries a timeline
+# (start/end per stage) and the critical path: wall time is the longest chain,
+# not the sum of the stages.
+#
+#   python app/stage_dag.py                        # PRAL + ML + DL + predict
+#   python app/stage_dag.py --stages perceive reason act learn --timeout act=5
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from run_planner import load_config
+import tracing
+
+ROOT = Path(__file__).resolve().parents[1]
+PIPELINE_PY = ROOT / "app" / "pipeline.py"
+
+DEPS = {
+    "ml": [],
+    "dl": [],
+    "predict": ["ml", "dl"],  # scores with the models the same run just trained (as pipeline.ALL_STAGES)
+    "perceive": ["predict"],
+    "reason": ["perceive"],
+    "act": ["reason"],
+    "learn": [],
+}
+DEFAULT_STAGES = ["predict", "perceive", "reason", "act", "learn", "ml", "dl"]
+DEFAULT_TIMEOUT_S = 600
+
+
+def graph(stages: list[str]) -> dict[str, list[str]]:
+    """DEPS restricted to `stages` (dependencies on stages not requested are dropped)."""
+    unknown = [s for s in stages if s not in DEPS]
+    if unknown:
+        raise SystemExit(f"[dag] Unknown stage(s): {unknown} (choose from {list(DEPS)})")
+    return {s: [d for d in DEPS[s] if d in stages] for s in stages}
+
+
+def prepare(stages: list[str], cfg: dict) -> None:
+    """Bring shared caches up to date so concurrent stages never write them."""
+    if cfg.get("event_store"):
+        from event_store import EVENTS_CSV, store_for
+        store_for(EVENTS_CSV).sync(EVENTS_CSV)
+    if {"ml", "dl", "predict"} & set(stages):
+        from features import load_features
+        load_features(cfg=cfg)
+
+
+def critical_path(timeline: dict[str, dict], deps: dict[str, list[str]]) -> list[str]:
+    """Chain that ended last: from the last stage to finish, back through its latest-finishing dependency."""
+    done = {s: t for s, t in timeline.items() if t.get("end_s") is not None}
+    if not done:
+        return []
+    path = [max(done, key=lambda s: done[s]["end_s"])]
+    while True:
+        prev = [d for d in deps.get(path[-1], []) if d in done]
+        if not prev:
+            return path[::-1]
+        path.append(max(prev, key=lambda s: done[s]["end_s"]))
+
+
+class StageDag:
+    """
+    One run of `stages`. cancel() (from any thread) stops it: running children
+    are terminated and stages not yet started are marked cancelled.
+    on_update(name, info) is called from the loop whenever a stage changes state.
+    """
+
+    def __init__(self, stages: list[str] | None = None, timeouts: dict[str, float] | None = None,
+                 backend: str | None = None, force: bool = False,
+                 on_update: Callable[[str, dict], None] | None = None):
+        self.cfg = load_config()
+        self.stages = [s for s in DEPS if s in (stages or DEFAULT_STAGES)]
+        self.deps = graph(self.stages)
+        default = float(self.cfg.get("dag_stage_timeout_s", DEFAULT_TIMEOUT_S))
+        self.timeouts = {s: float((timeouts or {}).get(s, default)) for s in self.stages}
+        self.backend, self.force, self.on_update = backend, force, on_update
+        self.timeline: dict[str, dict] = {s: {"status": "pending"} for s in self.stages}
+        self._cancel = threading.Event()
+        self._error: BaseException | None = None
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _set(self, name: str, **info) -> None:
+        self.timeline[name].update(info)
+        if self.on_update is not None and self._error is None:
+            try:
+                self.on_update(name, self.timeline[name])
+            except BaseException as e:  # e.g. the UI stopping this script: cancel, re-raise after cleanup
+                self._error = e
+                self.cancel()
+
+    def _cmd(self, name: str) -> list[str]:
+        cmd = [sys.executable, str(PIPELINE_PY), "--stages", name]
+        if self.backend:
+            cmd += ["--backend", self.backend]
+        if self.force:
+            cmd.append("--force")
+        return cmd
+
+    async def _run_stage(self, name: str, t0: float) -> bool:
+        if self._cancel.is_set():
+            self._set(name, status="cancelled")
+            return False
+        start = time.perf_counter() - t0
+        self._set(name, status="running", start_s=round(start, 4))
+        proc = await asyncio.create_subprocess_exec(
+            *self._cmd(name), cwd=str(ROOT), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"})
+        status = "ok"
+        try:
+            out, _ = await asyncio.wait_for(proc.communicate(), self.timeouts[name])
+            if proc.returncode != 0:
+                status = "failed"
+        except asyncio.TimeoutError:
+            status, out = "timeout", b""
+            await self._kill(proc)
+        except asyncio.CancelledError:
+            await self._kill(proc)
+            end = time.perf_counter() - t0
+            self._set(name, status="cancelled", end_s=round(end, 4), seconds=round(end - start, 4))
+            raise
+        end = time.perf_counter() - t0
+        tracing.count("dag_stage", stage=name, status=status)
+        self._set(name, status=status, end_s=round(end, 4), seconds=round(end - start, 4),
+                  returncode=proc.returncode, output=out.decode("utf-8", "replace").strip())
+        return status == "ok"
+
+    @staticmethod
+    async def _kill(proc) -> None:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+    async def _watch_cancel(self, tasks: dict[str, asyncio.Task]) -> None:
+        while not self._cancel.is_set():
+            await asyncio.sleep(0.05)
+        for t in tasks.values():
+            t.cancel()
+
+    async def _run(self) -> None:
+        t0 = time.perf_counter()
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def node(name: str) -> bool:
+            deps_ok = [await tasks[d] for d in self.deps[name]]
+            if not all(deps_ok):
+                failed = [d for d, ok in zip(self.deps[name], deps_ok) if not ok]
+                self._set(name, status="skipped", reason=f"{', '.join(failed)} did not finish")
+                return False
+            return await self._run_stage(name, t0)
+
+        for name in self.stages:  # DEPS order is topological
+            tasks[name] = asyncio.ensure_future(node(name))
+        watcher = asyncio.ensure_future(self._watch_cancel(tasks))
+        try:
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        finally:
+            watcher.cancel()
+            for name, t in tasks.items():
+                if t.cancelled() and self.timeline[name]["status"] in ("pending", "running"):
+                    self._set(name, status="cancelled")
+
+    def run(self) -> dict:
+        """
+        Run the DAG to completion (or cancellation). Returns {"stages": {name:
+        {status, start_s, end_s, seconds, output, ...}}, "wall_s", "sum_s",
+        "critical_path", "critical_s", "ok"}.
+        """
+        t0 = time.perf_counter()
+        with tracing.span("dag.prepare"):
+            prepare(self.stages, self.cfg)
+        prep_s = time.perf_counter() - t0
+        with tracing.span("dag", stages=",".join(self.stages)):
+            asyncio.run(self._run())
+        if self._error is not None:
+            raise self._error
+        wall = time.perf_counter() - t0
+        path = critical_path(self.timeline, self.deps)
+        return {
+            "stages": self.timeline,
+            "prepare_s": round(prep_s, 4),
+            "wall_s": round(wall, 4),
+            "sum_s": round(prep_s + sum(t.get("seconds", 0) for t in self.timeline.values()), 4),
+            "critical_path": path,
+            "critical_s": round(prep_s + sum(self.timeline[s].get("seconds", 0) for s in path), 4),
+            "ok": all(t["status"] == "ok" for t in self.timeline.values()),
+        }
+
+
+def run_dag(stages: list[str] | None = None, **kw) -> dict:
+    return StageDag(stages, **kw).run()
+
+
+def format_timeline(res: dict, width: int = 40) -> str:
+    """Text Gantt chart of a run; '*' marks the critical path."""
+    wall = max(res["wall_s"], 1e-9)
+    lines = [f"{'stage':<9} {'status':<9} {'start':>7} {'secs':>7}  timeline (0..{res['wall_s']:.2f}s)"]
+    off = res["prepare_s"]
+    lines.append(f"{'prepare':<9} {'ok':<9} {0:>7.2f} {off:>7.2f}  |{'#' * max(1, round(off / wall * width)):<{width}}|")
+    for name, t in res["stages"].items():
+        mark = "*" if name in res["critical_path"] else " "
+        if t.get("start_s") is None:
+            lines.append(f"{name:<9} {t['status']:<9} {'-':>7} {'-':>7}  |{' ' * width}|")
+            continue
+        a = round((off + t["start_s"]) / wall * width)
+        b = max(a + 1, round((off + t.get("end_s", t["start_s"])) / wall * width))
+        bar = (" " * a + ("#" if mark == "*" else "=") * (b - a)).ljust(width)[:width]
+        lines.append(f"{name:<9} {t['status']:<9} {off + t['start_s']:>7.2f} {t.get('seconds', 0):>7.2f}  |{bar}|{mark}")
+    lines.append(f"wall {res['wall_s']:.2f}s vs sum of stages {res['sum_s']:.2f}s; "
+                 f"critical path: {' -> '.join(['prepare'] + res['critical_path'])} ({res['critical_s']:.2f}s)")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="ISA-Lite concurrent stage runner")
+    ap.add_argument("--stages", nargs="+", choices=list(DEPS), default=None)
+    ap.add_argument("--backend", choices=["prolog", "native"], default=None)
+    ap.add_argument("--force", action="store_true", help="run every stage even if inputs are unchanged")
+    ap.add_argument("--timeout", nargs="+", default=[], metavar="STAGE=S", help="per-stage timeout in seconds")
+    ap.add_argument("--json", action="store_true", help="print the run as JSON")
+    ap.add_argument("--verbose", action="store_true", help="also print each stage's output")
+    args = ap.parse_args(argv)
+    try:
+        timeouts = {k: float(v) for k, v in (t.split("=", 1) for t in args.timeout)}
+    except ValueError:
+        raise SystemExit("[dag] --timeout expects STAGE=SECONDS")
+
+    dag = StageDag(args.stages, timeouts, args.backend, args.force,
+                   on_update=None if args.json else lambda n, t: print(f"[dag] {n}: {t['status']}", flush=True))
+    try:
+        res = dag.run()
+    except KeyboardInterrupt:
+        raise SystemExit("[dag] interrupted")
+    if args.json:
+        print(json.dumps(res, indent=2))
+    else:
+        if args.verbose:
+            for name, t in res["stages"].items():
+                if t.get("output"):
+                    print(f"----- {name} -----\n{t['output']}")
+        print(format_timeline(res))
+    if not res["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+# app/sweep.py — parallel hyper-parameter / model-selection sweep for the ML and DL models
+# Every trial is one configuration of one model, run on a process pool:
+#
+#   ml   logistic regression (C, class_weight) or histogram gradient boosting
+#        (learning_rate, max_leaf_nodes); score = mean log loss over stratified
+#        CV folds of ml_adherence's training split (its test rows stay unseen)
+#   dl   minutes MLP (embedding size, hidden layers, lr, weight decay); score =
+#        best validation MAE on 20% of dl_minutes_predictor's training split.
+#        Below MIN_VAL validation rows run_dl trains fixed epochs without
+#        early stopping, and a MAE over so few rows cannot rank trials either,
+#        so the DL sweep is skipped
+#
+# Bad trials stop early in two ways. Successive halving runs RUNGS rungs; each
+# rung keeps the best 1/ETA of the trials and gives the survivors ETA times
+# the budget (CV folds for ML; epochs for DL, resumed from a checkpoint).
+# Inside a DL trial, training stops once validation MAE has not improved for
+# --patience checks, and a trial whose loss diverges is pruned.
+# Each trial's seed is derived from its configuration, so a rerun reproduces
+# it whatever order the pool runs trials in. Workers are spawned with
+# OpenMP/BLAS and torch limited to --threads threads each, so workers x
+# threads stays within the CPU budget. --budget-s caps the wall time: trials
+# stop where they are and the best trial so far wins.
+#
+# Output: report/sweep_leaderboard.json / .csv (every trial, best first) and,
+# unless --no-promote, models/sweep/best.json. From then on run_ml / run_dl
+# train with the winning configuration. The default configuration is always
+# one of the trials, so the winner beat it at equal budget.
+#
+#   python app/sweep.py                                   # ML + DL, sweep_* from config.yaml
+#   python app/sweep.py --models dl --trials 18 --workers 4 --threads 2 --budget-s 28800
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from run_planner import load_config
+from tracing import annotate, count, span
+
+ROOT = Path(__file__).resolve().parents[1]
+SWEEP_DIR = ROOT / "models" / "sweep"
+BEST_JSON = SWEEP_DIR / "best.json"
+RUNS = SWEEP_DIR / "runs"
+LEADERBOARD = ROOT / "report" / "sweep_leaderboard.json"
+
+ETA = 3
+RUNGS = 3
+ML_FOLDS = 5
+THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+METRIC = {"ml": "log_loss", "dl": "val_mae_minutes"}
+
+# search spaces (the default configuration of each model is the first entry)
+ML_GRID = [{"model": "logistic", "C": 1.0, "class_weight": None}] + [
+    {"model": "logistic", "C": c, "class_weight": w}
+    for c in (0.01, 0.1, 1.0, 10.0, 100.0) for w in (None, "balanced") if (c, w) != (1.0, None)
+] + [
+    {"model": "hist_gb", "learning_rate": lr, "max_leaf_nodes": n}
+    for lr in (0.05, 0.1, 0.2) for n in (7, 15, 31)
+]
+DL_GRID = [{"emb": 4, "hidden": [32, 16], "lr": 1e-3, "weight_decay": 0.0}] + [
+    {"emb": e, "hidden": h, "lr": lr, "weight_decay": wd}
+    for e in (2, 4, 8) for h in ([16], [32, 16], [64, 32]) for lr in (3e-4, 1e-3, 3e-3) for wd in (0.0, 1e-4)
+    if (e, h, lr, wd) != (4, [32, 16], 1e-3, 0.0)
+]
+
+
+def _model_paths():
+    for sub in ("ml", "dl"):
+        p = str(ROOT / sub)
+        if p not in sys.path:
+            sys.path.append(p)
+
+
+def promoted(kind: str) -> dict | None:
+    """The promoted configuration for "ml" / "dl" ({"params", "seed", "score", ...}), or None."""
+    try:
+        best = json.loads(BEST_JSON.read_text(encoding="utf-8")).get(kind)
+    except (OSError, ValueError, AttributeError):
+        return None
+    return best if isinstance(best, dict) and "params" in best else None
+
+
+def trial_seed(kind: str, params: dict, seed: int = 0) -> int:
+    """Seed of a trial: a hash of its configuration (independent of scheduling order)."""
+    h = hashlib.sha256(json.dumps({"kind": kind, "params": params, "seed": seed}, sort_keys=True).encode())
+    return int(h.hexdigest()[:8], 16)
+
+
+def budgets(max_budget: int) -> list[int]:
+    """Per-rung budget: max_budget / ETA^(RUNGS-1), ..., max_budget (at least 1)."""
+    return [max(1, round(max_budget / ETA ** (RUNGS - 1 - r))) for r in range(RUNGS)]
+
+
+def make_trials(kinds, n: int | None, seed: int, max_epochs: int, folds: int) -> list[dict]:
+    """The default configuration plus up to n-1 others per model, sampled deterministically from the grid."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for kind in kinds:
+        grid = ML_GRID if kind == "ml" else DL_GRID
+        pick = list(range(len(grid))) if n is None or n >= len(grid) else \
+            [0] + sorted(rng.choice(np.arange(1, len(grid)), max(0, n - 1), replace=False).tolist())
+        top = folds if kind == "ml" else max_epochs
+        for i in pick:
+            out.append({"id": f"{kind}-{i:03d}", "kind": kind, "params": grid[i],
+                        "seed": trial_seed(kind, grid[i], seed), "budgets": budgets(top),
+                        "status": "running", "score": None, "rung": 0, "budget": 0, "seconds": 0.0})
+    return out
+
+
+# ---------- data (written once, memory-mapped by every worker) ----------
+def prepare(root: Path, kinds) -> dict:
+    """
+    Training splits as .npy files under root; returns {"ml_folds", "n_sub",
+    "rows", "skip"}, where skip maps each unusable model to the reason.
+    """
+    from features import load_features
+    df, _ = load_features()
+    info = {"rows": len(df), "skip": {}}
+    if "ml" in kinds:
+        from ml_adherence import feature_matrix, split
+        X, y = feature_matrix(df)
+        per_class = np.bincount(y, minlength=2)
+        if per_class.min() >= 3:
+            X_tr, _, y_tr, _ = split(X, y)
+            np.save(root / "ml_X.npy", X_tr)
+            np.save(root / "ml_y.npy", y_tr)
+            info["ml_folds"] = int(min(ML_FOLDS, np.bincount(y_tr, minlength=2).min()))
+        else:
+            info["skip"]["ml"] = "fewer than 3 rows of a label class in the feature table"
+    if "dl" in kinds:
+        from dl_minutes_predictor import FEATURES, MIN_VAL, holdout, split_indices
+        train_idx = split_indices(len(df))[0] if len(df) >= 6 else np.arange(0)
+        n_val = len(holdout(train_idx)[1]) if len(train_idx) else 0
+        if n_val >= MIN_VAL:
+            X = df[FEATURES].values.astype("float32")
+            y = df["est_min"].values.astype("float32").reshape(-1, 1)
+            np.save(root / "dl_X.npy", X[train_idx])
+            np.save(root / "dl_y.npy", y[train_idx])
+            info["n_sub"] = int(df["sub_ix"].max()) + 1
+        else:
+            info["skip"]["dl"] = f"{n_val} validation rows (< MIN_VAL={MIN_VAL}), no validation MAE to rank by"
+    return info
+
+
+# ---------- workers ----------
+_THREADS = 1
+
+
+def _init_worker(threads: int) -> None:
+    global _THREADS
+    _THREADS = threads
+    for v in THREAD_VARS:
+        os.environ[v] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+
+
+def _ml_trial(t: dict, budget: int, root: Path, deadline: float) -> dict:
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.metrics import log_loss
+    from sklearn.model_selection import StratifiedKFold
+    from ml_adherence import make_model
+
+    X, y = np.load(root / "ml_X.npy", mmap_mode="r"), np.load(root / "ml_y.npy", mmap_mode="r")
+    k = int(t["folds"])
+    folds = list(StratifiedKFold(k, shuffle=True, random_state=0).split(X, y))  # same folds for every trial
+    scores, status = list(t.get("fold_scores", [])), "running"
+    for f in range(len(scores), min(budget, k)):
+        if time.time() > deadline:
+            status = "budget"
+            break
+        tr, va = folds[f]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", ConvergenceWarning)
+            clf = make_model(t["params"], t["seed"]).fit(X[tr], y[tr])
+        scores.append(float(log_loss(y[va], clf.predict_proba(X[va])[:, 1], labels=[0, 1])))
+    score = float(np.mean(scores)) if scores else None
+    if score is not None and not math.isfinite(score):
+        status = "pruned"
+    return {"score": score, "budget": len(scores), "fold_scores": scores, "status": status}
+
+
+def _dl_trial(t: dict, budget: int, root: Path, deadline: float) -> dict:
+    from dl_minutes_predictor import holdout, make_trainer
+    from trainer import Rows, set_threads
+
+    set_threads(_THREADS)
+    X, y = np.load(root / "dl_X.npy", mmap_mode="r"), np.load(root / "dl_y.npy", mmap_mode="r")
+    fit_idx, val_idx = holdout(np.arange(len(X)))  # the rows were saved already shuffled
+    trainer = make_trainer(int(t["n_sub"]), t["params"], t["seed"], batch_size=t["batch_size"],
+                           patience=t["patience"], eval_every=t["eval_every"], checkpoint=root / f"{t['id']}.pt")
+    trainer.resume()  # promoted to a later rung: continue where the last one stopped
+    res = trainer.fit(Rows(X, y, fit_idx), Rows(X, y, val_idx), budget, deadline)
+    # "done" = rung budget used up (the trial may be promoted); "stopped": no improvement, so the
+    # score will not get better with more epochs
+    status = {"done": "running", "diverged": "pruned"}.get(res["status"], res["status"])
+    return {"score": res["val_mae"], "budget": res["epochs"], "best_epoch": res["best_epoch"], "status": status}
+
+
+def run_trial(t: dict, budget: int, root: str, deadline: float) -> dict:
+    """One rung of one trial (in a worker process); adds seconds to the result."""
+    t0 = time.perf_counter()
+    fn = _ml_trial if t["kind"] == "ml" else _dl_trial
+    res = fn(t, budget, Path(root), deadline)
+    res["seconds"] = round(t.get("seconds", 0.0) + time.perf_counter() - t0, 4)
+    return res
+
+
+@contextmanager
+def _thread_env(threads: int):
+    """Spawned workers inherit these before numpy / torch initialise their thread pools."""
+    old = {v: os.environ.get(v) for v in THREAD_VARS}
+    os.environ.update({v: str(threads) for v in THREAD_VARS})
+    try:
+        yield
+    finally:
+        for v, val in old.items():
+            if val is None:
+                os.environ.pop(v, None)
+            else:
+                os.environ[v] = val
+
+
+# ---------- driver ----------
+def _rank(t: dict) -> tuple:
+    return (-t["rung"], t["score"] if t["score"] is not None else math.inf)
+
+
+def _halve(trials: list[dict], rung: int) -> list[dict]:
+    """Survivors of a rung: the best 1/ETA of the scored trials (all of them after the last rung)."""
+    scored = sorted((t for t in trials if t["status"] in ("running", "stopped", "budget") and t["score"] is not None),
+                    key=lambda t: t["score"])
+    keep = scored if rung == RUNGS - 1 else scored[:max(1, math.ceil(len(scored) / ETA))]
+    for t in scored:
+        if t not in keep:
+            t["status"] = "halved"
+    for t in keep:
+        t["rung"] = rung
+    return keep
+
+
+def run_sweep(kinds=("ml", "dl"), trials: int | None = None, workers: int | None = None,
+              threads: int | None = None, budget_s: float | None = None, seed: int = 0,
+              max_epochs: int | None = None, patience: int = 5, promote: bool = True) -> dict:
+    """Run the sweep; returns the leaderboard dict (also written to report/)."""
+    cfg = load_config()
+    threads = threads or int(cfg.get("sweep_threads", 1)) or 1
+    workers = workers or int(cfg.get("sweep_workers", 0)) or max(1, (os.cpu_count() or 1) // threads)
+    budget_s = float(cfg.get("sweep_budget_s", 28800) if budget_s is None else budget_s)
+    t_start = time.time()
+    deadline = t_start + budget_s
+    _model_paths()
+
+    shutil.rmtree(RUNS, ignore_errors=True)
+    RUNS.mkdir(parents=True)
+    with span("sweep.prepare"):
+        info = prepare(RUNS, kinds)
+    from dl_minutes_predictor import BATCH, DEFAULT_PARAMS as DL_DEFAULT
+    max_epochs = max_epochs or int(DL_DEFAULT["epochs"])
+    usable = [k for k in kinds if (k == "ml" and "ml_folds" in info) or (k == "dl" and "n_sub" in info)]
+    for k in set(kinds) - set(usable):
+        print(f"[sweep] skipping {k}: {info['skip'][k]}")
+    todo = make_trials(usable, trials, seed, max_epochs, info.get("ml_folds", ML_FOLDS))
+    for t in todo:
+        t.update(folds=info.get("ml_folds"), n_sub=info.get("n_sub"), batch_size=int(cfg.get("dl_batch_size") or BATCH),
+                 eval_every=max(1, max_epochs // 30), patience=patience)
+
+    alive = {k: [t for t in todo if t["kind"] == k] for k in usable}
+    ctx = mp.get_context("spawn")  # fresh interpreters: no inherited thread pools or torch state
+    with _thread_env(threads), ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                                   initializer=_init_worker, initargs=(threads,)) as ex:
+        for rung in range(RUNGS):
+            batch = [t for k in usable for t in alive[k] if t["status"] == "running"]
+            if time.time() > deadline:
+                break
+            with span("sweep.rung", rung=rung, trials=len(batch)):
+                futs = {ex.submit(run_trial, t, t["budgets"][rung], str(RUNS), deadline): t for t in batch}
+                for f in as_completed(futs):
+                    t = futs[f]
+                    try:
+                        t.update(f.result())
+                    except Exception as e:  # a broken configuration never aborts the sweep
+                        t.update(status="error", error=f"{type(e).__name__}: {e}", score=None)
+            for k in usable:
+                alive[k] = _halve(alive[k], rung)
+    for t in todo:
+        if t["status"] == "running":
+            t["status"] = "complete"
+        count("sweep_trial", kind=t["kind"], status=t["status"])
+
+    best = {}
+    for k in usable:
+        ranked = sorted((t for t in alive[k] if t["score"] is not None), key=lambda t: t["score"])
+        if ranked:
+            w = ranked[0]
+            params = dict(w["params"])
+            if k == "dl":
+                params["epochs"] = int(w.get("best_epoch") or max_epochs)
+            best[k] = {"params": params, "seed": w["seed"], "score": round(w["score"], 6),
+                       "metric": METRIC[k], "trial": w["id"]}
+
+    board = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t_start)),
+        "elapsed_s": round(time.time() - t_start, 2), "budget_s": budget_s,
+        "workers": workers, "threads_per_worker": threads, "rows": info["rows"],
+        "eta": ETA, "rungs": RUNGS, "best": best, "promoted": False,
+        "trials": [{**{c: t.get(c) for c in ("id", "kind", "status", "rung", "budget", "best_epoch",
+                                             "seconds", "seed", "params", "error")},
+                    "score": None if t["score"] is None else round(t["score"], 6)}
+                   for t in sorted(todo, key=lambda t: (t["kind"], _rank(t)))],
+    }
+    if promote and best:
+        old = {}
+        try:
+            old = json.loads(BEST_JSON.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+        tmp = BEST_JSON.with_suffix(".tmp")
+        tmp.write_text(json.dumps({**old, **best}, indent=2), encoding="utf-8")
+        os.replace(tmp, BEST_JSON)
+        board["promoted"] = True
+        with span("sweep.promote"):
+            if "ml" in best:
+                from ml_adherence import run_ml
+                run_ml()
+            if "dl" in best:
+                from dl_minutes_predictor import run_dl
+                board["dl_artifact"] = run_dl()["artifact"]
+    shutil.rmtree(RUNS, ignore_errors=True)
+
+    LEADERBOARD.parent.mkdir(parents=True, exist_ok=True)
+    LEADERBOARD.write_text(json.dumps(board, indent=2), encoding="utf-8")
+    rows = pd.DataFrame(board["trials"])
+    rows["params"] = rows["params"].map(lambda p: json.dumps(p, sort_keys=True))
+    rows.to_csv(LEADERBOARD.with_suffix(".csv"), index=False)
+    annotate(trials=len(todo), workers=workers, threads=threads)
+    return board
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="ISA-Lite ML/DL hyper-parameter sweep")
+    ap.add_argument("--models", nargs="+", choices=["ml", "dl"], default=["ml", "dl"])
+    ap.add_argument("--trials", type=int, default=None, help="configurations per model (default: the whole grid)")
+    ap.add_argument("--workers", type=int, default=None, help="pool size (default: sweep_workers or CPUs / threads)")
+    ap.add_argument("--threads", type=int, default=None, help="threads per worker (default: sweep_threads)")
+    ap.add_argument("--budget-s", type=float, default=None, help="wall-clock budget (default: sweep_budget_s)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-epochs", type=int, default=None, help="DL budget of the last rung (default: 300)")
+    ap.add_argument("--patience", type=int, default=5, help="DL validation checks without improvement")
+    ap.add_argument("--no-promote", action="store_true", help="only write the leaderboard")
+    args = ap.parse_args(argv)
+
+    b = run_sweep(args.models, args.trials, args.workers, args.threads, args.budget_s, args.seed,
+                  args.max_epochs, args.patience, not args.no_promote)
+    print(f"[sweep] {len(b['trials'])} trials in {b['elapsed_s']}s "
+          f"({b['workers']} workers x {b['threads_per_worker']} threads), wrote report/sweep_leaderboard.json")
+    for kind in ("ml", "dl"):
+        top = [t for t in b["trials"] if t["kind"] == kind][:5]
+        for t in top:
+            score = "-" if t["score"] is None else f"{t['score']:.4f}"
+            print(f"  {t['id']:<8} {t['status']:<9} rung={t['rung']} budget={t['budget']:<4} "
+                  f"{METRIC[kind]}={score:<8} {json.dumps(t['params'])}")
+    for kind, w in b["best"].items():
+        print(f"[sweep] best {kind}: {w['trial']} ({w['metric']}={w['score']})"
+              + (" -> promoted to models/sweep/best.json" if b["promoted"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# app/tracing.py — spans, counters and on-demand profiling for ISA-Lite
+# Any module can wrap work in a span and bump counters:
+#
+#   with tracing.span("perceive.facts", rows=len(dl)):
+#       ...
+#   tracing.count("rows_processed", len(ev), stage="load_events")
+#
+# Spans nest (parent/child ids, one trace id per root span). export() appends
+# finished spans to report/trace.jsonl (rotated at TRACE_MAX_BYTES) and writes
+# report/metrics.prom in the Prometheus text format: span duration summaries
+# (isa_span_seconds_sum/_count) plus every counter (isa_<name>_total).
+# Spans are no-ops unless `tracing: true` in config.yaml (or enable()).
+#
+# Profiling: profile(name) runs the block under pyinstrument (if installed) or
+# cProfile when `name` is listed in ISA_PROFILE (comma separated, "all" for
+# every stage) or passed to set_profile(); output goes to report/profile_<name>.txt.
+
+from __future__ import annotations
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+REPORT = ROOT / "report"
+TRACE_JSONL = REPORT / "trace.jsonl"
+METRICS_PROM = REPORT / "metrics.prom"
+TRACE_MAX_BYTES = 5 << 20
+
+_enabled: bool | None = None
+_current = contextvars.ContextVar("isa_span", default=None)
+_finished: list[dict] = []
+_counters: dict[tuple, float] = {}
+_durations: dict[str, list] = {}   # span name -> [count, total seconds]
+_profile: set[str] = {s.strip() for s in os.environ.get("ISA_PROFILE", "").split(",") if s.strip()}
+
+
+def enabled() -> bool:
+    global _enabled
+    if _enabled is None:
+        try:
+            import yaml
+            _enabled = bool((yaml.safe_load(open(ROOT / "config.yaml")) or {}).get("tracing", False))
+        except OSError:
+            _enabled = False
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+# ---------- spans ----------
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a child of the current span; yields the span record (or None when disabled)."""
+    if not enabled():
+        yield None
+        return
+    parent = _current.get()
+    rec = {
+        "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex[:16],
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start": time.time(),
+        "attrs": dict(attrs),
+    }
+    token = _current.set(rec)
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    except BaseException as e:
+        rec["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        rec["duration_s"] = round(time.perf_counter() - t0, 6)
+        _current.reset(token)
+        _finished.append(rec)
+        agg = _durations.setdefault(name, [0, 0.0])
+        agg[0] += 1
+        agg[1] += rec["duration_s"]
+
+
+def annotate(**attrs) -> None:
+    """Add attributes to the innermost open span."""
+    rec = _current.get()
+    if rec is not None:
+        rec["attrs"].update(attrs)
+
+
+def traced(name: str):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kw):
+            with span(name):
+                return fn(*args, **kw)
+        return inner
+    return wrap
+
+
+# ---------- counters ----------
+def count(name: str, n: float = 1, **labels) -> None:
+    if not enabled():
+        return
+    key = (name, tuple(sorted(labels.items())))
+    _counters[key] = _counters.get(key, 0) + n
+
+
+def counters() -> dict[str, float]:
+    return {name + ("{" + ",".join(f"{k}={v}" for k, v in lab) + "}" if lab else ""): v
+            for (name, lab), v in sorted(_counters.items())}
+
+
+# ---------- export ----------
+def _prom_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    esc = (str(v).replace("\\", "\\\\").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, esc)) + "}"
+
+
+def prometheus_text() -> str:
+    lines = ["# HELP isa_span_seconds Wall time spent in each span.", "# TYPE isa_span_seconds summary"]
+    for name, (n, total) in sorted(_durations.items()):
+        lab = _prom_labels([("span", name)])
+        lines.append(f"isa_span_seconds_sum{lab} {total:.6f}")
+        lines.append(f"isa_span_seconds_count{lab} {n}")
+    seen = set()
+    for (name, lab), v in sorted(_counters.items()):
+        metric = f"isa_{name}_total"
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        lines.append(f"{metric}{_prom_labels(lab)} {v:g}")
+    return "\n".join(lines) + "\n"
+
+
+def export(trace_path: Path = TRACE_JSONL, prom_path: Path = METRICS_PROM) -> int:
+    """Append finished spans to the JSON-lines trace and rewrite the metrics file; returns spans written."""
+    if not enabled():
+        return 0
+    trace_path.parent.mkdir(parents=True, exist_ok=True)
+    if trace_path.exists() and trace_path.stat().st_size > TRACE_MAX_BYTES:
+        os.replace(trace_path, trace_path.with_name(trace_path.name + ".1"))
+    spans = list(_finished)
+    _finished.clear()
+    with open(trace_path, "a", encoding="utf-8") as f:
+        for rec in spans:
+            f.write(json.dumps(rec, default=str) + "\n")
+    tmp = prom_path.with_suffix(".tmp")
+    tmp.write_text(prometheus_text(), encoding="utf-8")
+    os.replace(tmp, prom_path)
+    return len(spans)
+
+
+def reset() -> None:
+    _finished.clear()
+    _counters.clear()
+    _durations.clear()
+
+
+# ---------- profiling ----------
+def set_profile(names) -> None:
+    _profile.clear()
+    _profile.update(names or [])
+
+
+@contextmanager
+def profile(name: str, out_dir: Path = REPORT):
+    """Profile the block if `name` (or "all") was requested; writes report/profile_<name>.txt."""
+    if name not in _profile and "all" not in _profile:
+        yield None
+        return
+    out = Path(out_dir) / f"profile_{name.replace('.', '_')}.txt"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+    if Profiler is not None:
+        prof = Profiler()
+        prof.start()
+        try:
+            yield out
+        finally:
+            prof.stop()
+            out.write_text(prof.output_text(unicode=True, color=False), encoding="utf-8")
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield out
+    finally:
+        prof.disable()
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(40)
+        out.write_text(buf.getvalue(), encoding="utf-8")
@@ -0,0 +1,189 @@
+# app/watch.py — reactive re-planner (file-watching daemon) for ISA-Lite
+# Watches data/events.csv, data/deadlines.csv and config.yaml with watchdog and
+# reruns only the stages a change needs:
+#
+#   events.csv     -> Predict → Perceive → Reason → Act → Learn
+#   deadlines.csv  -> Predict → Perceive → Reason → Act
+#   config.yaml    -> Perceive → Reason → Act, forced (a config key may only
+#                     matter to Act, e.g. availability, so facts can stay equal)
+#
+# Predict rescores the prediction table (both are its inputs), so the new
+# plan never falls back to unpredicted minutes.
+#
+# Bursts of writes (an editor saving twice, a bulk append) are coalesced: a run
+# starts once no watched file has changed for watch_debounce_s. A single worker
+# thread runs the in-process pipeline, so runs never overlap; changes arriving
+# during a run are collected and trigger one follow-up run. Each trigger's
+# latency (first write seen -> todays_plan.csv written) is printed and
+# appended to report/watch_log.jsonl next to reschedule_latency_target_s.
+#
+#   python app/watch.py                          # until Ctrl-C
+#   python app/watch.py --backend native --debounce 0.2
+
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+import pipeline
+from run_planner import ROOT, load_config
+from tracing import count
+
+CONFIG = ROOT / "config.yaml"
+EVENTS_CSV = ROOT / "data" / "events.csv"
+DEADLINES_CSV = ROOT / "data" / "deadlines.csv"
+WATCH_LOG = ROOT / "report" / "watch_log.jsonl"
+
+TRIGGERS = {
+    EVENTS_CSV.resolve(): ["predict", "perceive", "reason", "act", "learn"],
+    DEADLINES_CSV.resolve(): ["predict", "perceive", "reason", "act"],
+    CONFIG.resolve(): ["perceive", "reason", "act"],
+}
+IGNORED_EVENTS = {"opened", "closed_no_write", "deleted"}
+
+
+class Replanner:
+    """Debounced, serialised pipeline runs for file-change notifications."""
+
+    def __init__(self, backend: str | None = None, debounce_s: float = 0.25, target_s: float = 2.0,
+                 log_path: Path = WATCH_LOG):
+        self.backend = backend
+        self.debounce_s = debounce_s
+        self.target_s = target_s
+        self.log_path = log_path
+        self.pending: dict[Path, float] = {}   # path -> when its first change of this burst was seen
+        self.last_change = 0.0
+        self.cond = threading.Condition()
+        self.running = threading.Lock()        # held for the whole pipeline run
+        self.stopped = False
+        self.history: list[dict] = []
+
+    def notify(self, path) -> bool:
+        """Record a change to `path`; returns False if it is not a watched file."""
+        path = Path(path).resolve()
+        if path not in TRIGGERS:
+            return False
+        now = time.perf_counter()
+        with self.cond:
+            self.pending.setdefault(path, now)
+            self.last_change = now
+            self.cond.notify()
+        return True
+
+    def next_batch(self) -> dict[Path, float] | None:
+        """Block until a burst of changes has been quiet for debounce_s; None once stopped."""
+        with self.cond:
+            while not self.stopped:
+                if not self.pending:
+                    self.cond.wait()
+                    continue
+                wait = self.last_change + self.debounce_s - time.perf_counter()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+                batch, self.pending = self.pending, {}
+                return batch
+            return None
+
+    def run(self, batch: dict[Path, float]) -> dict:
+        stages = [s for s in pipeline.ALL_STAGES if any(s in TRIGGERS[p] for p in batch)]
+        force = CONFIG.resolve() in batch
+        first = min(batch.values())
+        with self.running:
+            t0 = time.perf_counter()
+            try:
+                res, err = pipeline.run_pral(stages, backend=self.backend, force=force), None
+            except (Exception, SystemExit) as e:  # keep watching after a bad edit
+                res, err = {}, f"{type(e).__name__}: {e}"
+            done = time.perf_counter()
+        rec = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "trigger": sorted(p.name for p in batch),
+            "stages": stages,
+            "ran": list(res.get("timings_s", {})),
+            "skipped": res.get("skipped", []),
+            "debounce_s": round(t0 - first, 4),
+            "pipeline_s": round(done - t0, 4),
+            "latency_s": round(done - first, 4),
+        }
+        rec["within_target"] = err is None and rec["latency_s"] <= self.target_s
+        if err:
+            rec["error"] = err
+        count("watch_triggers", result="error" if err else "ok" if rec["within_target"] else "over_target")
+        self.history.append(rec)
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+        print(f"[watch] {', '.join(rec['trigger'])} -> ran {','.join(rec['ran']) or 'nothing'} "
+              f"in {rec['pipeline_s']:.3f}s, latency {rec['latency_s']:.3f}s "
+              f"({'ok' if rec['within_target'] else 'OVER'} target {self.target_s}s)"
+              + (f" error: {err}" if err else ""), flush=True)
+        return rec
+
+    def loop(self) -> None:
+        while (batch := self.next_batch()) is not None:
+            self.run(batch)
+
+    def stop(self) -> None:
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+
+
+class _Handler(FileSystemEventHandler):
+    def __init__(self, replanner: Replanner):
+        self.replanner = replanner
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type in IGNORED_EVENTS:
+            return
+        # atomic saves show up as a move onto the watched name
+        for p in (event.src_path, getattr(event, "dest_path", "")):
+            if p:
+                self.replanner.notify(p)
+
+
+def start(replanner: Replanner) -> tuple[Observer, threading.Thread]:
+    """Start the observer and the worker thread; stop with replanner.stop() + observer.stop()."""
+    observer = Observer()
+    handler = _Handler(replanner)
+    for d in sorted({p.parent for p in TRIGGERS}):
+        observer.schedule(handler, str(d), recursive=False)
+    observer.start()
+    worker = threading.Thread(target=replanner.loop, name="isa-replanner", daemon=True)
+    worker.start()
+    return observer, worker
+
+
+def main(argv: list[str] | None = None):
+    cfg = load_config()
+    ap = argparse.ArgumentParser(description="ISA-Lite file-watching re-planner")
+    ap.add_argument("--backend", choices=["prolog", "native"], default=None)
+    ap.add_argument("--debounce", type=float, default=float(cfg.get("watch_debounce_s", 0.25)),
+                    help="seconds without further writes before a run starts")
+    args = ap.parse_args(argv)
+
+    target = float(cfg.get("reschedule_latency_target_s", 2))
+    rp = Replanner(args.backend, args.debounce, target)
+    res = pipeline.run_pral(pipeline.DEFAULT_STAGES, backend=args.backend)  # bring outputs up to date first
+    print(f"[watch] initial run {res['total_s']:.3f}s (skipped: {', '.join(res['skipped']) or 'none'})")
+    observer, worker = start(rp)
+    print(f"[watch] watching {', '.join(p.name for p in TRIGGERS)} (debounce {args.debounce}s); Ctrl-C to stop")
+    try:
+        while worker.is_alive():
+            worker.join(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        rp.stop()
+        observer.stop()
+        observer.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# bench/bench_batch.py — multi-student batch throughput (students/sec)
+# Builds N synthetic students from data/events.csv + data/deadlines.csv
+# (subjects and minutes jittered per student, a few deliberately broken),
+# then runs app/batch.py at several pool sizes.
+# Usage: python bench/bench_batch.py [students] [--backend native|prolog]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from batch import run_batch  # noqa: E402
+
+
+def synth_students(root: Path, n: int, broken: int = 2, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    ev = pd.read_csv(ROOT / "data" / "events.csv")
+    dl = pd.read_csv(ROOT / "data" / "deadlines.csv")
+    for i in range(n):
+        d = root / f"s{i:05d}"
+        d.mkdir(parents=True)
+        e = ev.sample(frac=1.0, replace=True, random_state=int(rng.integers(1 << 31)))
+        e["done_min"] = (e["done_min"] * rng.uniform(0.5, 1.2, len(e))).round().astype(int)
+        e["completed"] = (e["done_min"] >= e["est_min"] * 0.8).astype(int)
+        k = dl.copy()
+        k["difficulty"] = rng.integers(1, 6, len(k))
+        e.to_csv(d / "events.csv", index=False)
+        k.to_csv(d / "deadlines.csv", index=False)
+    for i in range(min(broken, n)):
+        (root / f"s{i:05d}" / "deadlines.csv").write_text("not,a,deadlines,file\n", encoding="utf-8")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("students", type=int, nargs="?", default=500)
+    ap.add_argument("--backend", choices=["prolog", "native"], default="native")
+    args = ap.parse_args()
+
+    cpus = os.cpu_count() or 1
+    sizes = sorted({w for w in (1, 2, 4) if w <= cpus} | {cpus})
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "in"
+        synth_students(src, args.students)
+        for w in sizes:
+            s = run_batch(src, Path(tmp) / f"out{w}", workers=w, backend=args.backend)
+            rows.append({"workers": w, "students": s["students"], "ok": s["ok"], "failed": s["failed"],
+                         "elapsed_s": s["elapsed_s"], "students_per_s": s["students_per_s"]})
+    base = rows[0]["students_per_s"] or 1
+    for r in rows:
+        r["speedup"] = round((r["students_per_s"] or 0) / base, 2)
+    print(json.dumps({"backend": args.backend, "runs": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# bench/bench_dl_inference.py — DL minutes predictor: artifact reuse and batch inference
+# Trains (or reuses) the model for the current data, then times artifact load
+# (state_dict vs TorchScript) and predict_minutes() over N random rows.
+# Usage: python bench/bench_dl_inference.py [rows]
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "dl"))
+
+from dl_minutes_predictor import MinutesPredictor, predict_minutes, run_dl  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    t0 = time.perf_counter()
+    first = run_dl(torchscript=True)
+    t1 = time.perf_counter()
+    again = run_dl(torchscript=True)
+    t2 = time.perf_counter()
+
+    loads = {}
+    for ts in (False, True):
+        t = time.perf_counter()
+        p = MinutesPredictor(torchscript=ts)
+        loads["torchscript" if ts else "state_dict"] = round(time.perf_counter() - t, 4)
+
+    rng = np.random.default_rng(0)
+    subs = list(p.subs) + ["unknown"]
+    rows = pd.DataFrame({
+        "subject": rng.choice(subs, n),
+        "difficulty": rng.integers(1, 6, n),
+        "days_to_deadline": rng.integers(0, 60, n),
+    })
+    predict_minutes(rows.head(10), p)  # warm-up
+    t = time.perf_counter()
+    out = predict_minutes(rows, p)
+    dt = time.perf_counter() - t
+    print(json.dumps({
+        "run_dl_first_s": round(t1 - t0, 3), "first_trained": first["trained"],
+        "run_dl_again_s": round(t2 - t1, 3), "again_trained": again["trained"],
+        "load_s": loads,
+        "rows": n, "predict_s": round(dt, 4), "us_per_row": round(1e6 * dt / n, 3),
+        "mean_pred_min": round(float(out.mean()), 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
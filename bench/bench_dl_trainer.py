@@ -0,0 +1,65 @@
+# bench/bench_dl_trainer.py — DL mini-batch trainer (dl/trainer.py): cost per event
+# For each size, writes seeded events / deadlines (bench/gen_data.py) to a temp
+# dir, builds the feature spool from the event store (dl_minutes_predictor.
+# spool_features) and trains the minutes MLP for a fixed number of epochs with
+# early stopping off. Reports spool time, seconds per epoch, seconds per epoch
+# per million events (flat = linear scaling), training samples/s and peak RSS.
+# Usage: python bench/bench_dl_trainer.py [events ...] [--epochs N] [--batch-size B] [--threads T]
+#        (default: 10000 100000 1000000, 2 epochs, batch 256, torch's default threads)
+
+import argparse
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "app"), str(ROOT / "dl"), str(ROOT / "bench")]
+
+from dl_minutes_predictor import SEED, holdout, make_trainer, spool_features, split_indices  # noqa: E402
+from gen_data import gen_deadlines, gen_events  # noqa: E402
+from trainer import BATCH, Rows, set_threads  # noqa: E402
+
+DAYS = 365
+SUBJECTS = 8
+
+
+def peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("events", nargs="*", type=int, default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--epochs", type=int, default=2)
+    ap.add_argument("--batch-size", type=int, default=BATCH)
+    ap.add_argument("--threads", type=int, default=0)
+    args = ap.parse_args(argv)
+    threads = set_threads(args.threads)
+
+    print(f"batch {args.batch_size}, {threads} torch thread(s), {args.epochs} epochs")
+    print(f"{'events':>9} {'spool s':>8} {'s/epoch':>8} {'s/ep/Mev':>9} {'samples/s':>10} {'val MAE':>8} {'peak MB':>8}")
+    for n in args.events:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            rows = gen_events(tmp / "events.csv", SUBJECTS, DAYS, n / DAYS, seed=0)
+            gen_deadlines(tmp / "deadlines.csv", SUBJECTS, DAYS, seed=0)
+            t0 = time.perf_counter()
+            X, y, subs, _ = spool_features(tmp / "events.csv", tmp / "deadlines.csv", tmp / "spool",
+                                           cfg={"event_store": True})
+            spool_s = time.perf_counter() - t0
+
+            fit_idx, val_idx = holdout(split_indices(len(X))[0])
+            trainer = make_trainer(len(subs), None, SEED, batch_size=args.batch_size, patience=np.inf)
+            res = trainer.fit(Rows(X, y, fit_idx), Rows(X, y, val_idx), args.epochs)
+            per_epoch = res["train_s"] / res["epochs"]
+            print(f"{rows:>9} {spool_s:>8.2f} {per_epoch:>8.3f} {per_epoch / (rows / 1e6):>9.2f} "
+                  f"{res['samples_per_s']:>10} {res['val_mae']:>8.2f} {peak_mb():>8.0f}")
+            del X, y, trainer
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# bench/bench_e2e.py — end-to-end stage benchmark at production sizes
+# For each size, generates seeded data (bench/gen_data.py) in a temp dir and
+# runs every stage on it in-process: load, perceive, reason, act, learn,
+# features, ml, dl. Each stage is timed and its peak Python/NumPy allocation
+# measured with tracemalloc (disable with --no-trace for clean timings). The
+# reschedule path (perceive + reason + act) is compared with
+# reschedule_latency_target_s, and the report is written to
+# report/bench_e2e.json together with the ratio to the previous report.
+#
+#   python bench/bench_e2e.py                                   # 1k, 100k, 1M events
+#   python bench/bench_e2e.py --sizes 1000 100000 1000000 10000000 --no-trace
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+REPORT = ROOT / "report" / "bench_e2e.json"
+sys.path[:0] = [str(ROOT / "app"), str(ROOT / "ml"), str(ROOT / "dl"), str(ROOT / "bench")]
+
+import features  # noqa: E402
+import metrics_stream  # noqa: E402
+import perceive  # noqa: E402
+import schedule_apply  # noqa: E402
+from event_store import load_events  # noqa: E402
+from gen_data import generate  # noqa: E402
+from reason_native import parse_facts, plan_from_facts  # noqa: E402
+
+RESCHEDULE = ("perceive", "reason", "act")
+DAYS = 365
+SUBJECTS = 8
+DL_MAX = 1_000_000  # DL trains at every default size; 10M runs skip it unless --dl-max is raised
+
+
+def run_size(n_events, cfg, tmp, trace=True, dl_max=DL_MAX, backend="native"):
+    d = Path(tmp) / f"n{n_events}"
+    t = time.perf_counter()
+    rows = generate(d, 1, SUBJECTS, DAYS, n_events / DAYS, per_subject=15, seed=n_events)
+    gen_s = time.perf_counter() - t
+    ev_csv, dl_csv = d / "events.csv", d / "deadlines.csv"
+    stages, ctx = {}, {}
+
+    def stage(name, fn):
+        if trace:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        try:
+            out = fn()
+            err = None
+        except Exception as e:  # keep benchmarking the other stages
+            out, err = None, f"{type(e).__name__}: {e}"
+        dt = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+        if trace:
+            tracemalloc.stop()
+        stages[name] = {"seconds": round(dt, 4), "peak_mb": round(peak / 2**20, 1) if peak is not None else None}
+        if err:
+            stages[name]["error"] = err
+        return out
+
+    def load():
+        ctx["ev"] = load_events(cfg=cfg, csv=ev_csv)
+        ctx["dl"] = pd.read_csv(dl_csv, parse_dates=["date"])
+
+    def reason():
+        if backend == "native":
+            return plan_from_facts(parse_facts(ctx["facts"]))
+        from prolog_server import PrologWorker
+        from run_planner import parse_plan
+        return parse_plan(PrologWorker().plan(d / "facts.pl")[0])
+
+    stage("load", load)
+    out = stage("perceive", lambda: perceive.perceive(ctx["dl"], ctx["ev"], cfg, facts_path=d / "facts.pl"))
+    ctx["facts"] = out["facts"] if out else ""
+    plan = stage("reason", reason) or []
+    stage("act", lambda: schedule_apply.act(plan, ctx["dl"], d / "todays_plan.csv", d / "horizon_plan.csv", cfg))
+    stage("learn", lambda: metrics_stream.resume(ev_csv, d / "learn_state.json")[0].snapshot())
+    stage("features", lambda: features.load_features(ev_csv, dl_csv, d / "features", cfg))
+    import ml_adherence
+    stage("ml", lambda: ml_adherence.run_ml(ctx["ev"], report_path=d / "ml.json"))
+    if rows <= dl_max:
+        import dl_minutes_predictor
+        stage("dl", lambda: dl_minutes_predictor.run_dl(ctx["ev"], ctx["dl"], retrain=True, torchscript=False,
+                                                       report_path=d / "dl.json", models=d / "models"))
+    else:
+        stages["dl"] = {"skipped": f"rows > --dl-max ({dl_max})"}
+
+    resched = sum(stages[s]["seconds"] for s in RESCHEDULE)
+    target = float(cfg.get("reschedule_latency_target_s", 2))
+    return {
+        "events": rows,
+        "generate_s": round(gen_s, 2),
+        "stages": stages,
+        "reschedule_s": round(resched, 4),
+        "within_target": resched <= target,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ISA-Lite end-to-end benchmark")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    ap.add_argument("--no-trace", action="store_true", help="skip tracemalloc (clean timings, no peak memory)")
+    ap.add_argument("--dl-max", type=int, default=DL_MAX,
+                    help="skip DL training above this many events (mini-batch training grows linearly: "
+                         "about 30 s at 1M, minutes at 10M)")
+    ap.add_argument("--backend", choices=["native", "prolog"], default="native")
+    args = ap.parse_args()
+
+    cfg = yaml.safe_load(open(ROOT / "config.yaml"))
+    try:
+        previous = json.loads(REPORT.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previous = {}
+    # only compare like with like: traced timings include tracemalloc overhead
+    same = previous.get("traced") == (not args.no_trace) and previous.get("backend") == args.backend
+    prev_runs = {r["events_target"]: r for r in previous.get("runs", [])} if same else {}
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            r = {"events_target": n, **run_size(n, cfg, tmp, not args.no_trace, args.dl_max, args.backend)}
+            old = prev_runs.get(n, {}).get("stages", {})
+            r["vs_previous"] = {s: round(v["seconds"] / old[s]["seconds"], 2)
+                                for s, v in r["stages"].items()
+                                if "seconds" in v and old.get(s, {}).get("seconds")}
+            runs.append(r)
+            print(f"[bench] {r['events']:>9} events: reschedule {r['reschedule_s']}s "
+                  f"({'ok' if r['within_target'] else 'OVER'} target) "
+                  + " ".join(f"{s}={v.get('seconds', '-')}" for s, v in r["stages"].items()))
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "latency_target_s": float(cfg.get("reschedule_latency_target_s", 2)),
+        "traced": not args.no_trace,
+        "backend": args.backend,
+        "event_store": bool(cfg.get("event_store")),
+        "runs": runs,
+    }
+    REPORT.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[bench] wrote {REPORT.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# bench/bench_event_store.py — raw events.csv scans vs the columnar event store
+# Writes a synthetic events CSV with N rows spread over ~3 years, imports it,
+# then times the 7-day window (Perceive/Learn) and a full load (ML/DL) both ways.
+# Usage: python bench/bench_event_store.py [rows]
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from event_store import EventStore  # noqa: E402
+
+
+def synth_events(path: Path, rows: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.integers(0, 3 * 365, rows))
+    est = rng.choice([30, 45, 60, 90], rows)
+    pd.DataFrame({
+        "date": (pd.Timestamp("2023-01-01") + pd.to_timedelta(days, unit="D")).strftime("%m/%d/%Y"),
+        "subject": rng.choice(["Math", "Physics", "Chemistry", "English", "Biology"], rows),
+        "est_min": est,
+        "done_min": (est * rng.uniform(0.2, 1.3, rows)).astype(int),
+        "reminders": rng.integers(0, 4, rows),
+        "completed": rng.integers(0, 2, rows),
+    }).to_csv(path, index=False)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, round(time.perf_counter() - t0, 4)
+
+
+def main(rows: int = 2_000_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = Path(tmp) / "events.csv"
+        synth_events(csv, rows)
+        store = EventStore(Path(tmp) / "store")
+        _, import_s = timed(lambda: store.import_csv(csv))
+
+        def csv_window():
+            ev = pd.read_csv(csv, parse_dates=["date"])
+            return ev[ev["date"] >= ev["date"].max() - pd.Timedelta(days=7)]
+
+        w_csv, csv_window_s = timed(csv_window)
+        w_store, store_window_s = timed(lambda: store.window(7))
+        _, csv_full_s = timed(lambda: pd.read_csv(csv, parse_dates=["date"]))
+        _, store_full_s = timed(store.query)
+
+    print(json.dumps({
+        "rows": rows,
+        "partitions": len(store.meta["partitions"]),
+        "import_s": import_s,
+        "window_7d": {"csv_s": csv_window_s, "store_s": store_window_s,
+                      "rows": len(w_store), "same_rows": len(w_csv) == len(w_store)},
+        "full_load": {"csv_s": csv_full_s, "store_s": store_full_s},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
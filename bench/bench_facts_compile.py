@@ -0,0 +1,90 @@
+# bench/bench_facts_compile.py — row-per-fact vs compact Perceive facts at scale
+# Replicates data/deadlines.csv up to N rows (default 100k), then times fact
+# generation, fact count and Reason latency for both fact layouts.
+# Usage: python bench/bench_facts_compile.py [rows]
+
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from perceive import derive_progress, to_prolog_facts  # noqa: E402
+from reason_native import parse_facts, plan_from_facts  # noqa: E402
+from run_planner import load_config, swipl_path  # noqa: E402
+
+
+def legacy_facts(dl, progress, cfg):
+    """The original one-fact-per-row generator (kept here for comparison)."""
+    facts = []
+    facts.append(f"hours_per_day({cfg['daily_hours_max_min']}).")
+    facts.append(f"exam_near_days({cfg['exam_near_days']}).")
+    for _, r in dl.iterrows():
+        s = r["subject"].strip().lower()
+        facts += [f"subject({s}).",
+                  f"difficulty({s},{int(r['difficulty'])})."]
+        y, m, d = r["date"].year, r["date"].month, r["date"].day
+        facts.append(f"deadline({s},{r['type']},date({y},{m},{d})).")
+    for s, p in progress.items():
+        facts.append(f"progress({s.lower()},completion_pct,{p:.2f}).")
+    return "\n".join(sorted(set(facts)))
+
+
+def scale_deadlines(dl: pd.DataFrame, rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    out = dl.sample(rows, replace=True, random_state=seed).reset_index(drop=True)
+    out["subject"] = out["subject"] + rng.integers(0, 40, rows).astype(str)  # ~120 subjects
+    out["date"] = out["date"] + pd.to_timedelta(rng.integers(-200, 400, rows), unit="D")
+    return out
+
+
+def prolog_latency(facts_text: str, cfg: dict) -> float | None:
+    if shutil.which(swipl_path(cfg)) is None:
+        return None
+    from prolog_server import PrologWorker
+    with tempfile.TemporaryDirectory() as tmp, PrologWorker(swipl_path(cfg)) as w:
+        path = Path(tmp) / "facts.pl"
+        path.write_text(facts_text + "\n", encoding="utf-8")
+        t0 = time.perf_counter()
+        w.load_facts(path, force=True)
+        w.query("main_json", timeout_s=600)
+        return round(time.perf_counter() - t0, 4)
+
+
+def main(rows: int = 100_000):
+    cfg = yaml.safe_load(open(ROOT / "config.yaml"))
+    dl = pd.read_csv(ROOT / "data" / "deadlines.csv", parse_dates=["date"])
+    ev = pd.read_csv(ROOT / "data" / "events.csv", parse_dates=["date"])
+    big = scale_deadlines(dl, rows)
+    prg = derive_progress(ev)
+
+    res = {"deadline_rows": rows}
+    plans = {}
+    for name, fn in [("legacy", legacy_facts), ("compact", to_prolog_facts)]:
+        t0 = time.perf_counter()
+        text = fn(big, prg, cfg)
+        gen = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        plans[name] = plan_from_facts(parse_facts(text))
+        native = time.perf_counter() - t0
+        res[name] = {
+            "facts": text.count("\n") + 1,
+            "bytes": len(text),
+            "generate_s": round(gen, 4),
+            "native_reason_s": round(native, 4),
+            "prolog_reason_s": prolog_latency(text, load_config()),
+        }
+    res["same_plan"] = plans["legacy"] == plans["compact"]
+    print(json.dumps(res, indent=2))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,103 @@
+# bench/bench_ingest.py — throughput of the bulk natural-language ingester
+# Writes a seeded JSONL file of study notes (deadlines, study events and noise
+# that must be rejected), ingests it into temporary copies of the CSVs with
+# llm/ingest_nl.py and reports lines/sec, next to the per-line parse_text()
+# loop on a sample of the same lines. Every template has the kind of row it
+# must produce, so the ingested counts are checked against the expected ones.
+#
+#   python bench/bench_ingest.py                      # 2M lines
+#   python bench/bench_ingest.py --lines 5000000 --chunk 500000
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "llm"), str(ROOT / "bench")]
+
+from gen_data import SUBJECTS  # noqa: E402
+from ingest_nl import CHUNK_LINES, ingest, load_vocabulary  # noqa: E402
+from parse_nl_to_task import parse_text  # noqa: E402
+
+# (kind, template); lines whose subject is not in deadlines.csv are rejected whatever the kind
+TEMPLATES = [
+    ("deadlines", "Add {s} {t} on {wd}; need {h} hr"),
+    ("deadlines", "{s} {t} {iso} difficulty {d} weight 0.{w}"),
+    ("deadlines", "{s} {t} in {n} days, {lvl}"),
+    ("events", "Studied {s} for {m} min {rel}, planned {h} hr, {r} reminders"),
+    ("events", "spent {h}.5 hours on {s} on {wd}"),
+    ("events", "did {m} minutes of {s} yesterday, completed"),
+    ("events", "Studied {s} for {h} hours for the {t}"),  # study notes naming a deadline type
+    ("events", "revised {s} {m} min before the {t} tomorrow"),
+    ("rejected", "remember to buy milk"),
+    ("rejected", "{s} thoughts about the {t}"),
+]
+
+
+def write_notes(path, n, subjects, known, seed=0, chunk=500_000):
+    """Write n JSONL notes; returns the expected {"deadlines", "events", "rejected"} counts."""
+    expected = dict.fromkeys(("deadlines", "events", "rejected"), 0)
+    rng = np.random.default_rng(seed)
+    wds = ["Mon", "Tuesday", "wed", "Thu", "Friday", "sat", "Sun"]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(0, n, chunk):
+            k = min(chunk, n - i)
+            tpl = rng.integers(0, len(TEMPLATES), k)
+            s = rng.integers(0, len(subjects), k)
+            ints = rng.integers(1, 10, (k, 5))
+            lines = []
+            for j in range(k):
+                a = ints[j]
+                kind, tmpl = TEMPLATES[tpl[j]]
+                expected[kind if subjects[s[j]].lower() in known else "rejected"] += 1
+                text = tmpl.format(
+                    s=subjects[s[j]], t=("exam", "quiz", "homework", "test")[a[0] % 4], wd=wds[a[1] % 7],
+                    h=a[2] % 3 + 1, iso=f"2026-{a[3]:02d}-{10 + a[4]:02d}", d=a[0] % 5 + 1, w=a[1],
+                    n=a[2], lvl=("easy", "medium", "hard")[a[3] % 3], m=15 * a[4], rel=("today", "yesterday")[a[0] % 2],
+                    r=a[1] % 4)
+                lines.append(json.dumps({"text": text}))
+            f.write("\n".join(lines) + "\n")
+    return expected
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ISA-Lite NL ingest benchmark")
+    ap.add_argument("--lines", type=int, default=2_000_000)
+    ap.add_argument("--chunk", type=int, default=CHUNK_LINES)
+    ap.add_argument("--legacy-sample", type=int, default=50_000, help="lines timed through parse_text()")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        notes, ev, dl = tmp / "notes.jsonl", tmp / "events.csv", tmp / "deadlines.csv"
+        shutil.copy(ROOT / "data" / "deadlines.csv", dl)  # vocabulary comes from here
+        ev.write_text("date,subject,est_min,done_min,reminders,completed\n", encoding="utf-8")
+        t = time.perf_counter()
+        known = {v.lower() for v in load_vocabulary(dl)}
+        expected = write_notes(notes, args.lines, sorted(set(SUBJECTS[:3]) | {"Computer"}), known)
+        print(f"[bench] wrote {args.lines} lines ({notes.stat().st_size / 2**20:.0f} MB) in {time.perf_counter() - t:.1f}s")
+
+        r = ingest(notes, ev, dl, chunk_lines=args.chunk, cfg={})
+        print(f"[bench] bulk ingest: {r['lines_per_s']} lines/s "
+              f"({r['deadlines']} deadlines, {r['events']} events, rejected {r['rejected']}, {r['seconds']}s total)")
+        got = {"deadlines": r["deadlines"], "events": r["events"], "rejected": sum(r["rejected"].values())}
+        if got != expected:
+            raise SystemExit(f"[bench] row counts {got} != expected {expected}")
+
+        with open(notes, encoding="utf-8") as f:
+            sample = [json.loads(next(f))["text"] for _ in range(min(args.legacy_sample, args.lines))]
+        t = time.perf_counter()
+        for s in sample:
+            parse_text(s)
+        legacy = len(sample) / (time.perf_counter() - t)
+        print(f"[bench] parse_text() loop (subject/type/date/minutes only, no validation or output): {legacy:,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
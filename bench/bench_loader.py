@@ -0,0 +1,74 @@
+# bench/bench_loader.py — typed loader (app/loader.py) vs the plain read_csv it replaced
+# For each size, writes seeded events (bench/gen_data.py gen_events) to a temp
+# dir, optionally corrupts a fraction of the dates, then reports load time and
+# in-memory size per million rows for
+#   * read_csv:  pd.read_csv(parse_dates=["date"]) (object subject, int64 columns)
+#   * loader:    loader.read_events (categorical subject, int16 minutes, bool flag,
+#                explicit date format, bulk rejection of malformed rows)
+# With corrupt rows read_csv silently falls back to an object date column; the
+# loader drops them into the rejection report instead.
+# Usage: python bench/bench_loader.py [rows ...] [--bad FRACTION]     (default: 100000 1000000)
+
+import argparse
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "app"), str(ROOT / "bench")]
+
+from gen_data import gen_events  # noqa: E402
+from loader import read_events  # noqa: E402
+
+DAYS = 3 * 365
+
+
+def corrupt(path: Path, frac: float, seed: int = 0) -> int:
+    """Replace the date of `frac` of the rows with text no format accepts."""
+    if frac <= 0:
+        return 0
+    df = pd.read_csv(path, dtype=str)
+    rows = np.random.default_rng(seed).random(len(df)) < frac
+    df.loc[rows, "date"] = "not a date"
+    df.to_csv(path, index=False)
+    return int(rows.sum())
+
+
+def best_of(fn, repeat: int = 3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("rows", nargs="*", type=int, default=[100_000, 1_000_000])
+    ap.add_argument("--bad", type=float, default=0.0, help="fraction of rows with a malformed date")
+    args = ap.parse_args(argv)
+
+    print(f"{'rows':>9} {'reader':<9} {'load s':>8} {'s/Mrow':>8} {'MB':>8} {'MB/Mrow':>8} {'rejected':>9}  date dtype")
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv = Path(tmp) / "events.csv"
+            rows = gen_events(csv, n_subjects=8, days=DAYS, events_per_day=n / DAYS, seed=0)
+            corrupt(csv, args.bad)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # read_csv's "could not infer format" on corrupt dates
+                base_s, base = best_of(lambda: pd.read_csv(csv, parse_dates=["date"]))
+            typed_s, typed = best_of(lambda: read_events(csv, rejects=Path(tmp) / "rejected.csv"))
+            mrow = rows / 1e6
+            for name, s, df, rej in (("read_csv", base_s, base, 0), ("loader", typed_s, typed, typed.attrs["rejected"])):
+                mb = df.memory_usage(deep=True).sum() / 2**20
+                print(f"{rows:>9} {name:<9} {s:>8.3f} {s / mrow:>8.3f} {mb:>8.1f} {mb / mrow:>8.1f} {rej:>9}  {df['date'].dtype}")
+
+
+if __name__ == "__main__":
+    main()
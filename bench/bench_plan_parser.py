@@ -0,0 +1,58 @@
+# bench/bench_plan_parser.py — plan parsing throughput: legacy splitter vs main/0 vs main_json/0
+# Builds plans of N entries (plain subject atoms, so the legacy "],[" splitter
+# can still read them), renders them the way main/0 (writeq) and main_json/0
+# print them, and times run_planner.parse_plan on both next to the old parser.
+#
+# Usage: python bench/bench_plan_parser.py [entries ...]     (default: 100000 1000000)
+
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from perceive import pl_atom  # noqa: E402
+from run_planner import parse_plan  # noqa: E402
+
+DECISIONS = ["shortlist", "reject", "needs_info"]
+
+
+def legacy_parse(raw: str) -> list[dict]:
+    """parse_plan() before main_json/0: split on "],[" then on "," (breaks on quoted commas)."""
+    inner = raw.strip()[2:-2]
+    plan = []
+    for it in (inner.split("],[") if inner else []):
+        subject, decision, minutes = [p.strip() for p in it.split(",")]
+        plan.append({"subject": subject.strip("'\""), "decision": decision.strip("'\""),
+                     "minutes": int(float(minutes))})
+    return plan
+
+
+def best_of(fn, text, repeat=3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn(text)
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+def main(sizes):
+    for n in sizes:
+        plan = [{"subject": f"subject_{i}", "decision": DECISIONS[i % 3], "minutes": i % 121} for i in range(n)]
+        as_main = "[" + ",".join(f"[{pl_atom(p['subject'])},{p['decision']},{p['minutes']}]" for p in plan) + "]"
+        as_json = json.dumps([dict(sorted(p.items())) for p in plan], separators=(",", ":"))
+        rows = {}
+        for label, fn, text in (("legacy split", legacy_parse, as_main),
+                                ("main/0 term reader", parse_plan, as_main),
+                                ("main_json/0", parse_plan, as_json)):
+            secs, out = best_of(fn, text)
+            assert out == plan, label
+            rows[label] = {"ms": round(secs * 1000, 1), "entries_per_s": round(n / secs)}
+        print(f"[bench] {n} entries: " + json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100_000, 1_000_000])
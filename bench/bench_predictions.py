@@ -0,0 +1,78 @@
+# bench/bench_predictions.py — planning cost with the precomputed prediction table
+# For growing subject counts: writes a synthetic table (cache layout of
+# app/predictions.py) to a temp dir, then times
+#   * lookups: PredictionTable.get for every subject (what Act does)
+#   * reason:  native plan over facts with predicted_minutes/2 for every subject
+#   * model:   one MinutesPredictor.predict call per subject (what the table
+#              replaces), on a sample, when a trained DL artifact exists
+# Per-subject cost should stay flat as subjects grow.
+# Usage: python bench/bench_predictions.py [subjects ...]     (default: 1000 10000 100000)
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "app"), str(ROOT / "dl")]
+
+from predictions import COLUMNS, TABLE_VERSION, PredictionTable, write_table  # noqa: E402
+from reason_native import parse_facts, plan_from_facts, utc_today  # noqa: E402
+
+
+def synth(root: Path, n: int, seed: int = 0) -> list[str]:
+    rng = np.random.default_rng(seed)
+    subs = [f"subject_{i}" for i in range(n)]
+    rows = np.column_stack([rng.uniform(20, 150, n), rng.uniform(0, 1, n), rng.integers(0, 61, n)]).astype("float32")
+    write_table(root, rows, {"version": TABLE_VERSION, "key": "bench", "columns": COLUMNS, "subjects": subs})
+    return subs
+
+
+def facts_for(subs, table: PredictionTable) -> str:
+    today = utc_today()
+    out = ["hours_per_day(360).", "exam_near_days(3)."]
+    for i, s in enumerate(subs):
+        out += [f"subject({s}).", f"difficulty({s},{i % 5 + 1}).",
+                f"deadline({s},exam,date({today.year},{today.month},{today.day})).",
+                f"predicted_minutes({s},{int(round(table.get(s)))})."]
+    return "\n".join(out)
+
+
+def main(sizes):
+    predictor = None
+    try:
+        from dl_minutes_predictor import MinutesPredictor
+        predictor = MinutesPredictor()
+    except SystemExit:
+        pass
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            subs = synth(Path(tmp), n)
+            t = time.perf_counter()
+            table = PredictionTable(tmp)
+            open_s = time.perf_counter() - t
+            t = time.perf_counter()
+            weights = {s: 2.0 - table.get(s, "p_complete", 1.0) for s in subs}
+            lookup_s = time.perf_counter() - t
+            facts = parse_facts(facts_for(subs, table))
+            t = time.perf_counter()
+            plan = plan_from_facts(facts)
+            reason_s = time.perf_counter() - t
+            assert len(plan) == len(weights) == n
+            row = {"subjects": n, "open_ms": round(open_s * 1e3, 2),
+                   "lookup_us_per_subject": round(lookup_s / n * 1e6, 3),
+                   "reason_us_per_subject": round(reason_s / n * 1e6, 3)}
+            if predictor is not None:
+                k = min(n, 200)
+                t = time.perf_counter()
+                for s in subs[:k]:
+                    predictor.predict([s], [3], [7])
+                row["model_call_us_per_subject"] = round((time.perf_counter() - t) / k * 1e6, 1)
+            print(f"[bench] {json.dumps(row)}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000])
@@ -0,0 +1,62 @@
+# bench/bench_prolog_server.py — cold swipl spawn vs warm worker query latency
+# Usage: python bench/bench_prolog_server.py [runs]
+
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from run_planner import run_prolog, load_config, swipl_path, FACTS_PL  # noqa: E402
+from prolog_server import PrologWorker  # noqa: E402
+
+
+def summarize(samples: list[float]) -> dict:
+    s = sorted(samples)
+    return {
+        "runs": len(s),
+        "mean_s": round(statistics.mean(s), 4),
+        "p50_s": round(s[len(s) // 2], 4),
+        "p95_s": round(s[min(len(s) - 1, int(0.95 * len(s)))], 4),
+    }
+
+
+def main(runs: int = 20):
+    cfg = load_config()
+    cold = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        run_prolog(timeout_s=30)
+        cold.append(time.perf_counter() - t0)
+
+    with PrologWorker(swipl_path(cfg)) as w:
+        t0 = time.perf_counter()
+        w.plan(FACTS_PL)  # first call loads the facts
+        first = time.perf_counter() - t0
+        warm, swap = [], []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            w.plan(FACTS_PL)
+            warm.append(time.perf_counter() - t0)
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            w.load_facts(FACTS_PL, force=True)
+            w.query("main_json")
+            swap.append(time.perf_counter() - t0)
+
+    res = {
+        "cold_spawn": summarize(cold),
+        "warm_first_call_s": round(first, 4),
+        "warm_query": summarize(warm),
+        "warm_query_with_fact_reload": summarize(swap),
+        "target_s": cfg.get("reschedule_latency_target_s"),
+    }
+    res["speedup_p50"] = round(res["cold_spawn"]["p50_s"] / max(res["warm_query"]["p50_s"], 1e-9), 1)
+    print(json.dumps(res, indent=2))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,61 @@
+# bench/bench_scheduler.py — Act-stage scheduler scaling
+# Random plans (subjects × session minutes) and a semester of deadlines
+# (weight/difficulty), scheduled over growing horizons with the knapsack and
+# greedy solvers. Reports wall time against reschedule_latency_target_s and the
+# total scheduled priority (sum of priority over sessions) of each solver.
+# Usage: python bench/bench_scheduler.py
+
+import json
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from scheduler import build_schedule  # noqa: E402
+
+
+def synth(n_subjects: int, deadlines_per_subject: int, start: date, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    subs = [f"subject{i:02d}" for i in range(n_subjects)]
+    plan = [{"subject": s, "decision": "shortlist", "minutes": int(rng.choice([60, 75, 90, 120]))} for s in subs]
+    n = n_subjects * deadlines_per_subject
+    dl = pd.DataFrame({
+        "subject": np.repeat(subs, deadlines_per_subject),
+        "type": rng.choice(["exam", "quiz", "assignment"], n),
+        "date": [start + timedelta(days=int(d)) for d in rng.integers(0, 120, n)],
+        "weight": rng.uniform(0.1, 1.0, n).round(2),
+        "difficulty": rng.integers(1, 6, n),
+    })
+    dl["date"] = pd.to_datetime(dl["date"])
+    return plan, dl
+
+
+def main():
+    cfg = yaml.safe_load(open(ROOT / "config.yaml"))
+    target = float(cfg.get("reschedule_latency_target_s", 2))
+    start = date.today()
+    rows = []
+    for n_sub in (10, 30, 60):
+        plan, dl = synth(n_sub, 8, start)
+        for days in (7, 30, 120):
+            for solver in ("knapsack", "greedy"):
+                c = {**cfg, "scheduler": solver, "schedule_budget_s": target}
+                t0 = time.perf_counter()
+                df, info = build_schedule(plan, dl, c, start=start, days=days)
+                dt = time.perf_counter() - t0
+                rows.append({"subjects": n_sub, "deadlines": len(dl), "days": days, "solver": info["solver"],
+                             "sessions": info["sessions"], "minutes": info["minutes"],
+                             "priority": round(float(df["priority"].sum()), 2),
+                             "seconds": round(dt, 4), "within_target": dt <= target})
+    print(json.dumps({"latency_target_s": target, "runs": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
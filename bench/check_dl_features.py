@@ -0,0 +1,77 @@
+# bench/check_dl_features.py — the DL feature join keeps one row per event
+# Checks build_features() on the bundled data and on synthetic data of growing
+# size: row count == number of events, rows stay in events.csv order, and each
+# row's days_to_deadline comes from its subject's first deadline on/after the
+# event date (brute force on a sample). Also prints build time / rows to show
+# it is linear.
+# Usage: python bench/check_dl_features.py
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "dl"))
+
+from dl_minutes_predictor import build_features  # noqa: E402
+
+
+def synth(n_events: int, n_deadlines: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    subs = ["Math", "Physics", "Chemistry", "English", "Biology"]
+    t0 = pd.Timestamp("2025-01-01")
+    ev = pd.DataFrame({
+        "date": t0 + pd.to_timedelta(rng.integers(0, 365, n_events), unit="D"),
+        "subject": rng.choice(subs, n_events),
+        "est_min": rng.choice([30, 45, 60, 90], n_events),
+        "done_min": rng.integers(0, 90, n_events),
+        "reminders": rng.integers(0, 4, n_events),
+        "completed": rng.integers(0, 2, n_events),
+    })
+    ev.loc[rng.random(n_events) < 0.01, "date"] = pd.NaT
+    dl = pd.DataFrame({
+        "subject": rng.choice(subs, n_deadlines),
+        "type": rng.choice(["exam", "quiz"], n_deadlines),
+        "date": t0 + pd.to_timedelta(rng.integers(0, 400, n_deadlines), unit="D"),
+        "weight": 0.5,
+        "difficulty": rng.integers(1, 6, n_deadlines),
+    })
+    return ev, dl
+
+
+def check(ev, dl, sample=200):
+    df, _ = build_features(ev, dl)
+    assert len(df) == len(ev), f"row count {len(df)} != events {len(ev)}"
+    assert (df["subject"].to_numpy() == ev["subject"].to_numpy()).all(), "row order changed"
+    rng = np.random.default_rng(1)
+    for i in rng.choice(len(ev), min(sample, len(ev)), replace=False):
+        e = ev.iloc[i]
+        got = df["days_to_deadline"].iloc[i]
+        if pd.isna(e["date"]):
+            assert got == 14, (i, got)
+            continue
+        cand = dl[(dl["subject"].str.lower() == str(e["subject"]).lower()) & (dl["date"] >= e["date"])]
+        want = min(60, (cand["date"].min() - e["date"]).days) if len(cand) else 14
+        assert want == got, (i, want, got)
+    return df
+
+
+def main():
+    ev = pd.read_csv(ROOT / "data" / "events.csv", parse_dates=["date"])
+    dl = pd.read_csv(ROOT / "data" / "deadlines.csv", parse_dates=["date"])
+    check(ev, dl)
+    print(f"[check] bundled data: {len(ev)} events -> {len(ev)} feature rows ({len(dl)} deadlines)")
+    for n in (10_000, 100_000, 1_000_000):
+        ev, dl = synth(n, 2_000)
+        t = time.perf_counter()
+        check(ev, dl, sample=50)
+        dt = time.perf_counter() - t
+        print(f"[check] {n:>9} events x 2000 deadlines -> {n} rows, {dt:.2f}s ({1e6 * dt / n:.2f} us/event)")
+    print("[check] ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# bench/check_plan_parser.py — fuzz check: odd subject names through facts and plans
+# Random subject names (spaces, commas, brackets, both quote kinds,
+# backslashes, control characters, unicode, JSON keywords) go through:
+#
+#   facts:   perceive.to_prolog_facts -> reason_native.parse_facts/plan_from_facts
+#            (every subject comes back with its exact name)
+#   plans:   main/0 text (writeq quoting, with non-ASCII-initial atoms both
+#            quoted and bare, as SWI prints them) and main_json/0 text -> run_planner.parse_plan
+#            (identical to the plan that was written)
+#   swipl:   if SWI-Prolog is installed, the same facts through the real rules
+#            (main and main_json) must give the native plan
+#
+# Usage: python bench/check_plan_parser.py [cases] [seed]
+
+import json
+import random
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from perceive import pl_atom, to_prolog_facts  # noqa: E402
+from reason_native import parse_facts, plan_from_facts, utc_today  # noqa: E402
+from run_planner import load_config, parse_plan, swipl_path  # noqa: E402
+
+ALPHABET = list("abcxyz019 ,[]()'\"\\.%|{}:;-_") + ["\n", "\t", "\r", "\x01", "é", "日", "ß", " ", "🙂"]
+SPECIAL = ["true", "false", "null", "[]", "'", "''", "a,b", "[a,b]", "x],[y", "it's", "\\", "end_of_file", "0", "1.5",
+           "élan", "ßeta_2", "日本"]
+DECISIONS = ["shortlist", "reject", "needs_info"]
+
+
+def odd_name(rng: random.Random) -> str:
+    if rng.random() < 0.2:
+        return rng.choice(SPECIAL)
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 12)))
+
+
+def writeq_atom(s: str) -> str:
+    """pl_atom, except that SWI writeq/1 leaves atoms like élan (non-ASCII lowercase or caseless first letter) bare."""
+    if s and not s[0].isascii() and s[0].isalpha() and not s[0].isupper() and all(c.isalnum() or c == "_" for c in s):
+        return s
+    return pl_atom(s)
+
+
+def as_main(plan, atom=pl_atom) -> str:
+    """What main/0 prints: writeq of [[S,D,M],...]."""
+    return "[" + ",".join(f"[{atom(p['subject'])},{atom(p['decision'])},{p['minutes']}]" for p in plan) + "]"
+
+
+def as_main_json(plan, ascii_only) -> str:
+    """What main_json/0 prints (SWI dicts are key-ordered)."""
+    return json.dumps([dict(sorted(p.items())) for p in plan], ensure_ascii=ascii_only)
+
+
+def random_case(rng: random.Random):
+    today = utc_today()
+    names = list(dict.fromkeys(odd_name(rng).strip().lower() for _ in range(rng.randint(1, 8))))
+    names = [n for n in names if n and n != "nan"] or ["math"]
+    rows = []
+    for s in names:
+        for _ in range(rng.randint(0, 3)):
+            rows.append({"subject": s, "type": rng.choice(["exam", "quiz", "odd type"]),
+                         "date": pd.Timestamp(today + timedelta(days=rng.randint(-5, 20))),
+                         "weight": 1.0, "difficulty": rng.randint(1, 5)})
+        if not rows or rows[-1]["subject"] != s:
+            rows.append({"subject": s, "type": "quiz", "date": pd.NaT, "weight": 1.0, "difficulty": 3})
+    dl = pd.DataFrame(rows)
+    progress = {s: rng.random() for s in names if rng.random() < 0.6}
+    cfg = {"daily_hours_max_min": rng.choice([60, 240, 360]), "exam_near_days": rng.randint(0, 7)}
+    return names, to_prolog_facts(dl, progress, cfg)
+
+
+def main(cases: int = 500, seed: int = 11):
+    rng = random.Random(seed)
+    failures = []
+    worker = None
+    try:
+        from prolog_server import PrologWorker
+        worker = PrologWorker(swipl_path(load_config())).start()
+    except (Exception, SystemExit):
+        worker = None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            facts_path = Path(tmp) / "facts.pl"
+            for case in range(cases):
+                names, facts = random_case(rng)
+                problems = []
+                plan = plan_from_facts(parse_facts(facts))
+                if sorted(p["subject"] for p in plan) != sorted(names):
+                    problems.append("facts round trip")
+                fuzzed = [{"subject": odd_name(rng), "decision": rng.choice(DECISIONS),
+                           "minutes": rng.randint(0, 120)} for _ in range(rng.randint(0, 6))] + plan
+                for label, text in (("main", as_main(fuzzed)), ("main writeq", as_main(fuzzed, writeq_atom)),
+                                    ("main_json", as_main_json(fuzzed, False)),
+                                    ("main_json ascii", as_main_json(fuzzed, True))):
+                    try:
+                        ok = parse_plan(text) == fuzzed
+                    except SystemExit:
+                        ok = False
+                    if not ok:
+                        problems.append(label)
+                if worker is not None:
+                    facts_path.write_text(facts + "\n", encoding="utf-8")
+                    worker.load_facts(facts_path, force=True)
+                    for goal in ("main", "main_json"):
+                        if parse_plan(worker.query(goal)) != plan:
+                            problems.append(f"swipl {goal}")
+                if problems:
+                    failures.append({"case": case, "subjects": names, "problems": problems})
+    finally:
+        if worker is not None:
+            worker.stop()
+
+    print(json.dumps({"cases": cases, "seed": seed, "swipl": worker is not None,
+                      "failures": len(failures)}, indent=2))
+    for f in failures[:5]:
+        print(json.dumps(f, ensure_ascii=False))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,68 @@
+# bench/diff_reason_backends.py — differential check: Prolog rules vs NumPy backend
+# Generates randomized fact sets (dates relative to today, UTC), plans each one
+# with both backends and reports any subject whose decision/minutes differ.
+# Usage: python bench/diff_reason_backends.py [cases] [seed]
+
+import json
+import random
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "app"))
+
+from run_planner import parse_plan, load_config, swipl_path  # noqa: E402
+from prolog_server import PrologWorker  # noqa: E402
+from reason_native import parse_facts, plan_from_facts, utc_today  # noqa: E402
+
+
+def random_facts(rng: random.Random) -> str:
+    today = utc_today()
+    names = rng.sample(["math", "physics", "chemistry", "english", "biology",
+                        "history", "art", "cs", "economics", "music"], rng.randint(1, 8))
+    facts = []
+    if rng.random() > 0.05:  # occasionally omit: allocate/2 must fail the same way
+        facts.append(f"hours_per_day({rng.choice([0, 30, 59, 60, 100, 119, 120, 240, 241, 360, 600])}).")
+    if rng.random() > 0.05:
+        facts.append(f"exam_near_days({rng.randint(0, 7)}).")
+    for s in names:
+        facts.append(f"subject({s}).")
+        for _ in range(rng.randint(0, 5)):
+            dt = today + timedelta(days=rng.randint(-10, 20))
+            facts.append(f"deadline({s},{rng.choice(['exam', 'quiz'])},date({dt.year},{dt.month},{dt.day})).")
+        for d in rng.sample(range(1, 6), rng.randint(0, 3)):
+            facts.append(f"difficulty({s},{d}).")
+        if rng.random() < 0.7:
+            facts.append(f"progress({s},completion_pct,{rng.choice([0.0, 0.69, 0.7, 0.71, rng.random()]):.2f}).")
+        for _ in range(rng.choice([0, 0, 1, 1, 2])):  # two facts: the first one must win
+            facts.append(f"predicted_minutes({s},{rng.choice([0, 15, 24, 40, 60, 95, rng.randint(1, 180)])}).")
+    rng.shuffle(facts)
+    return "\n".join(facts) + "\n"
+
+
+def main(cases: int = 200, seed: int = 7):
+    rng = random.Random(seed)
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmp, PrologWorker(swipl_path(load_config())) as w:
+        facts_path = Path(tmp) / "facts.pl"
+        for case in range(cases):
+            text = random_facts(rng)
+            facts_path.write_text(text, encoding="utf-8")
+            w.load_facts(facts_path, force=True)
+            pl = parse_plan(w.query("main_json"))
+            py = plan_from_facts(parse_facts(text))
+            if pl != py:
+                mismatches.append({"case": case, "facts": text.splitlines(), "prolog": pl, "native": py})
+
+    print(json.dumps({"cases": cases, "seed": seed, "mismatches": len(mismatches)}, indent=2))
+    for m in mismatches[:5]:
+        print(json.dumps(m, indent=2))
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
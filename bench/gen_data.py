@@ -0,0 +1,112 @@
+# bench/gen_data.py — seeded synthetic events.csv / deadlines.csv at any scale
+# Same schema and date format (MM/DD/YYYY) as data/. Events end today and are
+# written in date order; completion depends on effort and reminders so the
+# models have signal. Deadlines run from `days` ago to 120 days ahead.
+#
+#   python bench/gen_data.py out/ --days 365 --events-per-day 2700   # ~1M events
+#   python bench/gen_data.py out/ --students 500                      # out/<student>/... (app/batch.py layout)
+
+import argparse
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SUBJECTS = ["Math", "Physics", "Chemistry", "English", "Biology", "History", "Geography",
+            "Economics", "Computer Science", "Art", "Music", "French"]
+TYPES = ["exam", "quiz", "assignment"]
+CHUNK = 1_000_000
+
+
+def subjects(n):
+    return SUBJECTS[:n] + [f"Subject {i}" for i in range(len(SUBJECTS), n)]
+
+
+def _day_strings(start, days):
+    return np.array([(start + timedelta(days=int(d))).strftime("%m/%d/%Y") for d in range(days)], dtype=object)
+
+
+def gen_events(path, n_subjects=5, days=365, events_per_day=3.0, seed=0, end=None):
+    """Write ~days*events_per_day events ending on `end` (default today); returns the row count."""
+    rng = np.random.default_rng(seed)
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    day_str = _day_strings(start, days)
+    subs = np.array(subjects(n_subjects), dtype=object)
+    per_day = rng.poisson(events_per_day, days)
+    total = int(per_day.sum())
+    day = np.repeat(np.arange(days), per_day)  # sorted: events.csv is appended in date order
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for i in range(0, max(total, 1), CHUNK):
+        d = day[i:i + CHUNK]
+        n = len(d)
+        est = rng.choice([30, 45, 60, 75, 90, 120], n)
+        rem = rng.integers(0, 4, n)
+        ratio = np.clip(rng.beta(4, 2, n) + 0.05 * rem, 0, 1.3)
+        done = np.round(est * ratio).astype(int)
+        completed = ((ratio >= 0.9) | (rng.random(n) < 0.1)).astype(int)
+        pd.DataFrame({
+            "date": day_str[d],
+            "subject": subs[rng.integers(0, n_subjects, n)],
+            "est_min": est,
+            "done_min": done,
+            "reminders": rem,
+            "completed": completed,
+        }).to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    return total
+
+
+def gen_deadlines(path, n_subjects=5, days=365, per_subject=10, seed=0, end=None, ahead=120):
+    """Write per_subject deadlines per subject between `days` ago and `ahead` days from `end`."""
+    rng = np.random.default_rng(seed + 1)
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    span = days + ahead
+    day_str = _day_strings(start, span)
+    n = n_subjects * per_subject
+    pd.DataFrame({
+        "subject": np.repeat(subjects(n_subjects), per_subject),
+        "type": rng.choice(TYPES, n),
+        "date": day_str[rng.integers(0, span, n)],
+        "weight": rng.uniform(0.1, 1.0, n).round(1),
+        "difficulty": rng.integers(1, 6, n),
+    }).to_csv(path, index=False)
+    return n
+
+
+def generate(out, students=1, n_subjects=5, days=365, events_per_day=3.0, per_subject=10, seed=0):
+    """One student -> out/{events,deadlines}.csv; several -> out/s00000/... Returns total events."""
+    out = Path(out)
+    if students <= 1:
+        n = gen_events(out / "events.csv", n_subjects, days, events_per_day, seed)
+        gen_deadlines(out / "deadlines.csv", n_subjects, days, per_subject, seed)
+        return n
+    total = 0
+    for s in range(students):
+        d = out / f"s{s:05d}"
+        total += gen_events(d / "events.csv", n_subjects, days, events_per_day, seed + s)
+        gen_deadlines(d / "deadlines.csv", n_subjects, days, per_subject, seed + s)
+    return total
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ISA-Lite synthetic data generator")
+    ap.add_argument("out", type=Path)
+    ap.add_argument("--students", type=int, default=1)
+    ap.add_argument("--subjects", type=int, default=5)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--events-per-day", type=float, default=3.0)
+    ap.add_argument("--deadlines-per-subject", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    n = generate(args.out, args.students, args.subjects, args.days, args.events_per_day,
+                 args.deadlines_per_subject, args.seed)
+    print(f"[gen] wrote {n} events for {args.students} student(s) to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
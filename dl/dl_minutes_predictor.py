@@ -1,4 +1,10 @@
+import hashlib
 import json
+import os
+import shutil
+import sys
+import time
+import warnings
 from pathlib import Path
 
 import numpy as np
@@ -10,110 +16,372 @@ ROOT = Path(__file__).resolve().parents[1]
 DATA = ROOT / "data"
 REPORT = ROOT / "report"
 REPORT.mkdir(parents=True, exist_ok=True)
+MODELS = ROOT / "models" / "dl_minutes"
+SPOOL = ROOT / "cache" / "dl_spool"
+
+sys.path.insert(0, str(ROOT / "app"))
+from event_store import load_events, store_for  # noqa: E402
+from features import compute_features, with_subject_index  # noqa: E402
+from fingerprint import file_fingerprint  # noqa: E402
+from loader import iter_events, read_deadlines  # noqa: E402
+from sweep import promoted  # noqa: E402
+from tracing import count, span  # noqa: E402
+from trainer import BATCH, CHUNK, PATIENCE, Rows, Trainer, open_spool, set_threads, write_spool  # noqa: E402
 
-ev = pd.read_csv(DATA / "events.csv", parse_dates=["date"])
-dl = pd.read_csv(DATA / "deadlines.csv", parse_dates=["date"])
-
-# ----- Feature join -----
-df = ev.merge(
-    dl[["subject", "date", "difficulty"]].rename(columns={"date": "ddl_date"}),
-    on="subject",
-    how="left",
-)
-
-df["days_to_deadline"] = (df["ddl_date"] - df["date"]).dt.days
-df["days_to_deadline"] = df["days_to_deadline"].fillna(14).clip(lower=0, upper=60)
-
-# rolling completion signal (per subject)
-df["past_completion"] = (
-    df.groupby("subject")["completed"]
-      .shift(1)
-      .fillna(0)
-      .rolling(3, min_periods=1)
-      .mean()
-      .reset_index(level=0, drop=True)
-).fillna(0)
-
-df["difficulty"] = df["difficulty"].fillna(3).clip(lower=1, upper=5)
-
-# subject index
-subs = {s: i for i, s in enumerate(sorted(df["subject"].unique()))}
-df["sub_ix"] = df["subject"].map(subs).astype(int)
-
-# X, y
-X_np = df[["sub_ix", "difficulty", "days_to_deadline", "past_completion"]].values.astype("float32")
-y_np = df["est_min"].values.astype("float32").reshape(-1, 1)
-
-# ----- Train/test split (simple + deterministic) -----
-n = len(df)
-if n < 6:
-    raise SystemExit("[dl] Not enough rows in events.csv. Add more events (>= 6) for train/test split.")
-
-idx = np.arange(n)
-rng = np.random.default_rng(42)
-rng.shuffle(idx)
-
-test_size = max(2, int(0.3 * n))
-test_idx = idx[:test_size]
-train_idx = idx[test_size:]
-
-X_train = torch.tensor(X_np[train_idx])
-y_train = torch.tensor(y_np[train_idx])
-X_test  = torch.tensor(X_np[test_idx])
-y_test  = torch.tensor(y_np[test_idx])
-
-n_sub = len(subs)
 emb = 4
+ARTIFACT_VERSION = 2
+FEATURES = ["sub_ix", "difficulty", "days_to_deadline", "past_completion"]
+EPOCHS = 300
+LR = 1e-3
+SEED = 42
+VAL_FRAC = 0.2  # share of the training split held out for early stopping
+MIN_VAL = 200   # fewer validation rows than this: no early stopping, all training rows fit
+# architecture + optimiser; app/sweep.py searches around these and promotes
+# the winner (models/sweep/best.json), which run_dl then trains with
+DEFAULT_PARAMS = {"emb": emb, "hidden": [32, 16], "lr": LR, "weight_decay": 0.0, "epochs": EPOCHS}
+
 
 class MLP(nn.Module):
-    def __init__(self):
+    def __init__(self, n_sub, emb_dim=emb, hidden=(32, 16)):
         super().__init__()
-        self.emb = nn.Embedding(n_sub, emb)
-        self.net = nn.Sequential(
-            nn.Linear(emb + 3, 32), nn.ReLU(),
-            nn.Linear(32, 16), nn.ReLU(),
-            nn.Linear(16, 1)
-        )
+        self.emb = nn.Embedding(n_sub, emb_dim)
+        layers, width = [], emb_dim + 3
+        for h in hidden:
+            layers += [nn.Linear(width, h), nn.ReLU()]
+            width = h
+        self.net = nn.Sequential(*layers, nn.Linear(width, 1))
     def forward(self, x):
         s = x[:, 0].long()
         rest = x[:, 1:]
         z = torch.cat([self.emb(s), rest], dim=1)
         return self.net(z)
 
-model = MLP()
-opt = torch.optim.Adam(model.parameters(), lr=1e-3)
-lossf = nn.L1Loss()  # MAE
-
-# ----- Baseline: predict mean(est_min) from train -----
-baseline_pred = float(y_train.mean().item())
-baseline_mae = float(torch.mean(torch.abs(y_test - baseline_pred)).item())
-
-# ----- Train -----
-model.train()
-for epoch in range(300):
-    opt.zero_grad()
-    pred = model(X_train)
-    loss = lossf(pred, y_train)
-    loss.backward()
-    opt.step()
-
-# ----- Evaluate -----
-model.eval()
-with torch.no_grad():
-    pred_test = model(X_test)
-    test_mae = float(lossf(pred_test, y_test).item())
-
-report = {
-    "mode": "pytorch_mlp_minutes_predictor",
-    "n_rows": int(n),
-    "n_train": int(len(train_idx)),
-    "n_test": int(len(test_idx)),
-    "features": ["sub_ix(embedding)", "difficulty", "days_to_deadline", "past_completion"],
-    "baseline": {"type": "mean_est_min", "mae_minutes": round(baseline_mae, 3)},
-    "dl_model": {"mae_minutes": round(test_mae, 3)},
-    "subjects": subs,
-}
-
-(REPORT / "dl_minutes_report.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
-print("[dl] wrote report/dl_minutes_report.json")
-print(json.dumps(report, indent=2))
+
+def build_features(ev, dl):
+    """Feature rows (one per event) + subject vocabulary; see app/features.py."""
+    df, _ = compute_features(ev, dl)
+    return with_subject_index(df)
+
+
+def model_params():
+    """(params, seed) to train with: the promoted sweep winner if there is one, else the defaults."""
+    best = promoted("dl")
+    return ({**DEFAULT_PARAMS, **best["params"]}, best["seed"]) if best else (dict(DEFAULT_PARAMS), SEED)
+
+
+def new_model(n_sub, params=None, seed=SEED):
+    """Freshly initialised (model, optimiser) for `params` (see DEFAULT_PARAMS)."""
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    torch.manual_seed(seed)
+    model = MLP(n_sub, p["emb"], p["hidden"])
+    return model, torch.optim.Adam(model.parameters(), lr=p["lr"], weight_decay=p["weight_decay"])
+
+
+def make_trainer(n_sub, params=None, seed=SEED, **kw):
+    """dl/trainer.py Trainer (L1 loss) around a fresh model; kw: batch_size, patience, eval_every, checkpoint."""
+    model, opt = new_model(n_sub, params, seed)
+    return Trainer(model, opt, nn.L1Loss(), seed=seed, **kw)
+
+
+def split_indices(n, seed=42):
+    """(train_idx, test_idx): deterministic shuffle, 30% (at least 2 rows) held out for the report."""
+    idx = np.arange(n)
+    rng = np.random.default_rng(seed)
+    rng.shuffle(idx)
+    test_size = max(2, int(0.3 * n))
+    return idx[test_size:], idx[:test_size]
+
+
+def holdout(train_idx):
+    """(fit_idx, val_idx): the first VAL_FRAC of the shuffled training split (at least 1 row) validates."""
+    n_val = max(1, int(VAL_FRAC * len(train_idx)))
+    return train_idx[n_val:], train_idx[:n_val]
+
+
+def _config():
+    import yaml
+    return yaml.safe_load(open(ROOT / "config.yaml")) or {}
+
+
+# ----- Feature spool -----
+def _feature_chunks(csv, deadlines, cfg, vocab):
+    """(X, y) per chunk of events: event-store months, or CSV chunks with event_store off."""
+    dl = read_deadlines(deadlines)
+    if cfg.get("event_store"):
+        store = store_for(csv)
+        store.sync(csv)
+        chunks = store.iter_months()
+    else:
+        chunks = (ev[ev["date"].notna()] for ev in iter_events(csv))
+    hist = {}
+    for ev in chunks:
+        if not len(ev):
+            continue
+        df, hist = compute_features(ev, dl, hist)  # past_completion carries over between chunks
+        for s in pd.unique(df["subject"]):
+            vocab.setdefault(s, len(vocab))
+        df["sub_ix"] = df["subject"].map(vocab)  # first-seen codes, renumbered once all subjects are known
+        yield df[FEATURES].to_numpy(dtype="float32"), df["est_min"].to_numpy(dtype="float32")
+
+
+def spool_features(csv=DATA / "events.csv", deadlines=DATA / "deadlines.csv", root=SPOOL, cfg=None):
+    """
+    (X, y, subjects, how): the training rows as read-only memory maps. They
+    are featurised one chunk of events at a time into cache/dl_spool, which
+    is rebuilt only when events.csv or deadlines.csv change (how: "current"
+    or "rebuilt"). Store months are read oldest first, so rows follow
+    events.csv order whenever the CSV is in date order (as build_features).
+    """
+    cfg = _config() if cfg is None else cfg
+    spool = open_spool(root)
+    prev = spool[2] if spool else {}
+    ev_cur = file_fingerprint(csv, prev.get("events"))
+    dl_cur = file_fingerprint(deadlines, prev.get("deadlines"))
+    source = {"version": ARTIFACT_VERSION, "event_store": bool(cfg.get("event_store"))}
+    how = "current"
+    if not (spool and all(prev.get(k) == v for k, v in source.items())
+            and ev_cur.get("sha256") == (prev.get("events") or {}).get("sha256")
+            and dl_cur.get("sha256") == (prev.get("deadlines") or {}).get("sha256")):
+        vocab = {}
+
+        def renumber(X):
+            order = {s: i for i, s in enumerate(sorted(vocab))}
+            remap = np.array([order[s] for s in vocab], dtype="float32")
+            for i in range(0, len(X), CHUNK):
+                X[i:i + CHUNK, 0] = remap[X[i:i + CHUNK, 0].astype(np.int64)]
+            return {"subjects": sorted(vocab)}
+
+        with span("dl.spool"):
+            write_spool(root, _feature_chunks(csv, deadlines, cfg, vocab),
+                        {**source, "events": ev_cur, "deadlines": dl_cur, "subjects": []}, renumber)
+        spool, how = open_spool(root), "rebuilt"
+    count("dl_spool", result=how)
+    X, y, meta = spool
+    return X, y, {s: i for i, s in enumerate(meta["subjects"])}, how
+
+
+# ----- Artifacts -----
+def data_hash(X_np, y_np, subs, params=None, seed=SEED, training=None):
+    """Key of a trained model: training arrays + vocabulary + hyper-parameters + trainer settings."""
+    h = hashlib.sha256()
+    h.update(json.dumps({"version": ARTIFACT_VERSION, "features": FEATURES, "subs": subs, "seed": seed,
+                         "params": {**DEFAULT_PARAMS, **(params or {})},
+                         "training": training or {"batch_size": BATCH, "patience": PATIENCE}},
+                        sort_keys=True).encode("utf-8"))
+    for a in (X_np, y_np):  # chunk by chunk: the arrays may be memory-mapped
+        for i in range(0, len(a), CHUNK):
+            h.update(np.ascontiguousarray(a[i:i + CHUNK]).tobytes())
+    return h.hexdigest()
+
+
+def artifact_dir(key, models=MODELS):
+    return Path(models) / f"v{ARTIFACT_VERSION}-{key[:16]}"
+
+
+def save_artifact(model, meta, torchscript=False, models=MODELS):
+    """models/dl_minutes/v<version>-<hash>/{model.pt, meta.json[, model.ts]}; latest.json points at it."""
+    final = artifact_dir(meta["data_hash"], models)
+    tmp = final.with_name(final.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    torch.save(model.state_dict(), tmp / "model.pt")
+    if torchscript:
+        with warnings.catch_warnings():  # TorchScript is deprecated upstream but still the fastest CPU load here
+            warnings.simplefilter("ignore", FutureWarning)
+            torch.jit.script(model.eval()).save(str(tmp / "model.ts"))
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(tmp, final)
+    (final.parent / "latest.json").write_text(json.dumps({"artifact": final.name}), encoding="utf-8")
+    return final
+
+
+def load_artifact(path=None):
+    """(model, meta) from an artifact dir (default: the latest one)."""
+    if path is None:
+        try:
+            path = MODELS / json.loads((MODELS / "latest.json").read_text(encoding="utf-8"))["artifact"]
+        except (OSError, ValueError, KeyError):
+            raise SystemExit("[dl] no trained model in models/dl_minutes. Run dl/dl_minutes_predictor.py first.")
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    p = {**DEFAULT_PARAMS, **meta.get("params", {})}
+    model = MLP(len(meta["subjects"]), p["emb"], p["hidden"])
+    model.load_state_dict(torch.load(path / "model.pt", weights_only=True))
+    return model.eval(), meta
+
+
+class MinutesPredictor:
+    """Batch inference over a saved artifact (TorchScript module when present)."""
+
+    def __init__(self, path=None, torchscript=True):
+        model, self.meta = load_artifact(path)
+        self.path = Path(path) if path else artifact_dir(self.meta["data_hash"])
+        ts = self.path / "model.ts"
+        self.model = model
+        if torchscript and ts.exists():
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", FutureWarning)
+                self.model = torch.jit.load(str(ts))
+        self.subs = self.meta["subjects"]
+        self.fallback = float(self.meta["baseline"]["mean_est_min"])
+
+    def predict(self, subject, difficulty, days_to_deadline, past_completion=None):
+        """Predicted minutes (float32 array), one per row; unknown subjects get the training mean."""
+        subject = pd.Series(subject, dtype=object)
+        n = len(subject)
+        ix = subject.map(self.subs)
+        known = ix.notna().to_numpy()
+        X = np.empty((n, 4), dtype="float32")
+        X[:, 0] = ix.fillna(0).to_numpy()
+        X[:, 1] = np.clip(np.nan_to_num(np.asarray(difficulty, dtype="float32"), nan=3), 1, 5)
+        X[:, 2] = np.clip(np.nan_to_num(np.asarray(days_to_deadline, dtype="float32"), nan=14), 0, 60)
+        X[:, 3] = 0 if past_completion is None else np.asarray(past_completion, dtype="float32")
+        with span("dl.predict", rows=n), torch.inference_mode():
+            out = self.model(torch.from_numpy(X)).numpy().ravel()
+        return np.where(known, out, self.fallback).astype("float32")
+
+
+def predict_minutes(rows, predictor=None):
+    """rows: DataFrame / list of dicts with subject, difficulty, days_to_deadline[, past_completion]."""
+    rows = pd.DataFrame(rows)
+    predictor = predictor or MinutesPredictor()
+    pc = rows["past_completion"] if "past_completion" in rows else None
+    return predictor.predict(rows["subject"], rows["difficulty"], rows["days_to_deadline"], pc)
+
+
+# ----- Training -----
+def run_dl(ev=None, dl=None, retrain=False, torchscript=None,
+           report_path=REPORT / "dl_minutes_report.json", models=MODELS, params=None, seed=None,
+           batch_size=None, patience=None, threads=None):
+    """
+    Train/evaluate the minutes MLP and write report/dl_minutes_report.json.
+    The model is saved under models/dl_minutes keyed by a hash of the
+    training data, hyper-parameters (`params`, default: the promoted sweep
+    winner or DEFAULT_PARAMS) and trainer settings; if that artifact already
+    exists training is skipped. Training streams mini-batches of `batch_size`
+    rows (dl_batch_size) through dl/trainer.py, stops after `patience`
+    validation checks without improvement (dl_patience), uses `threads`
+    torch threads (dl_threads, 0 = torch's default) and checkpoints to
+    models/dl_minutes/checkpoints, so an interrupted run resumes there.
+    """
+    if params is None:
+        params, seed = model_params()
+    params, seed = {**DEFAULT_PARAMS, **params}, SEED if seed is None else seed
+    cfg = _config()
+    training = {"batch_size": int(batch_size or cfg.get("dl_batch_size") or BATCH),
+                "patience": int(patience or cfg.get("dl_patience") or PATIENCE)}
+    threads = set_threads(cfg.get("dl_threads", 0) if threads is None else threads)
+    if ev is None and dl is None:
+        # feature spool built from the event store (rebuilt only when the data changes)
+        X_np, y_np, subs, features_source = spool_features(cfg=cfg)
+    else:
+        if ev is None:
+            ev = load_events(csv=DATA / "events.csv")
+        if dl is None:
+            dl = read_deadlines(DATA / "deadlines.csv")
+        df, subs = build_features(ev, dl)
+        X_np = df[FEATURES].values.astype("float32")
+        y_np = df["est_min"].values.astype("float32").reshape(-1, 1)
+        features_source = "frames"
+    if torchscript is None:
+        torchscript = bool(cfg.get("dl_torchscript", False))
+
+    # ----- Train/validation/test split (simple + deterministic) -----
+    n = len(X_np)
+    if n < 6:
+        raise SystemExit("[dl] Not enough rows in events.csv. Add more events (>= 6) for train/test split.")
+
+    train_idx, test_idx = split_indices(n)
+    fit_idx, val_idx = holdout(train_idx)
+    if len(val_idx) < MIN_VAL:  # a validation MAE over a handful of rows would stop training at random
+        fit_idx, val_idx = train_idx, train_idx[:0]
+    train, test = Rows(X_np, y_np, train_idx), Rows(X_np, y_np, test_idx)
+
+    # ----- Baseline: predict mean(est_min) from train -----
+    baseline_pred = sum(float(y.double().sum()) for _, y in train.chunks()) / len(train)
+    baseline_mae = sum(float((y.double() - baseline_pred).abs().sum()) for _, y in test.chunks()) / len(test)
+
+    key = data_hash(X_np, y_np, subs, params, seed, training)
+    path = artifact_dir(key, models)
+    ckpt = Path(models) / "checkpoints" / f"{path.name}.pt"
+    trained = retrain or not (path / "model.pt").exists()
+    t0 = time.perf_counter()
+    if trained:
+        # ----- Train -----
+        if retrain:
+            ckpt.unlink(missing_ok=True)
+        trainer = make_trainer(len(subs), params, seed, checkpoint=ckpt, **training)
+        trainer.resume()
+        with span("dl.train", rows=len(fit_idx), epochs=params["epochs"], threads=threads, **training):
+            fit = trainer.fit(Rows(X_np, y_np, fit_idx), Rows(X_np, y_np, val_idx), params["epochs"])
+        trainer.restore_best()
+        model = trainer.model
+        fit = {**fit, "val_mae": None if fit["val_mae"] is None else round(fit["val_mae"], 3),
+               "n_val": int(len(val_idx)), "threads": threads, **training}
+    else:
+        model, meta = load_artifact(path)
+        fit = meta.get("training")
+    train_s = time.perf_counter() - t0
+    count("dl_artifact", result="trained" if trained else "reused")
+
+    # ----- Evaluate -----
+    test_mae = Trainer(model, None).evaluate(test)
+
+    if trained or (torchscript and not (path / "model.ts").exists()):
+        save_artifact(model, {
+            "version": ARTIFACT_VERSION,
+            "data_hash": key,
+            "subjects": subs,
+            "features": FEATURES,
+            "n_rows": int(n),
+            "epochs": params["epochs"],
+            "params": params,
+            "seed": seed,
+            "training": fit,
+            "baseline": {"mean_est_min": round(baseline_pred, 4), "mae_minutes": round(baseline_mae, 3)},
+            "dl_model": {"mae_minutes": round(test_mae, 3)},
+        }, torchscript=torchscript, models=models)
+        ckpt.unlink(missing_ok=True)
+    else:
+        (path.parent / "latest.json").write_text(json.dumps({"artifact": path.name}), encoding="utf-8")
+
+    report = {
+        "mode": "pytorch_mlp_minutes_predictor",
+        "n_rows": int(n),
+        "n_train": int(len(train_idx)),
+        "n_test": int(len(test_idx)),
+        "features": ["sub_ix(embedding)", "difficulty", "days_to_deadline", "past_completion"],
+        "baseline": {"type": "mean_est_min", "mae_minutes": round(baseline_mae, 3)},
+        "dl_model": {"mae_minutes": round(test_mae, 3)},
+        "subjects": subs,
+        "params": params,
+        "training": fit,
+        "artifact": path.name,
+        "trained": trained,
+        "train_s": round(train_s, 3),
+        "features_source": features_source,
+    }
+
+    Path(report_path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="ISA-Lite DL minutes predictor")
+    ap.add_argument("--retrain", action="store_true", help="train even if a model for this data exists")
+    ap.add_argument("--torchscript", action="store_true", help="also export model.ts (TorchScript)")
+    ap.add_argument("--batch-size", type=int, default=None, help=f"rows per step (default: dl_batch_size or {BATCH})")
+    ap.add_argument("--patience", type=int, default=None, help=f"early-stopping checks (default: dl_patience or {PATIENCE})")
+    ap.add_argument("--threads", type=int, default=None, help="torch threads (default: dl_threads; 0 = torch default)")
+    args = ap.parse_args()
+    report = run_dl(retrain=args.retrain, torchscript=args.torchscript or None,
+                    batch_size=args.batch_size, patience=args.patience, threads=args.threads)
+    print(f"[dl] {'trained' if report['trained'] else 'reused'} models/dl_minutes/{report['artifact']}")
+    if report["trained"]:
+        t = report["training"]
+        stop = t["status"] if t["val_mae"] is None else f"{t['status']}, best {t['best_epoch']}, val MAE {t['val_mae']}"
+        print(f"[dl] {t['epochs']} epochs ({stop}), {t['samples_per_s']} samples/s on {t['threads']} threads")
+    print("[dl] wrote report/dl_minutes_report.json")
+    print(json.dumps(report, indent=2))
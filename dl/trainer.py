@@ -0,0 +1,237 @@
+# dl/trainer.py — mini-batch trainer for the DL models (CPU)
+# Rows is a subset of (X, y) arrays, in memory or memory-mapped (write_spool /
+# open_spool), that is read CHUNK rows at a time: each epoch visits the chunks
+# in a seeded random order and shuffles every chunk into mini-batches, so
+# memory stays at one chunk and an epoch costs O(rows) whatever the event count.
+#
+# Trainer.fit runs epochs until the epoch limit, early stopping (validation
+# MAE checked every `eval_every` epochs; stop after `patience` checks without
+# improvement; the best weights are kept) or a wall-clock deadline. With a
+# checkpoint path, model / optimiser / progress are saved atomically every
+# CHECKPOINT_S seconds and when fit ends (even by an exception); resume() continues
+# from there with the same shuffles. Throughput is reported as training samples/s.
+# set_threads pins torch's intra-op pool (0 keeps torch's default).
+
+import json
+import math
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch import nn
+
+BATCH = 256          # rows per optimiser step
+CHUNK = 65_536       # rows read from the arrays at a time
+PATIENCE = 10        # validation checks without improvement before stopping
+MIN_DELTA = 1e-6     # smaller validation gains do not count as improvement
+CHECKPOINT_S = 30.0  # seconds between checkpoints inside fit
+
+
+def set_threads(threads=0):
+    """Limit torch to `threads` intra-op threads (0 / None: leave torch's default); returns the count in use."""
+    if threads:
+        torch.set_num_threads(int(threads))
+        try:
+            torch.set_num_interop_threads(1)  # small MLPs have no independent ops to overlap
+        except RuntimeError:
+            pass  # only settable before torch's first parallel op
+    return torch.get_num_threads()
+
+
+# ----- Data -----
+class Rows:
+    """Rows `idx` (default: all) of X / y arrays; y is returned as an (n, 1) column."""
+
+    def __init__(self, X, y, idx=None):
+        self.X, self.y = X, y
+        self.idx = np.arange(len(X)) if idx is None else np.sort(np.asarray(idx, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.idx)
+
+    def chunks(self, chunk=CHUNK, rng=None):
+        """(X, y) float32 tensors of up to `chunk` rows, in file order or shuffled by `rng`."""
+        starts = np.arange(0, len(self.idx), chunk)
+        if rng is not None:
+            rng.shuffle(starts)
+        for s in starts:
+            ix = self.idx[s:s + chunk]
+            X = np.ascontiguousarray(self.X[ix], dtype=np.float32)
+            y = np.ascontiguousarray(self.y[ix], dtype=np.float32).reshape(-1, 1)
+            yield torch.from_numpy(X), torch.from_numpy(y)
+
+
+def write_spool(root, chunks, meta=None, finish=None):
+    """
+    Write (X, y) array chunks to root/X.f32, root/y.f32 and root/meta.json
+    (rows, width, plus `meta`) without holding more than one chunk.
+    finish(X) may rewrite the memory-mapped X in place before the spool is
+    published and returns extra meta. Returns the meta.
+    """
+    root = Path(root)
+    tmp = root.with_name(root.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    rows, width = 0, 0
+    with open(tmp / "X.f32", "wb") as fx, open(tmp / "y.f32", "wb") as fy:
+        for X, y in chunks:
+            X = np.ascontiguousarray(X, dtype=np.float32)
+            fx.write(X.tobytes())
+            fy.write(np.ascontiguousarray(y, dtype=np.float32).tobytes())
+            rows, width = rows + len(X), X.shape[1]
+    meta = {**(meta or {}), "rows": rows, "width": width}
+    if finish is not None and rows:
+        X = np.memmap(tmp / "X.f32", dtype=np.float32, mode="r+", shape=(rows, width))
+        meta.update(finish(X) or {})
+        X.flush()
+        del X
+    (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(tmp, root)
+    return meta
+
+
+def open_spool(root):
+    """(X, y, meta) of a spool as read-only memory maps, or None when there is none."""
+    root = Path(root)
+    try:
+        meta = json.loads((root / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    n, w = meta["rows"], meta["width"]
+    if not n:  # an empty file cannot be mapped
+        return np.empty((0, w), np.float32), np.empty((0, 1), np.float32), meta
+    X = np.memmap(root / "X.f32", dtype=np.float32, mode="r", shape=(n, w))
+    y = np.memmap(root / "y.f32", dtype=np.float32, mode="r", shape=(n, 1))
+    return X, y, meta
+
+
+# ----- Training -----
+class Trainer:
+    def __init__(self, model, opt, lossf=None, batch_size=BATCH, patience=PATIENCE, eval_every=1,
+                 seed=0, checkpoint=None, chunk=CHUNK):
+        self.model, self.opt = model, opt
+        self.lossf = lossf or nn.L1Loss()
+        self.batch_size = max(1, int(batch_size))
+        self.patience = patience
+        self.eval_every = max(1, int(eval_every))
+        self.seed = seed
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        self.chunk = chunk
+        self.state = {"epoch": 0, "best": math.inf, "best_epoch": 0, "bad": 0, "samples": 0, "train_s": 0.0}
+        self.best_weights = None
+        self.resumed = False
+
+    # ----- checkpoint -----
+    def save(self):
+        if self.checkpoint is None:
+            return
+        self.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.checkpoint.with_suffix(".tmp")
+        torch.save({"model": self.model.state_dict(), "opt": self.opt.state_dict(),
+                    "best_model": self.best_weights, **self.state}, tmp)
+        os.replace(tmp, self.checkpoint)
+
+    def resume(self):
+        """Continue from the checkpoint if there is one; returns whether it was loaded."""
+        if self.checkpoint is None or not self.checkpoint.exists():
+            return False
+        saved = torch.load(self.checkpoint, weights_only=True)
+        self.model.load_state_dict(saved["model"])
+        self.opt.load_state_dict(saved["opt"])
+        self.best_weights = saved["best_model"]
+        self.state = {k: saved[k] for k in self.state}
+        self.resumed = True
+        return True
+
+    def restore_best(self):
+        """Load the weights of the best validation check (no-op before the first check)."""
+        if self.best_weights is not None:
+            self.model.load_state_dict(self.best_weights)
+
+    # ----- epochs -----
+    def train_epoch(self, rows):
+        """One pass over `rows` in shuffled mini-batches; returns the mean training loss."""
+        rng = np.random.default_rng([self.seed, self.state["epoch"]])  # same shuffle after a resume
+        self.model.train()
+        total, n = torch.zeros(()), 0
+        for X, y in rows.chunks(self.chunk, rng):
+            perm = torch.from_numpy(rng.permutation(len(X)))
+            for b in range(0, len(X), self.batch_size):
+                ix = perm[b:b + self.batch_size]
+                self.opt.zero_grad()
+                loss = self.lossf(self.model(X[ix]), y[ix])
+                loss.backward()
+                self.opt.step()
+                total += loss.detach() * len(ix)
+                n += len(ix)
+        self.model.eval()
+        self.state["epoch"] += 1
+        self.state["samples"] += n
+        return float(total) / n if n else math.nan
+
+    @torch.no_grad()
+    def evaluate(self, rows):
+        """Mean loss (MAE for the default L1 loss) over `rows`, one chunk at a time."""
+        self.model.eval()
+        total, n = 0.0, 0
+        for X, y in rows.chunks(self.chunk):
+            total += float(self.lossf(self.model(X), y)) * len(X)
+            n += len(X)
+        return total / n if n else math.nan
+
+    def fit(self, train, val, epochs, deadline=None):
+        """
+        Train up to `epochs` epochs in total (resumed ones included). Stops
+        early after `patience` validation checks without improvement (never
+        when `val` is empty), when the loss stops being finite or at `deadline`
+        (time.time()). Returns progress() with status "done", "stopped",
+        "diverged" or "budget".
+        """
+        st, status = self.state, "done"
+        saved_at = time.perf_counter()
+        try:
+            while st["epoch"] < epochs:
+                if deadline is not None and time.time() > deadline:
+                    status = "budget"
+                    break
+                t0 = time.perf_counter()
+                for _ in range(min(self.eval_every, epochs - st["epoch"])):
+                    loss = self.train_epoch(train)
+                st["train_s"] += time.perf_counter() - t0
+                mae = self.evaluate(val) if len(val) else None  # no validation rows: fixed epochs
+                if not math.isfinite(loss) or (mae is not None and not math.isfinite(mae)):
+                    status = "diverged"
+                    break
+                if mae is None:
+                    pass
+                elif mae < st["best"] - MIN_DELTA:
+                    st.update(best=mae, best_epoch=st["epoch"], bad=0)
+                    self.best_weights = {k: v.detach().clone() for k, v in self.model.state_dict().items()}
+                else:
+                    st["bad"] += 1
+                if st["bad"] >= self.patience:
+                    status = "stopped"
+                    break
+                if time.perf_counter() - saved_at > CHECKPOINT_S:
+                    self.save()
+                    saved_at = time.perf_counter()
+        finally:
+            self.save()  # also when interrupted: the next run resumes from here
+        return self.progress(status)
+
+    def progress(self, status=None):
+        st = self.state
+        return {
+            "status": status,
+            "epochs": st["epoch"],
+            "best_epoch": st["best_epoch"],
+            "val_mae": st["best"] if math.isfinite(st["best"]) else None,
+            "samples": st["samples"],
+            "train_s": round(st["train_s"], 4),
+            "samples_per_s": round(st["samples"] / st["train_s"]) if st["train_s"] > 0 else None,
+            "resumed": self.resumed,
+        }
@@ -1,3 +1,7 @@
+:- use_module(library(http/json)).
+:- dynamic predicted_minutes/2.      % optional fact: may be absent from facts.pl,
+:- multifile predicted_minutes/2.    % and is consulted from a different file
+
 % ---------- Utility ----------
 days_between(date(Y1,M1,D1), date(Y2,M2,D2), K) :-
     date_time_stamp(date(Y1,M1,D1,0,0,0,0,-,-), S1),
@@ -12,6 +16,7 @@ today(T) :- get_time(Now), stamp_date_time(Now, date(Y,M,D,_,_,_,_,_,_), 'UTC'),
 % subject(math). difficulty(math,3).
 % deadline(math, exam, date(2025,10,28)).
 % progress(math, completion_pct, 0.65).
+% predicted_minutes(math, 45).   (optional; app/predictions.py table via Perceive)
 
 near_exam(S) :-
   deadline(S, exam, Dt),
@@ -22,12 +27,17 @@ near_exam(S) :-
   K =< Near.
 
 
+% base session length: the subject's predicted minutes (one indexed lookup),
+% 60 without a prediction; the tiers below were 120/90/75/60 = 2/1.5/1.25/1 x 60
+base_minutes(S, B) :- ( predicted_minutes(S, B0) -> B = B0 ; B = 60 ).
+
 allocate(S, Minutes) :-
   hours_per_day(H),
-  ( near_exam(S) -> Minutes0 is min(120, 0.5 * H)
-  ; ( progress(S, completion_pct, P), P < 0.7 -> Minutes0 is min(90, 0.4 * H)
-    ; ( difficulty(S, D), D >= 4 -> Minutes0 is min(75, 0.35 * H)
-      ; Minutes0 is min(60, 0.25 * H) ))),
+  base_minutes(S, B),
+  ( near_exam(S) -> Minutes0 is min(2.0 * B, 0.5 * H)
+  ; ( progress(S, completion_pct, P), P < 0.7 -> Minutes0 is min(1.5 * B, 0.4 * H)
+    ; ( difficulty(S, D), D >= 4 -> Minutes0 is min(1.25 * B, 0.35 * H)
+      ; Minutes0 is min(B, 0.25 * H) ))),
   Minutes is round(Minutes0).
 
 decision(S, needs_info) :- \+ deadline(S,_,_), !.
@@ -38,7 +48,16 @@ plan_triplet(S, Decision, Minutes) :-
   subject(S), (decision(S, Decision) -> true ; Decision = needs_info),
   (allocate(S, Minutes) -> true ; Minutes = 0).
 
-% entry point: prints JSON-like terms for Python to parse
+% entry points: main/0 prints the plan as a Prolog list, quoted with writeq so
+% atoms with spaces, commas, brackets or quotes read back unambiguously;
+% main_json/0 prints it as one JSON array of {decision, minutes, subject}
+% objects (what app/run_planner.py and app/prolog_server.py ask for). Atoms
+% are always JSON strings: true/false/null only come from @true/@false/@null.
 main :-
   findall([S,D,M], plan_triplet(S,D,M), L),
-  write(L), nl.
+  writeq(L), nl.
+
+main_json :-
+  findall(_{subject:S, decision:D, minutes:M}, plan_triplet(S,D,M), L),
+  json_write_dict(current_output, L, [width(0), true(@true), false(@false), null(@null)]),
+  nl.
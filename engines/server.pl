@@ -0,0 +1,60 @@
+% engines/server.pl — long-lived request loop for app/prolog_server.py
+% Loaded once next to planner_rules.pl. Facts are hot-swapped per request
+% with load_facts/1, so the rules never have to be reconsulted.
+%
+% Protocol (one Prolog term per line on stdin):
+%   load_facts('engines/facts.pl').   -> replace the current fact set
+%   main_json.                        -> print the plan as JSON (see planner_rules.pl)
+%   main.                             -> print it as a quoted Prolog list
+%   ping.                             -> liveness check
+% Every request is answered with its output followed by the end marker line.
+% Failures and exceptions are reported as a single marker line before it.
+
+:- dynamic hours_per_day/1, exam_near_days/1, subject/1,
+           difficulty/2, deadline/3, progress/3, predicted_minutes/2.
+
+fact_pred(hours_per_day/1).
+fact_pred(exam_near_days/1).
+fact_pred(subject/1).
+fact_pred(difficulty/2).
+fact_pred(deadline/3).
+fact_pred(progress/3).
+fact_pred(predicted_minutes/2).
+
+end_marker('__isa_end__').
+
+% ---------- Fact hot-swap ----------
+load_facts(File) :-
+    forall(fact_pred(N/A), (functor(H, N, A), retractall(H))),
+    setup_call_cleanup(open(File, read, In),
+                       assert_terms(In),
+                       close(In)).
+
+assert_terms(In) :-
+    read_term(In, T, []),
+    (   T == end_of_file
+    ->  true
+    ;   assertz(T),
+        assert_terms(In)
+    ).
+
+ping :- writeln(pong).
+
+% ---------- Request loop ----------
+serve :-
+    prompt(_, ''),
+    repeat,
+      read_term(user_input, Req, []),
+      (   Req == end_of_file
+      ->  !
+      ;   handle(Req),
+          fail
+      ).
+
+handle(Req) :-
+    catch(( call(Req) -> true ; writeln('__isa_fail__') ),
+          E,
+          format("__isa_error__ ~q~n", [E])),
+    end_marker(End),
+    writeln(End),
+    flush_output.
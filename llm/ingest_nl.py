@@ -0,0 +1,301 @@
+# llm/ingest_nl.py — streaming bulk ingester for natural-language study notes
+# Reads JSONL (one {"text": ...} object per line) or plain text lines from a
+# file or stdin, in chunks, and turns each line into a deadline or a study event:
+#
+#   "Physics quiz on Fri, difficulty 4"              -> deadlines.csv row
+#   "Studied Math for 45 min today, planned 1 hr"    -> events.csv row
+#   "revised Math 45 min before the quiz tomorrow"   -> events.csv row (time studied wins)
+#
+# A chunk is parsed column-wise: one precompiled alternation over the live
+# subject vocabulary (the subjects in deadlines.csv, longest first, word
+# bounded) plus vectorised str.extract passes for type, date, durations,
+# difficulty and weight. Dates are resolved for the whole chunk at once (ISO,
+# M/D/YYYY, today/tomorrow/yesterday, "in N days", weekday names). Lines that
+# fail validation are counted by reason (and can be written to --rejects);
+# valid rows are appended to the CSVs and the event store picks up the new
+# tail with a single sync().
+#
+#   python llm/ingest_nl.py notes.jsonl
+#   cat notes.txt | python llm/ingest_nl.py - --dry-run
+#   python llm/ingest_nl.py requests.jsonl --field body
+
+import argparse
+import json
+import re
+import sys
+import time
+from datetime import date
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+EVENTS_CSV = DATA / "events.csv"
+DEADLINES_CSV = DATA / "deadlines.csv"
+
+sys.path.insert(0, str(ROOT / "app"))
+from event_store import store_for  # noqa: E402
+from run_planner import load_config  # noqa: E402
+
+DEFAULT_SUBJECTS = ["Math", "Physics", "Chemistry", "English"]
+CHUNK_LINES = 200_000
+EVENT_COLUMNS = ["date", "subject", "est_min", "done_min", "reminders", "completed"]
+DEADLINE_COLUMNS = ["subject", "type", "date", "weight", "difficulty"]
+
+TYPES = {"exam": "exam", "test": "exam", "midterm": "exam", "final": "exam", "quiz": "quiz",
+         "assignment": "assignment", "homework": "assignment", "hw": "assignment",
+         "project": "assignment", "essay": "assignment"}
+TYPE_WEIGHT = {"exam": 1.0, "quiz": 0.6, "assignment": 0.5}
+LEVELS = {"easy": 2, "medium": 3, "hard": 4, "very hard": 5}
+WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+RELATIVE = {"today": 0, "tonight": 0, "tomorrow": 1, "yesterday": -1}
+
+# all patterns run on lower-cased text (lowering a chunk once is cheaper than re.I)
+DUR_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(h|hrs?|hours?|m|mins?|minutes?)\b")
+DONE_VERBS = {"did", "done", "studied", "spent", "revised", "practiced", "practised", "worked"}
+EST_VERBS = {"need", "needs", "needed", "take", "takes", "estimate", "estimated", "plan", "planned", "allow", "budget"}
+VERB_RE = re.compile(r"\b(" + "|".join(sorted(DONE_VERBS | EST_VERBS, key=len, reverse=True)) + r")\b")
+TYPE_RE = re.compile(r"\b(" + "|".join(TYPES) + r")s?\b")
+DATE_RE = re.compile(
+    r"\b(?:(?P<iso>\d{4}-\d{2}-\d{2})|(?P<us>\d{1,2}/\d{1,2}/\d{4})|(?P<rel>today|tonight|tomorrow|yesterday)"
+    r"|in\s+(?P<inn>\d{1,3})\s+days?|(?P<wd>mon|tue|wed|thu|fri|sat|sun)(?:day|s|sday|nesday|rs|rsday|urday)?)\b")
+DATE_GROUPS = ("iso", "us", "rel", "inn", "wd")
+DIFF_RE = re.compile(r"\bdiff(?:iculty)?\s*[:=]?\s*([1-5])\b|\b(very hard|hard|medium|easy)\b")
+WEIGHT_RE = re.compile(r"\bweight\s*[:=]?\s*(\d*\.?\d+)")
+REMIND_RE = re.compile(r"\b(\d+)\s*reminders?\b")
+DONE_FLAG_RE = re.compile(r"\b(?:completed|finished)\b")
+
+
+def load_vocabulary(deadlines=DEADLINES_CSV):
+    """Subject names as written in deadlines.csv (falls back to the four demo subjects)."""
+    try:
+        subs = pd.read_csv(deadlines, usecols=["subject"])["subject"].dropna().astype(str).str.strip()
+    except (OSError, ValueError):
+        return list(DEFAULT_SUBJECTS)
+    return list(dict.fromkeys(s for s in subs if s)) or list(DEFAULT_SUBJECTS)
+
+
+def durations(low):
+    """
+    (est, done, first) minutes in one lower-cased line. A duration counts as
+    done or estimated by the last verb between it and the previous duration
+    ("studied 45 min, planned 1 hr" -> est 60, done 45).
+    """
+    est = done = first = None
+    prev = 0
+    for m in DUR_RE.finditer(low):
+        mins = float(m.group(1)) * (60 if m.group(2)[0] == "h" else 1)
+        first = mins if first is None else first
+        verbs = VERB_RE.findall(low, prev, m.start())
+        if verbs and verbs[-1] in DONE_VERBS:
+            done = mins if done is None else done
+        elif verbs:
+            est = mins if est is None else est
+        prev = m.end()
+    return est, done, first
+
+
+def _mdy(when):
+    """MM/DD/YYYY strings, formatting each distinct day once (a chunk spans few days)."""
+    codes, days = pd.factorize(when)
+    return np.asarray(pd.DatetimeIndex(days).strftime("%m/%d/%Y"), dtype=object)[codes]
+
+
+def _first(rx, lines, default=None):
+    return [m.group(1) if (m := rx.search(s)) else default for s in lines]
+
+
+class NLParser:
+    """Parses batches of free-text lines against a fixed subject vocabulary."""
+
+    def __init__(self, vocabulary=None, today=None):
+        vocab = vocabulary or load_vocabulary()
+        self.canon = {s.lower(): s for s in vocab}
+        alts = sorted((re.escape(s) for s in self.canon), key=len, reverse=True)
+        self.subject_re = re.compile(r"\b(" + "|".join(alts) + r")\b")
+        self.today = pd.Timestamp(today or date.today())
+
+    def _dates(self, low, deadline):
+        """One date per line: explicit dates first, then relative words (weekdays look ahead for deadlines, back for events)."""
+        empty = (None,) * len(DATE_GROUPS)
+        g = pd.DataFrame([m.groups() if (m := DATE_RE.search(s)) else empty for s in low],
+                         columns=list(DATE_GROUPS), dtype=object)
+        out = pd.to_datetime(g["iso"], format="%Y-%m-%d", errors="coerce")
+        out = out.fillna(pd.to_datetime(g["us"], format="%m/%d/%Y", errors="coerce"))
+        wd = g["wd"].str[:3].map(WEEKDAYS)
+        dow = self.today.weekday()
+        wd_off = pd.Series(np.where(deadline, (wd - dow) % 7, -((dow - wd) % 7)))
+        off = g["rel"].map(RELATIVE).fillna(pd.to_numeric(g["inn"], errors="coerce")).fillna(wd_off)
+        return out.fillna(self.today + pd.to_timedelta(off, unit="D"))
+
+    def parse(self, lines):
+        """(deadlines, events, rejects) DataFrames for a list of lines; rejects carry text + reason."""
+        lines = ["" if t is None else str(t) for t in lines]
+        low = [t.lower() for t in lines]
+        subject = pd.Series([self.canon[s] if s else None for s in _first(self.subject_re, low)], dtype=object)
+        kind = pd.Series([TYPES[k] if k else None for k in _first(TYPE_RE, low)], dtype=object)
+        # time already studied makes a line an event even when it names an exam / quiz
+        # ("revised math 45 min before the quiz"); only the rest can be deadlines
+        dur = pd.DataFrame([durations(s) for s in low], columns=["est", "done", "first"], dtype=float)
+        is_event = dur["done"].notna()
+        is_deadline = kind.notna() & ~is_event
+
+        reason = pd.Series(None, index=subject.index, dtype=object)
+        reason[~is_deadline & ~is_event] = "no deadline type or study time"
+        reason[subject.isna()] = "unknown subject"
+        reason[pd.Series([not t.strip() for t in lines])] = "empty"
+        cand = reason.isna().to_numpy()
+        ix = np.flatnonzero(cand)
+        when = pd.Series(pd.NaT, index=subject.index, dtype="datetime64[ns]")
+        if len(ix):
+            w = self._dates([low[i] for i in ix], is_deadline.to_numpy()[ix])
+            when.iloc[ix] = w.to_numpy(dtype="datetime64[ns]")
+        # study notes without a date are today's; a future date in one belongs to what was studied for
+        when = when.mask(is_event & (when.isna() | (when > self.today)), self.today)
+        reason[cand & is_deadline & when.isna()] = "no date"
+        ok = reason.isna()
+
+        d = np.flatnonzero(ok & is_deadline)
+        dlow = [low[i] for i in d]
+        diff = [m.group(1) or LEVELS[m.group(2)] if (m := DIFF_RE.search(s)) else 3 for s in dlow]
+        weight = pd.to_numeric(pd.Series(_first(WEIGHT_RE, dlow), dtype=object), errors="coerce")
+        deadlines = pd.DataFrame({
+            "subject": subject.iloc[d].to_numpy(),
+            "type": kind.iloc[d].to_numpy(),
+            "date": _mdy(when.iloc[d]),
+            "weight": weight.where(weight.between(0, 1)).fillna(kind.iloc[d].map(TYPE_WEIGHT).reset_index(drop=True)).round(2),
+            "difficulty": np.asarray(diff, dtype=int),
+        }, columns=DEADLINE_COLUMNS)
+
+        e = np.flatnonzero(ok & is_event)
+        elow = [low[i] for i in e]
+        de = dur.iloc[e]
+        done = de["done"].clip(0, 24 * 60).astype(int).to_numpy()
+        other = de["first"].where(de["first"] != de["done"])
+        est = de["est"].fillna(other).fillna(de["done"]).clip(1, 24 * 60).astype(int).to_numpy()
+        flag = np.array([DONE_FLAG_RE.search(s) is not None for s in elow], dtype=bool)
+        events = pd.DataFrame({
+            "date": _mdy(when.iloc[e]),
+            "subject": subject.iloc[e].to_numpy(),
+            "est_min": est,
+            "done_min": done,
+            "reminders": np.array(_first(REMIND_RE, elow, 0), dtype=int),
+            "completed": (flag | (done >= est)).astype(int),
+        }, columns=EVENT_COLUMNS)
+
+        bad = np.flatnonzero(~ok)
+        rejects = pd.DataFrame({"text": [lines[i] for i in bad], "reason": reason.iloc[bad].to_numpy()})
+        return deadlines, events, rejects
+
+    def parse_one(self, t: str) -> dict:
+        """Single line -> the row it would produce ({} if rejected)."""
+        deadlines, events, _ = self.parse([t])
+        if len(deadlines):
+            return {"kind": "deadline", **deadlines.iloc[0].to_dict()}
+        if len(events):
+            return {"kind": "event", **events.iloc[0].to_dict()}
+        return {}
+
+
+# ----- input -----
+def read_chunks(src, chunk_lines=CHUNK_LINES, field="text"):
+    """Yield lists of text lines; JSON object lines contribute obj[field], other lines themselves."""
+    f = sys.stdin if str(src) == "-" else open(src, encoding="utf-8")
+    try:
+        while True:
+            lines = list(islice(f, chunk_lines))
+            if not lines:
+                return
+            yield [_field(x, field) if x[:1] == "{" else x.strip() for x in lines]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _field(line, field):
+    try:
+        v = json.loads(line)
+    except ValueError:
+        return ""
+    return str(v.get(field, "")) if isinstance(v, dict) else ""
+
+
+# ----- output -----
+def _append(df, path, columns):
+    """Append rows to a CSV (header if new, newline fixed if the file does not end with one)."""
+    if df.empty:
+        return 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new = not path.exists() or path.stat().st_size == 0
+    with open(path, "ab+") as f:
+        if not new:
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    df.to_csv(path, mode="a", header=new, index=False, columns=columns)
+    return len(df)
+
+
+def ingest(src, events_csv=EVENTS_CSV, deadlines_csv=DEADLINES_CSV, field="text", chunk_lines=CHUNK_LINES,
+           dry_run=False, rejects_path=None, today=None, cfg=None):
+    """Stream src into the CSVs; returns counts, rejection reasons and lines/sec."""
+    cfg = cfg if cfg is not None else load_config()
+    parser = NLParser(load_vocabulary(deadlines_csv), today)
+    t0 = time.perf_counter()
+    n = n_dl = n_ev = 0
+    reasons: dict = {}
+    rej = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+    try:
+        for chunk in read_chunks(src, chunk_lines, field):
+            dl, ev, bad = parser.parse(chunk)
+            n += len(chunk)
+            for r, k in bad["reason"].value_counts().items():
+                reasons[r] = reasons.get(r, 0) + int(k)
+            if rej is not None:
+                for t, r in zip(bad["text"], bad["reason"]):
+                    rej.write(json.dumps({"text": t, "reason": r}) + "\n")
+            if not dry_run:
+                n_dl += _append(dl, Path(deadlines_csv), DEADLINE_COLUMNS)
+                n_ev += _append(ev, Path(events_csv), EVENT_COLUMNS)
+            else:
+                n_dl, n_ev = n_dl + len(dl), n_ev + len(ev)
+    finally:
+        if rej is not None:
+            rej.close()
+    parse_s = time.perf_counter() - t0
+
+    store = None
+    if not dry_run and n_ev and cfg.get("event_store"):
+        s = store_for(Path(events_csv))
+        if s.exists():
+            store = s.sync(Path(events_csv))
+    dt = time.perf_counter() - t0
+    return {
+        "lines": n,
+        "deadlines": n_dl,
+        "events": n_ev,
+        "rejected": dict(sorted(reasons.items())),
+        "dry_run": dry_run,
+        "event_store": store,
+        "seconds": round(dt, 3),
+        "lines_per_s": round(n / parse_s) if parse_s > 0 else None,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="ISA-Lite bulk natural-language ingester")
+    ap.add_argument("src", help="JSONL / text file, or - for stdin")
+    ap.add_argument("--field", default="text", help="JSON key holding the text (default: text)")
+    ap.add_argument("--chunk", type=int, default=CHUNK_LINES, help="lines per parse batch")
+    ap.add_argument("--events", type=Path, default=EVENTS_CSV)
+    ap.add_argument("--deadlines", type=Path, default=DEADLINES_CSV)
+    ap.add_argument("--rejects", type=Path, default=None, help="write rejected lines (JSONL) here")
+    ap.add_argument("--dry-run", action="store_true", help="parse and count only, append nothing")
+    args = ap.parse_args()
+    r = ingest(args.src, args.events, args.deadlines, args.field, args.chunk, args.dry_run, args.rejects)
+    print(f"[ingest] {r['lines']} lines -> {r['deadlines']} deadlines, {r['events']} events, "
+          f"{sum(r['rejected'].values())} rejected ({r['lines_per_s']} lines/s)", file=sys.stderr)
+    print(json.dumps(r, indent=2))
@@ -1,15 +1,25 @@
-import re, json, datetime as dt
-# Deterministic fallback (no external API needed)
+import re, datetime as dt
+from ingest_nl import DEFAULT_SUBJECTS, TYPE_RE, TYPES, NLParser, durations, load_vocabulary
+# Deterministic fallback (no external API needed). Patterns are precompiled once
+# and subjects come from deadlines.csv; for whole files use llm/ingest_nl.py.
+_parser = None
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
 def parse_text(t):
-    # "Add Physics quiz on Fri 3pm; need 2 hrs"
-    subj = re.findall(r"(Math|Physics|Chemistry|English)", t, re.I)
-    est = re.findall(r"(\d+)\s*hr", t, re.I)
-    date = re.findall(r"(\d{4}-\d{2}-\d{2})", t)
+    # "Add Physics quiz on Fri 3pm; need 2 hr"
+    global _parser
+    if _parser is None:
+        _parser = NLParser(list(dict.fromkeys(load_vocabulary() + DEFAULT_SUBJECTS)))
+    low = t.lower()
+    subj = _parser.subject_re.search(low)
+    kind = TYPE_RE.search(low)
+    date = ISO_DATE.search(low)
+    est, _, first = durations(low)
     return {
-        "subject": (subj[0] if subj else "General").title(),
-        "type": "task",
-        "date": (date[0] if date else dt.date.today().isoformat()),
-        "est_min": int(est[0])*60 if est else 60
+        "subject": _parser.canon[subj.group(1)] if subj else "General",
+        "type": TYPES[kind.group(1)] if kind else "task",
+        "date": (date.group(0) if date else dt.date.today().isoformat()),
+        "est_min": int(est or first or 60)
     }
 
 if __name__=="__main__":
@@ -1,5 +1,6 @@
 
 import json
+import sys
 from pathlib import Path
 
 import numpy as np
@@ -13,29 +14,22 @@ DATA = ROOT / "data"
 REPORT = ROOT / "report"
 REPORT.mkdir(parents=True, exist_ok=True)
 
-events_path = DATA / "events.csv"
-if not events_path.exists():
-    raise SystemExit("[ml] data/events.csv missing. Run the app seed or perceive step first.")
-
-df = pd.read_csv(events_path)
-
-# ---- Features (simple + explainable) ----
-# completed is the label (0/1)
-# Use columns that exist in your events.csv
-needed_cols = ["est_min", "done_min", "reminders", "completed", "subject"]
-missing = [c for c in needed_cols if c not in df.columns]
-if missing:
-    raise SystemExit(f"[ml] Missing columns in events.csv: {missing}")
+sys.path.insert(0, str(ROOT / "app"))
+from features import compute_features, load_features  # noqa: E402
+from sweep import promoted  # noqa: E402
+from tracing import count, span  # noqa: E402
 
-# Feature engineering (keep it minimal)
-df["effort_ratio"] = np.where(df["est_min"] > 0, df["done_min"] / df["est_min"], 0.0)
-df["reminders_norm"] = df["reminders"].fillna(0).astype(float)
-df["est_min"] = df["est_min"].fillna(0).astype(float)
+events_path = DATA / "events.csv"
 
-X = df[["est_min", "effort_ratio", "reminders_norm"]].values
-y = df["completed"].astype(int).values
+# model family + hyper-parameters; app/sweep.py searches around these and
+# promotes the winner (models/sweep/best.json), which fit_predict then uses
+FAMILY_DEFAULTS = {
+    "logistic": {"C": 1.0, "class_weight": None},
+    "hist_gb": {"learning_rate": 0.1, "max_leaf_nodes": 31, "max_iter": 100},
+}
+DEFAULT_PARAMS = {"model": "logistic", **FAMILY_DEFAULTS["logistic"]}
+SEED = 42
 
-unique = np.unique(y)
 
 def baseline_predict_proba(row):
     """
@@ -51,56 +45,131 @@ def baseline_predict_proba(row):
         return 0.60
     return 0.35
 
-results = {}
-
-# ---- Case A: Not enough class diversity -> baseline ----
-if len(unique) < 2:
-    p_hat = np.array([baseline_predict_proba(r) for r in X], dtype=float)
-    pred = (p_hat >= 0.5).astype(int)
-
-    results["mode"] = "baseline_fallback_single_class"
-    results["reason"] = f"Training labels have only one class: {int(unique[0])}. Need both 0 and 1."
-    results["overall_positive_rate"] = float(np.mean(y))
-    results["baseline_accuracy_on_seen"] = float(np.mean(pred == y))
-else:
-    # ---- Case B: Train Logistic Regression ----
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.3, random_state=42, stratify=y
-    )
 
-    clf = LogisticRegression(max_iter=500)
-    clf.fit(X_train, y_train)
+def full_params(params=None):
+    """params with the defaults of its model family filled in."""
+    model = (params or {}).get("model", DEFAULT_PARAMS["model"])
+    if model not in FAMILY_DEFAULTS:
+        raise SystemExit(f"[ml] Unknown model: {model!r} (use {' or '.join(map(repr, FAMILY_DEFAULTS))})")
+    return {"model": model, **FAMILY_DEFAULTS[model], **(params or {})}
+
 
-    p_test = clf.predict_proba(X_test)[:, 1]
-    pred_test = (p_test >= 0.5).astype(int)
+def make_model(params=None, seed=SEED):
+    """Unfitted classifier for `params` (see FAMILY_DEFAULTS)."""
+    p = full_params(params)
+    if p["model"] == "logistic":
+        return LogisticRegression(C=p["C"], class_weight=p["class_weight"], max_iter=500)
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    return HistGradientBoostingClassifier(learning_rate=p["learning_rate"], max_leaf_nodes=p["max_leaf_nodes"],
+                                          max_iter=p["max_iter"], random_state=seed)
 
-    results["mode"] = "logistic_regression"
-    results["test_accuracy"] = float(np.mean(pred_test == y_test))
-    results["coef"] = {
-        "est_min": float(clf.coef_[0][0]),
-        "effort_ratio": float(clf.coef_[0][1]),
-        "reminders_norm": float(clf.coef_[0][2]),
-        "intercept": float(clf.intercept_[0]),
-    }
 
-    # For reporting, compute probs for all rows too
-    p_hat = clf.predict_proba(X)[:, 1]
+def split(X, y):
+    """(X_train, X_test, y_train, y_test): the stratified 70/30 split the report's test accuracy uses."""
+    return train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
 
-# ---- Per-subject aggregation (nice for your ISD demo) ----
-df["p_complete"] = p_hat
-by_subject = (
-    df.groupby("subject")[["p_complete", "completed"]]
-      .agg(p_pred_mean=("p_complete", "mean"),
-           actual_completion_rate=("completed", "mean"),
-           n=("completed", "count"))
-      .reset_index()
-)
 
-results["per_subject"] = by_subject.to_dict(orient="records")
+def model_params():
+    """(params, seed) to train with: the promoted sweep winner if there is one, else the defaults."""
+    best = promoted("ml")
+    return (full_params(best["params"]), best["seed"]) if best else (dict(DEFAULT_PARAMS), SEED)
+
+
+def fit_predict(X, y, params=None, seed=None):
+    """
+    Fit the adherence model on (X, y) and score every row of X.
+    Returns (p_complete per row, report fields); with a single label class the
+    baseline rule is used instead of the model.
+    """
+    if params is None:
+        params, seed = model_params()
+    params, seed = full_params(params), SEED if seed is None else seed
+    unique = np.unique(y)
+    results = {}
+
+    # ---- Case A: Not enough class diversity -> baseline ----
+    if len(unique) < 2:
+        p_hat = np.array([baseline_predict_proba(r) for r in X], dtype=float)
+        pred = (p_hat >= 0.5).astype(int)
+
+        results["mode"] = "baseline_fallback_single_class"
+        results["reason"] = f"Training labels have only one class: {int(unique[0])}. Need both 0 and 1."
+        results["overall_positive_rate"] = float(np.mean(y))
+        results["baseline_accuracy_on_seen"] = float(np.mean(pred == y))
+    else:
+        # ---- Case B: Train the classifier (logistic regression unless a sweep promoted another) ----
+        X_train, X_test, y_train, y_test = split(X, y)
+
+        clf = make_model(params, seed)
+        with span("ml.train", rows=len(X_train)):
+            clf.fit(X_train, y_train)
+
+        with span("ml.predict", rows=len(X)):
+            p_test = clf.predict_proba(X_test)[:, 1]
+            # For reporting, compute probs for all rows too
+            p_hat = clf.predict_proba(X)[:, 1]
+        count("rows_processed", len(X), stage="ml")
+        pred_test = (p_test >= 0.5).astype(int)
+
+        results["mode"] = "logistic_regression" if params["model"] == "logistic" else params["model"]
+        results["params"] = params
+        results["test_accuracy"] = float(np.mean(pred_test == y_test))
+        if params["model"] == "logistic":
+            results["coef"] = {
+                "est_min": float(clf.coef_[0][0]),
+                "effort_ratio": float(clf.coef_[0][1]),
+                "reminders_norm": float(clf.coef_[0][2]),
+                "intercept": float(clf.intercept_[0]),
+            }
+    return p_hat, results
+
+
+def feature_matrix(df):
+    """(X, y) for the adherence model from a feature table (app/features.py)."""
+    X = np.column_stack([df["est_min"].fillna(0).astype(float), df["effort_ratio"], df["reminders_norm"]])
+    return X, df["completed"].astype(int).values
+
+
+def run_ml(df=None, report_path=REPORT / "ml_adherence_report.json"):
+    """Train/evaluate the adherence model and write report/ml_adherence_report.json."""
+    if df is None:
+        if not events_path.exists():
+            raise SystemExit("[ml] data/events.csv missing. Run the app seed or perceive step first.")
+        # shared cached feature table (recomputed only when the data changes)
+        df, features_source = load_features(csv=events_path)
+    else:
+        # ---- Features (simple + explainable) ----
+        # completed is the label (0/1)
+        # Use columns that exist in your events.csv
+        needed_cols = ["est_min", "done_min", "reminders", "completed", "subject"]
+        missing = [c for c in needed_cols if c not in df.columns]
+        if missing:
+            raise SystemExit(f"[ml] Missing columns in events.csv: {missing}")
+        df, _ = compute_features(df, None)
+        features_source = "frames"
+    df = df.copy()
+    X, y = feature_matrix(df)
+
+    p_hat, fit = fit_predict(X, y)
+    results = {"features_source": features_source, **fit}
+
+    # ---- Per-subject aggregation (nice for your ISD demo) ----
+    df["p_complete"] = p_hat
+    by_subject = (
+        df.groupby("subject", observed=True)[["p_complete", "completed"]]
+          .agg(p_pred_mean=("p_complete", "mean"),
+               actual_completion_rate=("completed", "mean"),
+               n=("completed", "count"))
+          .reset_index()
+    )
+
+    results["per_subject"] = by_subject.to_dict(orient="records")
 
-out_path = REPORT / "ml_adherence_report.json"
-out_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    Path(report_path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
 
-print("[ml] wrote report/rl_adherence_report.json" if False else "[ml] wrote report/ml_adherence_report.json")
-print(json.dumps(results, indent=2))
 
+if __name__ == "__main__":
+    results = run_ml()
+    print("[ml] wrote report/ml_adherence_report.json")
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,162 @@
+# ml/ml_online.py — online adherence model (incremental logistic regression)
+# SGD logistic regression updated with partial_fit on the events that arrived
+# since the last checkpoint; the state (scaler, model, rows consumed, rolling
+# evaluation window) lives in models/ml_online. Each mini-batch is scored
+# before it is learned from (prequential evaluation), so the rolling window is
+# always held-out data.
+#
+#   python ml/ml_online.py            # consume new events, write report/ml_online_report.json
+#   python ml/ml_online.py --reset    # start over from all events
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+REPORT = ROOT / "report"
+REPORT.mkdir(parents=True, exist_ok=True)
+STATE = ROOT / "models" / "ml_online" / "state.joblib"
+
+sys.path.insert(0, str(ROOT / "app"))
+from features import load_features  # noqa: E402
+from fingerprint import file_fingerprint, appended_tail  # noqa: E402
+from tracing import count, span  # noqa: E402
+
+events_path = DATA / "events.csv"
+FEATURES = ["est_min", "effort_ratio", "reminders_norm"]
+BATCH = 256     # rows per partial_fit call
+EVAL_WINDOW = 500  # most recent held-out predictions kept for evaluation
+
+
+def to_xy(df):
+    """Feature matrix / labels from the shared feature table (rows without a label dropped)."""
+    df = df[df["completed"].notna()]
+    X = np.nan_to_num(df[FEATURES].to_numpy(dtype=float), nan=0.0)
+    return X, df["completed"].to_numpy(dtype=int)
+
+
+class OnlineAdherence:
+    def __init__(self):
+        self.scaler = StandardScaler()
+        self.clf = SGDClassifier(loss="log_loss", alpha=1e-3, learning_rate="adaptive", eta0=0.05, random_state=0)
+        self.rows = 0            # feature-table rows consumed
+        self.source = {}         # events.csv fingerprint at the last update
+        self.window: list = []   # [(y, p)] prequential predictions
+        self.fitted = False
+
+    # ----- inference -----
+    def predict_proba(self, X):
+        """P(completed) for rows of [est_min, effort_ratio, reminders_norm] (plain NumPy, no sklearn overhead)."""
+        X = np.nan_to_num(np.asarray(X, dtype=float).reshape(-1, len(FEATURES)), nan=0.0)
+        if not self.fitted:
+            return np.full(len(X), 0.5)
+        z = ((X - self.scaler.mean_) / self.scaler.scale_) @ self.clf.coef_[0] + self.clf.intercept_[0]
+        return 1.0 / (1.0 + np.exp(-z))
+
+    # ----- training -----
+    def update(self, X, y, batch=BATCH):
+        """Test-then-train over mini-batches; returns per-batch update latencies (s)."""
+        lat = []
+        for i in range(0, len(X), batch):
+            xb, yb = X[i:i + batch], y[i:i + batch]
+            if self.fitted:
+                self.window += list(zip(yb.tolist(), self.predict_proba(xb).tolist()))
+            t = time.perf_counter()
+            self.scaler.partial_fit(xb)
+            self.clf.partial_fit(self.scaler.transform(xb), yb, classes=[0, 1])
+            lat.append(time.perf_counter() - t)
+            self.fitted = True
+        self.window = self.window[-EVAL_WINDOW:]
+        return lat
+
+    def evaluation(self):
+        if not self.window:
+            return {"n": 0}
+        y, p = (np.asarray(a, dtype=float) for a in zip(*self.window))
+        eps = 1e-12
+        return {
+            "n": len(y),
+            "accuracy": round(float(np.mean((p >= 0.5) == y)), 4),
+            "log_loss": round(float(-np.mean(y * np.log(p + eps) + (1 - y) * np.log(1 - p + eps))), 4),
+            "brier": round(float(np.mean((p - y) ** 2)), 4),
+            "positive_rate": round(float(y.mean()), 4),
+        }
+
+    # ----- checkpoint -----
+    def save(self, path=STATE):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        joblib.dump(dict(vars(self)), tmp)  # plain dict: loadable whichever module runs this
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path=STATE):
+        m = OnlineAdherence()
+        try:
+            vars(m).update(joblib.load(path))
+        except (OSError, EOFError, ValueError, KeyError):
+            pass
+        return m
+
+
+def run_online(reset=False, batch=BATCH):
+    """Consume events appended since the checkpoint, update the model, write report/ml_online_report.json."""
+    if not events_path.exists():
+        raise SystemExit("[ml] data/events.csv missing. Run the app seed or perceive step first.")
+    model = OnlineAdherence() if reset else OnlineAdherence.load()
+    cur = file_fingerprint(events_path, model.source)
+    if model.source and cur.get("sha256") == model.source.get("sha256"):
+        how = "current"
+    elif model.source and appended_tail(events_path, model.source, cur) is not None:
+        how = "appended"
+    else:
+        model, how = OnlineAdherence(), "reset" if model.source else "initial"
+
+    lat = []
+    if how != "current":
+        df, _ = load_features(csv=events_path)
+        new = df.iloc[model.rows:]
+        X, y = to_xy(new)
+        with span("ml.train", rows=len(X), update=how):
+            lat = model.update(X, y, batch)
+        count("rows_processed", len(X), stage="ml")
+        model.rows = len(df)
+        model.source = cur
+        model.save()
+
+    results = {
+        "mode": "online_sgd_logistic",
+        "update": how,
+        "rows_seen": model.rows,
+        "batches": len(lat),
+        "batch_size": batch,
+        "update_latency_ms": {
+            "mean": round(1e3 * float(np.mean(lat)), 3) if lat else None,
+            "p95": round(1e3 * float(np.percentile(lat, 95)), 3) if lat else None,
+            "max": round(1e3 * float(np.max(lat)), 3) if lat else None,
+        },
+        "rolling_eval": model.evaluation(),
+    }
+    if model.fitted:
+        results["coef"] = dict(zip(FEATURES, (model.clf.coef_[0] / model.scaler.scale_).round(6).tolist()))
+    (REPORT / "ml_online_report.json").write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="ISA-Lite online adherence model")
+    ap.add_argument("--reset", action="store_true", help="discard the checkpoint and learn from all events")
+    ap.add_argument("--batch", type=int, default=BATCH)
+    args = ap.parse_args()
+    results = run_online(args.reset, args.batch)
+    print("[ml] wrote report/ml_online_report.json")
+    print(json.dumps(results, indent=2))